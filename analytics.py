@@ -0,0 +1,328 @@
+"""
+Record which options players pick during playthroughs, and aggregate those
+records offline into per-event choice heatmaps and funnels.
+
+While the game runs, a PlaythroughLogger writes one JSON record per decision
+to an append-only JSON Lines log. Records are handed to a background thread
+that writes them in batches, so the game loop never waits on the disk.
+
+The aggregator streams any number of logs (plain or gzipped) line by line, so
+its memory use does not grow with the size of the logs:
+    python analytics.py logs/*.jsonl --output report.json
+"""
+
+import argparse
+from ast import literal_eval
+import gzip
+import json
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from scene import EVENT_SCENES_FILEPATH
+
+# Default location of the playthrough log
+DEFAULT_ANALYTICS_FILEPATH = "analytics.jsonl"
+
+# Maximum number of records written to the log in one batch, and the longest
+# time in seconds a record waits before being written
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 1.0
+
+# Number of sessions the aggregator tracks at once when working out how many
+# sessions reached each event. Records of one session are expected to be close
+# together in the logs (each game writes its own session in order), so only
+# sessions with recent records need to be remembered.
+ACTIVE_SESSION_LIMIT = 1024
+
+
+class PlaythroughLogger:
+    """
+    Write a structured record of every decision a player makes to an
+    append-only log on a background thread.
+    """
+
+    def __init__(self, filepath=DEFAULT_ANALYTICS_FILEPATH, session_id=None):
+        """
+        Open the log and start the thread that writes to it.
+
+        Args:
+            filepath: string path of the log file, appended to if it exists
+            session_id: optional string identifying this playthrough, a random
+                ID is generated if not given
+        """
+        self._session_id = session_id or uuid.uuid4().hex
+        self._closed = False
+        self._queue = queue.Queue()
+        self._file = open(  # pylint: disable=consider-using-with
+            filepath, "a", encoding="utf-8"
+        )
+        self._thread = threading.Thread(
+            target=self._write_batches, name="analytics-writer", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def session_id(self):
+        """
+        Return the ID of the playthrough being logged.
+
+        Returns:
+            string session ID
+        """
+        return self._session_id
+
+    def record(self, event_id, option, health, inventory):
+        """
+        Log a decision made by the player. This only queues the record, so it
+        is safe to call from the game loop.
+
+        Args:
+            event_id: integer ID of the event the decision was made in
+            option: integer index of the option that was chosen
+            health: integer player health when the decision was made
+            inventory: list of strings of the player's inventory when the
+                decision was made
+        """
+        if self._closed:
+            return
+        self._queue.put(
+            {
+                "session": self._session_id,
+                "event": event_id,
+                "option": option,
+                "health": health,
+                "inventory": list(inventory),
+                "time": time.time(),
+            }
+        )
+
+    def close(self):
+        """
+        Write any records still waiting and close the log. Safe to call more
+        than once.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _write_batches(self):
+        """
+        Write queued records to the log in batches until the logger is closed.
+        Runs on the background thread.
+        """
+        running = True
+        while running:
+            batch = []
+            try:
+                record = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+            # Collect whatever else is already waiting, up to the batch size
+            while record is not None:
+                batch.append(json.dumps(record))
+                if len(batch) >= BATCH_SIZE:
+                    break
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            running = record is not None
+            if batch:
+                self._file.write("\n".join(batch) + "\n")
+                self._file.flush()
+
+
+def read_records(filepaths):
+    """
+    Stream records from playthrough logs one at a time.
+
+    Lines that aren't valid JSON (such as a final line cut short by a crash)
+    are skipped.
+
+    Args:
+        filepaths: list of string paths to logs, ending in .gz if gzipped
+
+    Yields:
+        Dictionary for each record in the logs
+    """
+    for filepath in filepaths:
+        opener = gzip.open if filepath.endswith(".gz") else open
+        with opener(filepath, "rt", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def count_records(records):
+    """
+    Count the choices made at each event and the number of sessions that
+    reached each event, streaming through the records once.
+
+    Args:
+        records: iterable of record dictionaries (see read_records)
+
+    Returns:
+        Tuple of a dictionary mapping event ID to a dictionary of option index
+            to number of choices, a dictionary mapping event ID to the number
+            of sessions that reached it, and the integer total number of
+            sessions and of decisions.
+    """
+    choices = {}
+    reached = {}
+    sessions = 0
+    decisions = 0
+
+    # Events each recently seen session has reached, in least recently seen
+    # order so the oldest sessions can be forgotten
+    active_sessions = OrderedDict()
+
+    for record in records:
+        decisions += 1
+        event_id = record["event"]
+        option = record["option"]
+        session = record["session"]
+
+        event_choices = choices.setdefault(event_id, {})
+        event_choices[option] = event_choices.get(option, 0) + 1
+
+        if session not in active_sessions:
+            sessions += 1
+            active_sessions[session] = set()
+            if len(active_sessions) > ACTIVE_SESSION_LIMIT:
+                active_sessions.popitem(last=False)
+        else:
+            active_sessions.move_to_end(session)
+        if event_id not in active_sessions[session]:
+            active_sessions[session].add(event_id)
+            reached[event_id] = reached.get(event_id, 0) + 1
+
+    return choices, reached, sessions, decisions
+
+
+def aggregate(records, event_data):
+    """
+    Aggregate playthrough records into per-event choice counts and the number
+    of sessions that reached each event.
+
+    Args:
+        records: iterable of record dictionaries (see read_records)
+        event_data: list of event dictionaries loaded from events.json
+
+    Returns:
+        Dictionary with the total number of "sessions" and "decisions", and
+            "events" mapping each event ID (as a string) to its name, the
+            number of sessions that reached it, the number of choices of each
+            option and the share of each option.
+    """
+    choices, reached, sessions, decisions = count_records(records)
+
+    events = {}
+    for event in event_data:
+        event_id = event["ID"]
+        # In importing to JSON, lists are stored as strings, and literal_eval
+        # converts from the string back into a list
+        option_names = literal_eval(event["TextOptions"])
+        event_choices = choices.get(event_id, {})
+        total = sum(event_choices.values())
+        events[str(event_id)] = {
+            "name": event.get("Name"),
+            "sessions": reached.get(event_id, 0),
+            "choices": {
+                _option_name(option_names, index): count
+                for index, count in sorted(event_choices.items())
+            },
+            "share": {
+                _option_name(option_names, index): count / total
+                for index, count in sorted(event_choices.items())
+            },
+        }
+
+    return {"sessions": sessions, "decisions": decisions, "events": events}
+
+
+def _option_name(option_names, index):
+    """
+    Find the text of an option, falling back to its index if the event data
+    has changed since the record was logged.
+
+    Args:
+        option_names: list of string option texts of an event
+        index: integer index of the chosen option
+
+    Returns:
+        string representing the option
+    """
+    if 0 <= index < len(option_names):
+        return option_names[index]
+    return str(index)
+
+
+def format_heatmap(report):
+    """
+    Format an aggregated report into a text heatmap of choices, with events
+    ordered by how many sessions reached them (the funnel).
+
+    Args:
+        report: dictionary returned by aggregate
+
+    Returns:
+        string representing the heatmap
+    """
+    lines = [
+        f"{report['sessions']} sessions, {report['decisions']} decisions",
+    ]
+    ordered = sorted(
+        report["events"].items(), key=lambda item: -item[1]["sessions"]
+    )
+    for event_id, event in ordered:
+        if not event["sessions"]:
+            continue
+        lines.append(
+            f"[{event_id}] {event['name']} - {event['sessions']} sessions"
+        )
+        for option, share in event["share"].items():
+            # One block per 5% of choices
+            blocks = "#" * round(share * 20)
+            lines.append(
+                f"    {blocks:<20} {share:>6.1%} {event['choices'][option]:>8}"
+                f"  {option}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Aggregate playthrough logs from the command line.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        description="Aggregate playthrough logs into choice heatmaps."
+    )
+    parser.add_argument("logs", nargs="+", help="playthrough log files")
+    parser.add_argument("--events", default=EVENT_SCENES_FILEPATH)
+    parser.add_argument("--output", help="write the report as JSON here")
+    args = parser.parse_args(argv)
+
+    with open(args.events, "r", encoding="utf-8") as file:
+        event_data = json.load(file)
+
+    report = aggregate(read_records(args.logs), event_data)
+    print(format_heatmap(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,664 @@
+"""
+Load and cache every external file the game uses (data files, images, fonts
+and sound effects) so each one is read and decoded at most once, and only when
+it is first needed.
+
+Text is drawn from pre-baked bitmap font atlases (see fontatlas.py) rather
+than rasterised by the font module. Rendered strings of text are also kept in
+a bounded cache, since the same health, inventory and direction text is drawn
+on every frame.
+
+Scaled copies of an image (for the window's resolution, or a mipmap pyramid
+as used by the minimap) are cached alongside it, so scaling only happens once
+per image and output size.
+
+Short sound effects are decoded once into a bounded cache of mixer Sounds,
+forgetting the least recently played effects beyond it. Music is streamed
+rather than cached (see audio.py).
+
+Images and sound effects can also be decoded ahead of time on a background
+thread (see prefetch.py). Decoded images are converted to the display format on
+the main thread, either by collect_prefetched or when the image is first
+requested.
+
+In low-memory mode, large opaque images (the map and event backgrounds) are
+stored as 8-bit palettised surfaces, a quarter of the size of display format
+surfaces, and decoded images can be held to a memory budget: once their
+surfaces take up more than the budget, the least recently used images are
+forgotten, to be decoded again if they are needed later. surface_memory
+reports how much memory each cache's surfaces take up.
+
+Files are read from the mounted asset bundle when it holds them, and from
+disk otherwise (see bundle.py).
+
+All caches are cleared when pygame quits, since fonts and converted surfaces
+are tied to the pygame modules that created them.
+"""
+
+from collections import OrderedDict
+from json import load
+
+import pygame
+
+from bundle import asset_source, open_asset
+from fontatlas import load_atlas
+from instrumentation import LATENCY, METRICS
+
+# Maximum number of rendered strings kept in the text cache
+TEXT_CACHE_SIZE = 256
+
+# Maximum number of decoded sound effects kept in the sound cache
+SOUND_CACHE_SIZE = 32
+
+# Smallest width or height in pixels of the last level of a mipmap pyramid
+MIPMAP_MIN_SIZE = 16
+
+# In low-memory mode, images without transparency and with at least this many
+# pixels are palettised to this many colors
+PALETTE_MIN_PIXELS = 512 * 512
+PALETTE_COLORS = 256
+
+# Caches of loaded files, keyed by filepath (and size for font atlases).
+# Images are kept in least recently used order, for the memory budget.
+_json_cache = {}
+_image_cache = OrderedDict()
+_atlas_cache = {}
+_mipmap_cache = {}
+
+# Images scaled to the window's resolution, keyed by (filepath, scale)
+_scaled_cache = {}
+
+# Images being decoded on a background thread, keyed by filepath, with a
+# concurrent.futures Future holding the decoded surface
+_pending_images = {}
+
+# Decoded sound effects, keyed by filepath and kept in least recently played
+# order, and those being decoded on a background thread
+_sound_cache = OrderedDict()
+_pending_sounds = {}
+
+# Cache of rendered text surfaces, keyed by (font filepath, size, text, color)
+# and kept in least recently used order
+_text_cache = OrderedDict()
+
+# Low-memory settings (see configure_memory)
+_memory = {"low_memory": False, "budget": None}
+
+# PYLINT DISABLE: this module level flag is changed from inside functions to
+# remember if the cache clearing function is registered to run on quit.
+_quit_registered = False  # pylint: disable=invalid-name
+
+
+def _register_quit():
+    """
+    Make sure the caches are cleared the next time pygame quits.
+
+    Pygame forgets registered quit functions once they have been called, so
+    this is re-registered every time the caches start being filled again.
+    """
+    global _quit_registered  # pylint: disable=global-statement
+    if not _quit_registered:
+        pygame.register_quit(clear_cache)
+        _quit_registered = True
+
+
+def clear_cache():
+    """
+    Forget every loaded file so that it is loaded again on next access.
+    """
+    global _quit_registered  # pylint: disable=global-statement
+    _json_cache.clear()
+    _image_cache.clear()
+    _atlas_cache.clear()
+    _mipmap_cache.clear()
+    _scaled_cache.clear()
+    _text_cache.clear()
+    _pending_images.clear()
+    _sound_cache.clear()
+    _pending_sounds.clear()
+    _quit_registered = False
+
+
+def load_json(filepath):
+    """
+    Load and parse a JSON data file, only reading the file the first time it
+    is requested.
+
+    Args:
+        filepath: string representing the path to the JSON file
+
+    Returns:
+        The parsed JSON data (list or dictionary)
+    """
+    if filepath not in _json_cache:
+        with open_asset(filepath) as datafile:
+            _json_cache[filepath] = load(datafile)
+    return _json_cache[filepath]
+
+
+def configure_memory(low_memory=False, budget=None):
+    """
+    Choose how much memory decoded images may take up. Images already decoded
+    are only affected by the budget.
+
+    Args:
+        low_memory: boolean, True to palettise large opaque images when they
+            are decoded
+        budget: optional integer most bytes the surfaces of decoded images and
+            their scaled copies may take up, or None for no limit
+    """
+    _memory["low_memory"] = low_memory
+    _memory["budget"] = budget
+    _enforce_budget()
+
+
+def surface_bytes(surface):
+    """
+    Find how much memory a surface's pixels take up.
+
+    Args:
+        surface: pygame Surface
+
+    Returns:
+        integer number of bytes, including any padding at the end of rows
+    """
+    return surface.get_pitch() * surface.get_height()
+
+
+def surface_memory():
+    """
+    Find how much memory the surfaces in each cache take up.
+
+    Returns:
+        Dictionary mapping "images" (decoded images), "scaled" (copies scaled
+            to the window's resolution), "mipmaps" (scaled down copies, not
+            counting the full size image), "atlases" (font atlases), "text"
+            (rendered strings) and "total" to integer numbers of bytes
+    """
+    usage = {
+        "images": sum(map(surface_bytes, _image_cache.values())),
+        "scaled": sum(map(surface_bytes, _scaled_cache.values())),
+        "mipmaps": sum(
+            surface_bytes(level)
+            for levels in _mipmap_cache.values()
+            for level in levels[1:]
+        ),
+        "atlases": sum(
+            surface_bytes(atlas.image) for atlas in _atlas_cache.values()
+        ),
+        "text": sum(map(surface_bytes, _text_cache.values())),
+    }
+    usage["total"] = sum(usage.values())
+    return usage
+
+
+def record_surface_memory():
+    """
+    Record how much memory the surfaces in each cache take up as metrics
+    gauges named "surface_memory_<cache>_bytes" (see surface_memory), if
+    metrics are enabled.
+    """
+    if METRICS.enabled:
+        for name, size in surface_memory().items():
+            METRICS.set_gauge(f"surface_memory_{name}_bytes", size)
+
+
+def _image_memory():
+    """
+    Find how much memory counts towards the memory budget.
+
+    Returns:
+        integer number of bytes taken up by decoded images and their scaled
+            copies and mipmaps
+    """
+    usage = surface_memory()
+    return usage["images"] + usage["scaled"] + usage["mipmaps"]
+
+
+def _enforce_budget(keep=()):
+    """
+    Forget the least recently used images until decoded images fit in the
+    memory budget, and record how much memory surfaces take up.
+
+    Args:
+        keep: optional collection of string paths of images that are about
+            to be used, so are never forgotten
+    """
+    budget = _memory["budget"]
+    if budget is not None:
+        for filepath in list(_image_cache):
+            if _image_memory() <= budget:
+                break
+            if filepath not in keep:
+                evict_image(filepath)
+                METRICS.increment("image_budget_evictions")
+    record_surface_memory()
+
+
+def _touch(filepath):
+    """
+    Mark an image as just used, so it is the last to be forgotten to stay in
+    the memory budget.
+
+    Args:
+        filepath: string representing the path to the image file
+    """
+    if filepath in _image_cache:
+        _image_cache.move_to_end(filepath)
+
+
+def _palettise(image):
+    """
+    Convert an image to an 8-bit surface with a palette of the colors that
+    best match it.
+
+    Args:
+        image: pygame Surface without transparency
+
+    Returns:
+        new 8-bit pygame Surface
+    """
+    # Pillow is only needed in low-memory mode
+    # pylint: disable-next=import-outside-toplevel
+    from PIL import Image
+
+    size = image.get_size()
+    quantised = Image.frombytes(
+        "RGB", size, pygame.image.tobytes(image, "RGB")
+    ).quantize(PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+    palette = quantised.getpalette()
+    surface = pygame.image.frombytes(quantised.tobytes(), size, "P")
+    surface.set_palette(
+        [palette[index : index + 3] for index in range(0, len(palette), 3)]
+    )
+    return surface
+
+
+def prepare_image(image):
+    """
+    Convert a freshly decoded image to the pixel format of the display so it
+    can be drawn quickly. In low-memory mode, 8-bit images (such as
+    palettised backgrounds) are left as they are.
+
+    If no display has been created yet, the image is returned unchanged since
+    pygame can't convert surfaces without a display.
+
+    Args:
+        image: pygame Surface decoded from an image file
+
+    Returns:
+        pygame Surface in the display's pixel format where possible
+    """
+    if _memory["low_memory"] and image.get_bitsize() == 8:
+        return image
+    if pygame.display.get_init() and pygame.display.get_surface() is not None:
+        if image.get_flags() & pygame.SRCALPHA:
+            return image.convert_alpha()
+        return image.convert()
+    return image
+
+
+def _decode_image(filepath):
+    """
+    Decode an image file, from the mounted bundle if it holds the image. In
+    low-memory mode, large images without transparency are palettised.
+
+    Args:
+        filepath: string representing the path to the image file
+
+    Returns:
+        pygame Surface containing the image, not yet converted for display
+    """
+    # The path is passed as a hint, so the image's format is known when it is
+    # decoded from a buffer
+    image = pygame.image.load(asset_source(filepath), filepath)
+    if (
+        _memory["low_memory"]
+        and image.get_bitsize() > 8
+        and not image.get_flags() & pygame.SRCALPHA
+        and image.get_width() * image.get_height() >= PALETTE_MIN_PIXELS
+    ):
+        METRICS.increment("images_palettised")
+        return _palettise(image)
+    return image
+
+
+def load_image(filepath):
+    """
+    Load an image file into a pygame surface, only decoding the file the first
+    time it is requested.
+
+    Args:
+        filepath: string representing the path to the image file
+
+    Returns:
+        pygame Surface containing the image
+    """
+    if filepath in _image_cache:
+        METRICS.increment("image_cache_hits")
+        _touch(filepath)
+        return _image_cache[filepath]
+
+    # If the image is already being decoded in the background, wait for that
+    # rather than decoding it a second time
+    with LATENCY.part("decode"):
+        pending = _pending_images.pop(filepath, None)
+        if pending is not None and not pending.cancelled():
+            if pending.done():
+                METRICS.increment("image_cache_hits")
+            else:
+                METRICS.increment("image_prefetch_waits")
+            image = pending.result()
+        else:
+            METRICS.increment("image_cache_misses")
+            image = _decode_image(filepath)
+
+        _register_quit()
+        _image_cache[filepath] = prepare_image(image)
+    _enforce_budget(keep=(filepath,))
+    return _image_cache[filepath]
+
+
+def is_image_cached(filepath):
+    """
+    Check if an image has been decoded and converted, so using it won't need
+    any more work.
+
+    Args:
+        filepath: string representing the path to the image file
+
+    Returns:
+        boolean, True if the image is in the image cache
+    """
+    return filepath in _image_cache
+
+
+def evict_image(filepath):
+    """
+    Forget a decoded image, its scaled copies and any background decode of it,
+    so it is decoded again from file the next time it is used.
+
+    Args:
+        filepath: string representing the path to the image file
+    """
+    _image_cache.pop(filepath, None)
+    _mipmap_cache.pop(filepath, None)
+    for key in [key for key in _scaled_cache if key[0] == filepath]:
+        del _scaled_cache[key]
+    pending = _pending_images.pop(filepath, None)
+    if pending is not None:
+        pending.cancel()
+
+
+def _smoothscale(image, size):
+    """
+    Scale an image with filtering where pygame supports it. Filtered scaling
+    needs 24 or 32 bit pixels, so images with fewer bits per pixel are scaled
+    without it.
+
+    Args:
+        image: pygame Surface to scale
+        size: tuple of two ints (width, height) to scale the image to
+
+    Returns:
+        new pygame Surface of the scaled image
+    """
+    if image.get_bitsize() >= 24:
+        return pygame.transform.smoothscale(image, size)
+    return pygame.transform.scale(image, size)
+
+
+def load_scaled_image(filepath, scale):
+    """
+    Load an image scaled by a factor, only scaling it the first time it is
+    requested at that scale.
+
+    Args:
+        filepath: string representing the path to the image file
+        scale: float factor to scale the width and height of the image by
+
+    Returns:
+        pygame Surface containing the scaled image
+    """
+    if scale == 1:
+        return load_image(filepath)
+    key = (filepath, scale)
+    _touch(filepath)
+    if key not in _scaled_cache:
+        image = load_image(filepath)
+        METRICS.increment("image_scales")
+        _register_quit()
+        with LATENCY.part("scale"):
+            _scaled_cache[key] = _smoothscale(
+                image,
+                (
+                    max(1, round(image.get_width() * scale)),
+                    max(1, round(image.get_height() * scale)),
+                ),
+            )
+        _enforce_budget(keep=(filepath,))
+    return _scaled_cache[key]
+
+
+def evict_scaled():
+    """
+    Forget every scaled image, such as when the window has been resized and
+    they are no longer the right size.
+    """
+    _scaled_cache.clear()
+
+
+def load_mipmaps(filepath):
+    """
+    Load an image along with copies of it successively scaled down by half,
+    only scaling the image the first time it is requested.
+
+    Args:
+        filepath: string representing the path to the image file
+
+    Returns:
+        list of pygame Surfaces, starting with the full size image, each half
+            the width and height of the last, down to MIPMAP_MIN_SIZE pixels
+    """
+    _touch(filepath)
+    if filepath not in _mipmap_cache:
+        levels = [load_image(filepath)]
+        width, height = levels[0].get_size()
+        while min(width, height) // 2 >= MIPMAP_MIN_SIZE:
+            width, height = width // 2, height // 2
+            # Scaling each level from the one before keeps every step a cheap
+            # halving, and smoothscale averages the pixels it drops
+            levels.append(_smoothscale(levels[-1], (width, height)))
+        _register_quit()
+        _mipmap_cache[filepath] = levels
+        _enforce_budget(keep=(filepath,))
+    return _mipmap_cache[filepath]
+
+
+def prefetch_image(filepath, executor):
+    """
+    Start decoding an image on a background thread if it hasn't been loaded
+    or started already.
+
+    Args:
+        filepath: string representing the path to the image file
+        executor: concurrent.futures Executor to decode the image with
+    """
+    if filepath in _image_cache or filepath in _pending_images:
+        return
+    _register_quit()
+    _pending_images[filepath] = executor.submit(_decode_image, filepath)
+
+
+def collect_prefetched():
+    """
+    Move every image and sound effect that has finished decoding in the
+    background into its cache, converting images to the display format. Must
+    be called from the main thread, and never waits for a decode to finish.
+    """
+    collected = []
+    for filepath, pending in list(_pending_images.items()):
+        if pending.done():
+            del _pending_images[filepath]
+            try:
+                _image_cache[filepath] = prepare_image(pending.result())
+            except (pygame.error, OSError):
+                # Leave the error to be raised when the image is actually used
+                continue
+            # Images are prefetched because they are about to be drawn, so
+            # they count as the most recently used, and older images are
+            # forgotten first to stay in the memory budget
+            collected.append(filepath)
+    if collected:
+        _enforce_budget(keep=collected)
+
+    # Sounds need no converting, so finished decodes are only moved into the
+    # sound cache. They are about to be needed, so count as recently played.
+    for filepath, pending in list(_pending_sounds.items()):
+        if pending.done():
+            del _pending_sounds[filepath]
+            if pending.exception() is None:
+                _cache_sound(filepath, pending.result())
+
+
+def load_font_atlas(filepath, size):
+    """
+    Load the bitmap atlas of a font at a given size, only loading (or, if it
+    hasn't been pre-baked, building) it the first time that size is requested.
+
+    Args:
+        filepath: string representing the path to the font file
+        size: integer font size in pixels
+
+    Returns:
+        FontAtlas object
+    """
+    key = (filepath, size)
+    if key not in _atlas_cache:
+        METRICS.increment("font_atlas_loads")
+        _register_quit()
+        _atlas_cache[key] = load_atlas(filepath, size)
+    return _atlas_cache[key]
+
+
+def render_text(font_filepath, size, text, color):
+    """
+    Render a string of anti-aliased text by copying glyphs from the font's
+    atlas, reusing the surface from an earlier render of the same string where
+    possible.
+
+    Only the TEXT_CACHE_SIZE most recently used strings are kept.
+
+    Args:
+        font_filepath: string representing the path to the font file
+        size: integer font size in pixels
+        text: string of text to render
+        color: tuple of three ints (r, g, b) of the text color
+
+    Returns:
+        pygame Surface containing the rendered text
+    """
+    key = (font_filepath, size, text, color)
+    surface = _text_cache.get(key)
+    if surface is not None:
+        METRICS.increment("text_cache_hits")
+        _text_cache.move_to_end(key)
+        return surface
+
+    METRICS.increment("text_cache_misses")
+    with LATENCY.part("text"):
+        surface = load_font_atlas(font_filepath, size).render(text, color)
+    _text_cache[key] = surface
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return surface
+
+
+def evict_text(lines):
+    """
+    Forget every rendering of some strings of text (such as the lines an event
+    prompt is split into), freeing space in the text cache once that text is
+    no longer drawn. Only renderings of exactly those strings are forgotten,
+    so shorter text they contain (like "Inventory:") stays cached.
+
+    Args:
+        lines: iterable of strings of text that was rendered
+    """
+    lines = set(lines)
+    for key in [key for key in _text_cache if key[2] in lines]:
+        del _text_cache[key]
+
+
+def _decode_sound(filepath):
+    """
+    Decode a sound effect file, from the mounted bundle if it holds the file.
+
+    Args:
+        filepath: string representing the path to the sound file
+
+    Returns:
+        pygame mixer Sound of the decoded effect
+    """
+    return pygame.mixer.Sound(file=asset_source(filepath))
+
+
+def _cache_sound(filepath, sound):
+    """
+    Add a decoded sound effect to the sound cache as the most recently played,
+    forgetting the least recently played effects beyond its size.
+
+    Args:
+        filepath: string representing the path to the sound file
+        sound: pygame mixer Sound of the decoded effect
+    """
+    _register_quit()
+    _sound_cache[filepath] = sound
+    while len(_sound_cache) > SOUND_CACHE_SIZE:
+        _sound_cache.popitem(last=False)
+
+
+def load_sound(filepath):
+    """
+    Load a sound effect, only decoding the file the first time it is requested
+    (or after it has been forgotten from the sound cache). The mixer must be
+    initialised.
+
+    Args:
+        filepath: string representing the path to the sound file
+
+    Returns:
+        pygame mixer Sound of the decoded effect
+    """
+    if filepath in _sound_cache:
+        METRICS.increment("sound_cache_hits")
+        _sound_cache.move_to_end(filepath)
+        return _sound_cache[filepath]
+
+    # If the effect is already being decoded in the background, wait for that
+    # rather than decoding it a second time
+    pending = _pending_sounds.pop(filepath, None)
+    if pending is not None and not pending.cancelled():
+        METRICS.increment(
+            "sound_cache_hits" if pending.done() else "sound_prefetch_waits"
+        )
+        sound = pending.result()
+    else:
+        METRICS.increment("sound_cache_misses")
+        sound = _decode_sound(filepath)
+    _cache_sound(filepath, sound)
+    return sound
+
+
+def prefetch_sound(filepath, executor):
+    """
+    Start decoding a sound effect on a background thread if it hasn't been
+    loaded or started already. The mixer must be initialised.
+
+    Args:
+        filepath: string representing the path to the sound file
+        executor: concurrent.futures Executor to decode the effect with
+    """
+    if filepath in _sound_cache or filepath in _pending_sounds:
+        return
+    _register_quit()
+    _pending_sounds[filepath] = executor.submit(_decode_sound, filepath)
@@ -0,0 +1,141 @@
+"""
+Play background music for each area of the map and sound effects for events,
+as declared in the story data.
+
+A map point or event can name a track in its "Music" column, which starts when
+the player reaches it and keeps playing (across map points and events that
+don't name one) until another track is named, so an area's music only needs
+declaring where the area begins. An event can also name a short effect in its
+"Sound" column, played as the event is shown.
+
+Music is streamed by pygame.mixer.music, from disk or straight out of the asset
+bundle (see bundle.stream_asset), so whole tracks are never read into memory.
+Effects are decoded once into a bounded cache (see
+assets.load_sound), and the effects of the events the player could reach next
+are decoded in the background along with their images (see prefetch.py).
+
+Audio is optional: the game runs silently if started with --no-audio, when run
+headless (without a display to show the game on), or if the mixer module or
+an audio device isn't available.
+"""
+
+import os
+
+import pygame
+
+import assets
+from bundle import stream_asset
+from instrumentation import METRICS
+from viewport import is_headless
+
+# Columns of events.json and map.json naming music tracks and sound effects
+MUSIC_COLUMN = "Music"
+SOUND_COLUMN = "Sound"
+
+# Time in milliseconds a new track takes to fade in
+MUSIC_FADE_TIME = 750
+
+# Volume music is played at, from 0 to 1, leaving room for sound effects
+MUSIC_VOLUME = 0.6
+
+# Whether the mixer was started, the track being played, and the file object
+# it is streamed from if it is in an asset bundle
+_state = {"enabled": False, "music": None, "stream": None}
+
+
+def start_audio(enabled=True):
+    """
+    Start the mixer, unless audio is turned off or the game is running
+    headless. If the mixer was started by pygame.init but audio isn't wanted,
+    it is stopped again, so no audio device is held open.
+
+    Args:
+        enabled: boolean, False to keep the game silent
+
+    Returns:
+        boolean, True if audio will be played
+    """
+    _state["enabled"] = False
+    _state["music"] = None
+    if is_headless():
+        enabled = False
+    try:
+        if not enabled:
+            if pygame.mixer.get_init():
+                pygame.mixer.quit()
+            return False
+        pygame.mixer.init()
+    except (pygame.error, NotImplementedError):
+        # No audio device, or pygame was built without the mixer
+        return False
+    _state["enabled"] = True
+    return True
+
+
+def audio_enabled():
+    """
+    Check whether audio is being played.
+
+    Returns:
+        boolean, True if the mixer was started and hasn't been stopped since
+    """
+    return _state["enabled"] and pygame.mixer.get_init() is not None
+
+
+def play_music(filepath):
+    """
+    Start streaming a music track on a loop, replacing the track before it. A
+    track that is already playing carries on uninterrupted.
+
+    Args:
+        filepath: string path to the track, or None or "" to leave the current
+            track playing
+    """
+    if not filepath or filepath == _state["music"] or not audio_enabled():
+        return
+    # The extension tells the mixer the track's format when it is streamed
+    # out of the bundle
+    source = stream_asset(filepath)
+    pygame.mixer.music.load(source, os.path.splitext(filepath)[1][1:])
+    pygame.mixer.music.set_volume(MUSIC_VOLUME)
+    pygame.mixer.music.play(loops=-1, fade_ms=MUSIC_FADE_TIME)
+
+    # Loading the new track stopped the old one, so its stream can be closed
+    if _state["stream"] is not None:
+        _state["stream"].close()
+    _state["stream"] = None if isinstance(source, str) else source
+    _state["music"] = filepath
+    METRICS.increment("music_changes")
+
+
+def play_sound(filepath):
+    """
+    Play a sound effect once.
+
+    Args:
+        filepath: string path to the effect, or None or "" to play nothing
+    """
+    if not filepath or not audio_enabled():
+        return
+    assets.load_sound(filepath).play()
+
+
+def play_map_audio(map_point):
+    """
+    Play the music declared for a map point the player has reached.
+
+    Args:
+        map_point: map point dictionary loaded from map.json
+    """
+    play_music(map_point.get(MUSIC_COLUMN))
+
+
+def play_event_audio(event):
+    """
+    Play the music and sound effect declared for an event being shown.
+
+    Args:
+        event: event dictionary loaded from events.json
+    """
+    play_music(event.get(MUSIC_COLUMN))
+    play_sound(event.get(SOUND_COLUMN))
@@ -0,0 +1,502 @@
+"""
+Exactly analyse how likely each ending of the game is by treating the game as
+an absorbing Markov chain.
+
+Every state is a point in the game (an event, or standing on the map) together
+with the player's health and inventory. Under a choice policy (uniform over the
+visible options by default, or weighted per option), every decision moves the
+player to new states with known probabilities, until an absorbing state (a win,
+a death, ...) is reached. Solving the chain with linear algebra gives the exact
+win/death probabilities from each starting point, the expected health when the
+game ends and the expected number of decisions made, with none of the noise of
+sampling random playthroughs.
+
+Run with:
+    python balance.py           # start from every event
+    python balance.py --map     # start from every map point
+"""
+
+import argparse
+import json
+from ast import literal_eval
+
+import numpy as np
+
+import assets
+from options import OptionTable
+from scene import EVENT_SCENES_FILEPATH, MAP_SCENES_FILEPATH, NO_EVENT_ID
+
+# Health the player starts the game with
+DEFAULT_PLAYER_HEALTH = 10
+
+# Largest number of non-absorbing states analysed before giving up. The chain
+# is solved with dense matrices, so n states take n^2 floats (128 MB at this
+# cap) and O(n^3) time, a few seconds at most.
+MAX_STATES = 4000
+
+# Ways the game can end, used to label absorbing states
+WIN = "win"
+DEATH = "death"
+# Reaching the end of an event tree when the map is not being analysed
+EXIT = "exit"
+# Reaching a map point with no directions to move in
+STUCK = "stuck"
+# Reaching a None result without a game end message, which the game can't
+# handle
+INVALID = "invalid"
+OUTCOMES = (WIN, DEATH, EXIT, STUCK, INVALID)
+
+
+class BalanceAnalyser:
+    """
+    Build the absorbing Markov chain of the game under a choice policy and
+    solve it for the probability of each ending.
+    """
+
+    def __init__(
+        self,
+        event_data,
+        map_data=None,
+        weights=None,
+        start_health=DEFAULT_PLAYER_HEALTH,
+        max_states=MAX_STATES,
+    ):
+        """
+        Parse the game data once so states can be expanded quickly.
+        Inventories are stored as bitmasks (see OptionTable.inventory_mask).
+
+        Args:
+            event_data: list of event dictionaries loaded from events.json
+            map_data: optional list of map point dictionaries loaded from
+                map.json. If not given, the end of an event tree absorbs as
+                an EXIT rather than returning to the map.
+            weights: optional dictionary mapping event ID to a list of
+                weights, one per option, used instead of choosing uniformly.
+                Weights are normalised over the options visible to the player.
+            start_health: integer health the player starts with
+            max_states: integer limit on the number of non-absorbing states
+        """
+        self._map_data = map_data
+        self._weights = weights or {}
+        self._start_health = start_health
+        self._max_states = max_states
+
+        # Events are parsed once, and options are shown to the player using
+        # the same table as the game itself
+        self._options = OptionTable(event_data)
+
+    def _option_probabilities(self, event_id, options):
+        """
+        Find the probability of choosing each visible option of an event under
+        the choice policy.
+
+        Args:
+            event_id: integer ID of the event
+            options: list of integer indices of the visible options
+
+        Returns:
+            List of float probabilities, one per visible option
+        """
+        weights = self._weights.get(event_id)
+        if weights is not None:
+            visible = [float(weights[index]) for index in options]
+            total = sum(visible)
+            if total > 0:
+                return [weight / total for weight in visible]
+        return [1 / len(options)] * len(options)
+
+    def _arrive(self, map_id, health, inventory):
+        """
+        Find the state the player is in after arriving at a map point, which
+        triggers the point's special event if it has one.
+
+        Args:
+            map_id: integer ID of the map point
+            health: integer player health
+            inventory: integer bitmask of the player's inventory
+
+        Returns:
+            Tuple state (map ID, event ID, health, inventory)
+        """
+        return (
+            map_id,
+            self._map_data[map_id]["SpecialEvent"],
+            health,
+            inventory,
+        )
+
+    def _event_transitions(self, state):
+        """
+        Find every state that can follow a decision at an event, following the
+        same rules as the game loop in main.py.
+
+        Args:
+            state: tuple (map ID, event ID, health, inventory)
+
+        Returns:
+            List of tuples (float probability, next state). Absorbing states
+                are tuples (outcome, health).
+        """
+        _, event_id, health, inventory = state
+        options = self._options.visible_options(event_id, inventory, health)
+        return [
+            (probability, self._choose(state, index))
+            for index, probability in zip(
+                options, self._option_probabilities(event_id, options)
+            )
+        ]
+
+    def _choose(self, state, index):
+        """
+        Find the state that follows choosing an option at an event, following
+        the same rules as the game loop in main.py.
+
+        Args:
+            state: tuple (map ID, event ID, health, inventory)
+            index: integer index of the chosen option
+
+        Returns:
+            Tuple next state, or tuple (outcome, health) if absorbed
+        """
+        map_id, event_id, health, inventory = state
+        next_id, effect, end_message = self._options.outcome(event_id, index)
+
+        # The compiled effect applies the health change (reduced by any item
+        # check) and inventory change of the option
+        new_health, inventory = effect(health, inventory)
+        health_change, health = health - new_health, new_health
+        if health_change != 0 and health <= 0:
+            return (DEATH, health)
+        if health_change == 0 and end_message is not None:
+            return (WIN, health)
+
+        if next_id is None or (
+            next_id != NO_EVENT_ID and next_id not in self._options.event_ids
+        ):
+            return (INVALID, health)
+        if next_id != NO_EVENT_ID:
+            return (map_id, next_id, health, inventory)
+        if map_id is None:
+            # Without a map point to return to, the end of the event tree is
+            # treated as an ending of its own
+            return (EXIT, health)
+        return (map_id, NO_EVENT_ID, health, inventory)
+
+    def _map_transitions(self, state):
+        """
+        Find every state that can follow choosing a direction on the map.
+        Directions are chosen uniformly.
+
+        Args:
+            state: tuple (map ID, NO_EVENT_ID, health, inventory)
+
+        Returns:
+            List of tuples (float probability, next state). Absorbing states
+                are tuples (outcome, health).
+        """
+        map_id, _, health, inventory = state
+        directions = [
+            next_id
+            for next_id in literal_eval(
+                self._map_data[map_id]["DirectionsToMove"]
+            )
+            if next_id is not None
+        ]
+        if not directions:
+            return [(1.0, (STUCK, health))]
+        return [
+            (1 / len(directions), self._arrive(next_id, health, inventory))
+            for next_id in directions
+        ]
+
+    def _transitions(self, state):
+        """
+        Find every state that can follow a non-absorbing state.
+
+        Args:
+            state: tuple (map ID, event ID, health, inventory)
+
+        Returns:
+            List of tuples (float probability, next state)
+        """
+        if state[1] == NO_EVENT_ID:
+            return self._map_transitions(state)
+        return self._event_transitions(state)
+
+    def _explore(self, starts):
+        """
+        Find every state reachable from a set of starting states, numbering
+        the transient states and the absorbing states separately.
+
+        Args:
+            starts: list of tuple starting states
+
+        Returns:
+            Tuple of a dictionary mapping each transient state to its index, a
+                dictionary mapping each absorbing state to its index, and a
+                list of (transient index, next state, probability) edges.
+
+        Raises:
+            ValueError: if there are more than the maximum number of states
+        """
+        transient = {}
+        absorbing = {}
+        edges = []
+        frontier = list(dict.fromkeys(starts))
+        for state in frontier:
+            transient[state] = len(transient)
+        while frontier:
+            state = frontier.pop()
+            for probability, next_state in self._transitions(state):
+                if next_state[0] in OUTCOMES:
+                    if next_state not in absorbing:
+                        absorbing[next_state] = len(absorbing)
+                    edges.append((transient[state], next_state, probability))
+                    continue
+                if next_state not in transient:
+                    if len(transient) >= self._max_states:
+                        raise ValueError(
+                            f"More than {self._max_states} states reachable"
+                        )
+                    transient[next_state] = len(transient)
+                    frontier.append(next_state)
+                edges.append((transient[state], next_state, probability))
+
+        return transient, absorbing, edges
+
+    @staticmethod
+    def _matrices(transient, absorbing, edges):
+        """
+        Fill the transient (Q) and absorbing (R) transition matrices.
+
+        Args:
+            transient: dictionary mapping transient states to their index
+            absorbing: dictionary mapping absorbing states to their index
+            edges: list of (transient index, next state, probability) edges
+
+        Returns:
+            Tuple of the Q and R numpy arrays
+        """
+        q_matrix = np.zeros((len(transient), len(transient)))
+        r_matrix = np.zeros((len(transient), len(absorbing)))
+        for row, next_state, probability in edges:
+            if next_state in absorbing:
+                r_matrix[row, absorbing[next_state]] += probability
+            else:
+                q_matrix[row, transient[next_state]] += probability
+        return q_matrix, r_matrix
+
+    def solve(self, starts):
+        """
+        Build the absorbing chain reachable from a set of starting states and
+        solve it.
+
+        Args:
+            starts: list of tuple starting states (map ID, event ID, health,
+                inventory)
+
+        Returns:
+            Tuple of an (n starts x n outcomes) numpy array of absorption
+                probabilities for each outcome in OUTCOMES, an array of the
+                expected health at absorption per start and an array of the
+                expected number of decisions per start.
+
+        Raises:
+            ValueError: if there are more than the maximum number of states,
+                or some states can never reach an ending.
+        """
+        transient, absorbing, edges = self._explore(starts)
+        q_matrix, r_matrix = self._matrices(transient, absorbing, edges)
+        size = len(transient)
+
+        # Solving (I - Q) X = [R | 1] gives both the absorption probabilities
+        # B = N R and the expected number of steps N 1, where N = (I - Q)^-1
+        # is the fundamental matrix of the chain.
+        try:
+            solution = np.linalg.solve(
+                np.eye(size) - q_matrix,
+                np.hstack([r_matrix, np.ones((size, 1))]),
+            )
+        except np.linalg.LinAlgError as error:
+            raise ValueError("Some states can never reach an ending") from error
+        solution = solution[[transient[start] for start in starts]]
+
+        # Collapse absorbing states into outcomes, and weight each by the
+        # health the player has when absorbed
+        outcome_matrix = np.zeros((len(absorbing), len(OUTCOMES)))
+        health = np.zeros(len(absorbing))
+        for (outcome, final_health), column in absorbing.items():
+            outcome_matrix[column, OUTCOMES.index(outcome)] = 1
+            health[column] = final_health
+        return (
+            solution[:, :-1] @ outcome_matrix,
+            solution[:, :-1] @ health,
+            solution[:, -1],
+        )
+
+    def _report(self, labels, starts):
+        """
+        Solve the chain from a set of starts and label the results.
+
+        Args:
+            labels: list of integer IDs labelling each start
+            starts: list of tuple starting states
+
+        Returns:
+            Dictionary mapping each label to a dictionary of the probability
+                of each outcome, the "expected_health" and "expected_steps"
+        """
+        probabilities, health, steps = self.solve(starts)
+        report = {}
+        for index, label in enumerate(labels):
+            result = {
+                outcome: float(probabilities[index, column])
+                for column, outcome in enumerate(OUTCOMES)
+            }
+            result["expected_health"] = float(health[index])
+            result["expected_steps"] = float(steps[index])
+            report[label] = result
+        return report
+
+    def analyse_events(self, event_ids=None):
+        """
+        Analyse the game starting at each event with full health and an empty
+        inventory. When map data is given, the end of an event tree returns
+        the player to the map point whose special event starts the tree.
+
+        Args:
+            event_ids: optional list of integer event IDs to start from,
+                defaults to every event
+
+        Returns:
+            Dictionary mapping event ID to its results (see _report)
+        """
+        if event_ids is None:
+            event_ids = list(self._options.event_ids)
+        starts = [
+            (self._event_map_point(event_id), event_id, self._start_health, 0)
+            for event_id in event_ids
+        ]
+        return self._report(event_ids, starts)
+
+    def analyse_map(self, map_ids=None):
+        """
+        Analyse the game starting by arriving at each map point with full
+        health and an empty inventory.
+
+        Args:
+            map_ids: optional list of integer map point IDs to start from,
+                defaults to every map point
+
+        Returns:
+            Dictionary mapping map point ID to its results (see _report)
+        """
+        if map_ids is None:
+            map_ids = [point["ID"] for point in self._map_data]
+        starts = [
+            self._arrive(map_id, self._start_health, 0) for map_id in map_ids
+        ]
+        return self._report(map_ids, starts)
+
+    def _event_map_point(self, event_id):
+        """
+        Find the map point an event is reached from, by following each map
+        point's event tree.
+
+        Args:
+            event_id: integer ID of the event
+
+        Returns:
+            integer map point ID, or None if there is no map data or the
+                event can't be reached from the map
+        """
+        if self._map_data is None:
+            return None
+        for point in self._map_data:
+            seen = set()
+            frontier = [point["SpecialEvent"]]
+            while frontier:
+                current = frontier.pop()
+                if current == event_id:
+                    return point["ID"]
+                if current in seen or current not in self._options.event_ids:
+                    continue
+                seen.add(current)
+                frontier += self._options.event(current)["OptionResultID"]
+        return None
+
+
+def format_report(report):
+    """
+    Format analysis results into a human readable table.
+
+    Args:
+        report: dictionary of results (see BalanceAnalyser._report)
+
+    Returns:
+        string representing the table
+    """
+    lines = [
+        f"{'start':>6}"
+        + "".join(f"{outcome:>9}" for outcome in OUTCOMES)
+        + f"{'health':>9}{'steps':>9}"
+    ]
+    for label, result in report.items():
+        lines.append(
+            f"{label:>6}"
+            + "".join(f"{result[outcome]:>9.4f}" for outcome in OUTCOMES)
+            + f"{result['expected_health']:>9.3f}"
+            + f"{result['expected_steps']:>9.3f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Run the analysis from the command line.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        description="Exact ending probabilities of Parcel B: Beetle Quest."
+    )
+    map_options = parser.add_mutually_exclusive_group()
+    map_options.add_argument(
+        "--map",
+        action="store_true",
+        help="start from every map point rather than every event",
+    )
+    map_options.add_argument(
+        "--no-map",
+        action="store_true",
+        help="treat the end of an event tree as an ending of its own",
+    )
+    parser.add_argument(
+        "--weights",
+        help="JSON file mapping event IDs to lists of option weights",
+    )
+    parser.add_argument("--health", type=int, default=DEFAULT_PLAYER_HEALTH)
+    args = parser.parse_args(argv)
+
+    weights = None
+    if args.weights:
+        with open(args.weights, "r", encoding="utf-8") as file:
+            weights = {
+                int(key): value for key, value in json.load(file).items()
+            }
+
+    analyser = BalanceAnalyser(
+        assets.load_json(EVENT_SCENES_FILEPATH),
+        None if args.no_map else assets.load_json(MAP_SCENES_FILEPATH),
+        weights=weights,
+        start_health=args.health,
+    )
+    if args.map:
+        print(format_report(analyser.analyse_map()))
+    else:
+        print(format_report(analyser.analyse_events()))
+
+
+if __name__ == "__main__":
+    main()
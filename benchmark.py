@@ -0,0 +1,292 @@
+"""
+Benchmark the draw paths of every scene in the game so rendering regressions
+can be caught before they reach the kiosks.
+
+The suite times MapScene.draw for every map node, EventScene.draw for every
+event, the death and win screens, and split_text_to_lines on long prompts. For
+each case the p50/p99 frame times and the Python-side allocations per call are
+reported. Results can be saved as a JSON baseline and later compared against,
+with any regression causing a non-zero exit code.
+
+Run headless with:
+    SDL_VIDEODRIVER=dummy python benchmark.py --save-baseline
+    SDL_VIDEODRIVER=dummy python benchmark.py --compare
+
+NOTE: allocations are measured with tracemalloc, which only sees memory
+allocated through Python. Pixel buffers allocated inside SDL are not counted.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import pygame
+
+import scene
+from character import PlayerCharacter
+from instrumentation import percentile
+
+# Default location of the stored benchmark baseline
+BENCHMARK_BASELINE_FILEPATH = "data/benchmark_data/baseline.json"
+
+# Default benchmark run parameters
+DEFAULT_ITERATIONS = 50
+DEFAULT_WARMUP = 3
+ALLOCATION_ITERATIONS = 5
+
+# Fractional slowdown (compared to the baseline) allowed before a benchmark is
+# reported as a regression
+DEFAULT_TOLERANCE = 0.25
+
+# Number of times the longest prompt is repeated to create the long text case
+LONG_PROMPT_REPEATS = 4
+
+# Player constants used to create the benchmark player
+PLAYER_SPRITE_FILEPATH = "data/sprite_data/resting.png"
+DEFAULT_PLAYER_HEALTH = 10
+
+
+def measure(func, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP):
+    """
+    Time repeated calls of a function and measure how much memory it allocates.
+
+    Timing and allocation tracking are done in separate passes, since
+    tracemalloc adds significant overhead to every allocation.
+
+    Args:
+        func: function taking no arguments to benchmark
+        iterations: integer number of timed calls
+        warmup: integer number of untimed calls made before timing
+
+    Returns:
+        Dictionary with the p50, p99 and mean call time in milliseconds, the
+            peak bytes allocated during one call and the number of blocks
+            still allocated after one call.
+    """
+    for _ in range(warmup):
+        func()
+
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+
+    # Measure allocations, keeping the worst case seen over a few calls
+    peak_bytes = 0
+    retained_blocks = 0
+    tracemalloc.start()
+    try:
+        for _ in range(ALLOCATION_ITERATIONS):
+            tracemalloc.reset_peak()
+            before_size, _ = tracemalloc.get_traced_memory()
+            before = tracemalloc.take_snapshot()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            peak_bytes = max(peak_bytes, peak - before_size)
+            blocks = sum(
+                stat.count_diff for stat in after.compare_to(before, "filename")
+            )
+            retained_blocks = max(retained_blocks, blocks)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": percentile(times, 0.5),
+        "p99_ms": percentile(times, 0.99),
+        "mean_ms": sum(times) / len(times),
+        "peak_alloc_bytes": peak_bytes,
+        "retained_blocks": retained_blocks,
+    }
+
+
+def build_cases(surface):
+    """
+    Create every benchmark case for the scenes drawn onto a given surface.
+
+    Args:
+        surface: pygame surface to draw all scenes on to
+
+    Returns:
+        Dictionary mapping a string benchmark name to a function taking no
+            arguments that runs the case once.
+    """
+    player = PlayerCharacter(PLAYER_SPRITE_FILEPATH, DEFAULT_PLAYER_HEALTH)
+    map_scene = scene.MapScene(surface, player)
+    event_scene = scene.EventScene(surface, player)
+
+    cases = {}
+
+    # Default arguments are used so each lambda keeps its own ID rather than
+    # the last value of the loop variable.
+    for index, _ in enumerate(map_scene.scene_data):
+        cases[f"map_draw[{index}]"] = lambda i=index: map_scene.draw(i)
+    for index, _ in enumerate(event_scene.scene_data):
+        cases[f"event_draw[{index}]"] = lambda i=index: event_scene.draw(i)
+
+    cases["death_scene"] = event_scene.draw_death_scene
+    cases["win_scene"] = lambda: event_scene.draw_win_scene(
+        "You found the click beetle. YOU WON!"
+    )
+
+    # Build a long prompt from the longest prompt in the game so text wrapping
+    # is measured on a worst case
+    longest_prompt = max(
+        (event["TextPrompt"] for event in event_scene.scene_data), key=len
+    )
+    long_prompt = " ".join([longest_prompt] * LONG_PROMPT_REPEATS)
+    cases["split_text_to_lines[longest]"] = (
+        lambda: event_scene.split_text_to_lines(
+            (scene.GLOBAL_WINDOW_WIDTH / 2, scene.GLOBAL_WINDOW_HEIGHT / 8),
+            False,
+            longest_prompt,
+        )
+    )
+    cases["split_text_to_lines[long]"] = (
+        lambda: event_scene.split_text_to_lines(
+            (scene.GLOBAL_WINDOW_WIDTH / 2, scene.GLOBAL_WINDOW_HEIGHT / 8),
+            False,
+            long_prompt,
+        )
+    )
+
+    return cases
+
+
+def run_suite(iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP):
+    """
+    Run every benchmark case on a freshly created window.
+
+    Args:
+        iterations: integer number of timed calls per case
+        warmup: integer number of untimed calls per case
+
+    Returns:
+        Dictionary mapping a string benchmark name to its measurement
+            dictionary (see measure).
+    """
+    pygame.init()
+    surface = pygame.display.set_mode(
+        (scene.GLOBAL_WINDOW_WIDTH, scene.GLOBAL_WINDOW_HEIGHT)
+    )
+    try:
+        return {
+            name: measure(case, iterations, warmup)
+            for name, case in build_cases(surface).items()
+        }
+    finally:
+        pygame.quit()
+
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Find all benchmarks that have become slower than the stored baseline.
+
+    Benchmarks that are missing from either the results or the baseline are
+    ignored, so adding or removing scenes does not count as a regression.
+
+    Args:
+        results: dictionary of benchmark results (see run_suite)
+        baseline: dictionary of benchmark results to compare against
+        tolerance: float fractional slowdown allowed before a regression is
+            reported
+
+    Returns:
+        List of strings describing each regression found.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            allowed = baseline[name][metric] * (1 + tolerance)
+            if result[metric] > allowed:
+                regressions.append(
+                    f"{name} {metric}: {result[metric]:.3f} ms > "
+                    f"{allowed:.3f} ms allowed "
+                    f"(baseline {baseline[name][metric]:.3f} ms)"
+                )
+    return regressions
+
+
+def format_results(results):
+    """
+    Format benchmark results into a human readable table.
+
+    Args:
+        results: dictionary of benchmark results (see run_suite)
+
+    Returns:
+        string representing the table of results
+    """
+    lines = [
+        f"{'benchmark':<32}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'peak KiB':>10}{'blocks':>8}"
+    ]
+    for name, result in results.items():
+        lines.append(
+            f"{name:<32}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+            f"{result['peak_alloc_bytes'] / 1024:>10.1f}"
+            f"{result['retained_blocks']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Run the benchmark suite from the command line.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+
+    Returns:
+        integer exit code, 1 if any regression was found and 0 otherwise
+    """
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n", maxsplit=1)[0]
+    )
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--baseline", default=BENCHMARK_BASELINE_FILEPATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the new baseline",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="fail if any result is slower than the baseline",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.iterations, args.warmup)
+    print(format_results(results))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+        print(f"Saved baseline to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    # Default to a headless window so the suite can run without a display
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    sys.exit(main())
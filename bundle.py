@@ -0,0 +1,315 @@
+"""
+Pack every file the game loads (story data, images, fonts and audio) into a
+single bundle file, and read assets straight out of it.
+
+A bundle is a zip archive whose central directory serves as its index: when a
+bundle is mounted, the index is read once, and from then on each asset is read
+with a single seek into the already open file. Images and audio are stored
+without compression (images, OGG and MP3 are already compressed, and music is
+streamed, so seeking through a stored WAV track never has to inflate it), while
+data files and fonts are deflated. Nothing is extracted to disk. Assets are only
+read out of the bundle when the game first asks for them, and are decoded from
+in-memory buffers (see assets.py), except music, which is streamed straight out
+of the bundle (see stream_asset).
+
+While a bundle is mounted, any asset path it contains (such as
+"data/event_data/olin_night.png") is read from the bundle rather than the
+disk, so the game no longer depends on the working directory holding the data
+folder. Paths missing from the bundle are still read from disk.
+
+Build a bundle with:
+    python bundle.py --output story.bundle
+and run the game from it with:
+    python main.py --bundle story.bundle
+"""
+
+import argparse
+import io
+import os
+import zipfile
+
+from instrumentation import METRICS
+
+# Default folder packed into bundles, and the default bundle built
+DEFAULT_ROOT = "data"
+DEFAULT_BUNDLE_FILEPATH = "story.bundle"
+
+# Extensions of the files packed into bundles, and how each is stored
+BUNDLE_EXTENSIONS = {
+    ".json": zipfile.ZIP_DEFLATED,
+    ".png": zipfile.ZIP_STORED,
+    ".jpg": zipfile.ZIP_STORED,
+    ".ttf": zipfile.ZIP_DEFLATED,
+    ".ogg": zipfile.ZIP_STORED,
+    ".mp3": zipfile.ZIP_STORED,
+    ".wav": zipfile.ZIP_STORED,
+}
+
+# PYLINT DISABLE: this module level variable holds the bundle assets are read
+# from (or None to read from disk), and is changed from inside functions to
+# switch between bundles.
+_mounted = None  # pylint: disable=invalid-name
+
+
+def asset_name(filepath):
+    """
+    Find the name an asset is stored under in a bundle.
+
+    Args:
+        filepath: string path to the asset, as used by the game
+
+    Returns:
+        string path with forward slashes and no redundant parts
+    """
+    return os.path.normpath(filepath).replace(os.sep, "/")
+
+
+class AssetBundle:
+    """
+    A bundle file opened for reading, with its index loaded.
+    """
+
+    def __init__(self, filepath):
+        """
+        Open a bundle and read its index. No assets are read yet.
+
+        Args:
+            filepath: string path to the bundle file
+
+        Raises:
+            OSError: if the bundle can't be opened
+            zipfile.BadZipFile: if the file isn't a bundle
+        """
+        self._filepath = filepath
+        # The archive stays open, so reading an asset never reopens the file
+        self._archive = zipfile.ZipFile(  # pylint: disable=consider-using-with
+            filepath
+        )
+        self._index = {info.filename: info for info in self._archive.infolist()}
+
+    @property
+    def filepath(self):
+        """
+        Return the path to the bundle file.
+
+        Returns:
+            string path
+        """
+        return self._filepath
+
+    def __contains__(self, filepath):
+        """
+        Check whether an asset is in the bundle.
+
+        Args:
+            filepath: string path to the asset
+
+        Returns:
+            boolean, True if the bundle holds the asset
+        """
+        return asset_name(filepath) in self._index
+
+    def names(self):
+        """
+        List every asset in the bundle.
+
+        Returns:
+            list of string asset paths, in the order they were packed
+        """
+        return list(self._index)
+
+    def read(self, filepath):
+        """
+        Read an asset out of the bundle.
+
+        Args:
+            filepath: string path to the asset
+
+        Returns:
+            bytes of the asset file
+
+        Raises:
+            KeyError: if the bundle doesn't hold the asset
+        """
+        METRICS.increment("bundle_reads")
+        return self._archive.read(self._index[asset_name(filepath)])
+
+    def open(self, filepath):
+        """
+        Open an asset in the bundle to be read a piece at a time.
+
+        Args:
+            filepath: string path to the asset
+
+        Returns:
+            seekable binary file object reading the asset out of the bundle,
+                to be closed by the caller
+
+        Raises:
+            KeyError: if the bundle doesn't hold the asset
+        """
+        METRICS.increment("bundle_reads")
+        return self._archive.open(self._index[asset_name(filepath)])
+
+    def close(self):
+        """
+        Close the bundle file.
+        """
+        self._archive.close()
+
+
+def mount_bundle(filepath):
+    """
+    Read assets from a bundle from now on, in place of any bundle mounted
+    before. Assets already loaded (see assets.clear_cache) aren't reloaded.
+
+    Args:
+        filepath: string path to the bundle file
+
+    Returns:
+        AssetBundle object mounted
+    """
+    global _mounted  # pylint: disable=global-statement
+    unmount_bundle()
+    _mounted = AssetBundle(filepath)
+    return _mounted
+
+
+def unmount_bundle():
+    """
+    Go back to reading every asset from disk.
+    """
+    global _mounted  # pylint: disable=global-statement
+    if _mounted is not None:
+        _mounted.close()
+        _mounted = None
+
+
+def mounted_bundle():
+    """
+    Return the bundle assets are read from.
+
+    Returns:
+        AssetBundle object, or None if assets are read from disk
+    """
+    return _mounted
+
+
+def asset_source(filepath):
+    """
+    Find where to load an asset from, for loaders that take either a path or
+    a file object (like pygame.image.load and pygame.font.Font).
+
+    Args:
+        filepath: string path to the asset
+
+    Returns:
+        io.BytesIO buffer of the asset if it is in the mounted bundle,
+            otherwise the string path itself
+    """
+    if _mounted is not None and filepath in _mounted:
+        return io.BytesIO(_mounted.read(filepath))
+    return filepath
+
+
+def stream_asset(filepath):
+    """
+    Find where to stream an asset from, for loaders that read a path or a file
+    object a piece at a time (like pygame.mixer.music.load), so the asset is
+    never held in memory whole.
+
+    Args:
+        filepath: string path to the asset
+
+    Returns:
+        seekable binary file object reading the asset out of the mounted
+            bundle if it holds the asset (to be closed by the caller once the
+            loader is done with it), otherwise the string path itself
+    """
+    if _mounted is not None and filepath in _mounted:
+        return _mounted.open(filepath)
+    return filepath
+
+
+def open_asset(filepath):
+    """
+    Open an asset for reading, from the mounted bundle if it holds the asset
+    or from disk otherwise.
+
+    Args:
+        filepath: string path to the asset
+
+    Returns:
+        binary file object, to be closed by the caller
+    """
+    source = asset_source(filepath)
+    if isinstance(source, str):
+        return open(source, "rb")  # pylint: disable=consider-using-with
+    return source
+
+
+def asset_exists(filepath):
+    """
+    Check whether an asset can be loaded.
+
+    Args:
+        filepath: string path to the asset
+
+    Returns:
+        boolean, True if the asset is in the mounted bundle or on disk
+    """
+    return (_mounted is not None and filepath in _mounted) or os.path.exists(
+        filepath
+    )
+
+
+def build_bundle(filepath, root=DEFAULT_ROOT):
+    """
+    Pack every asset under a folder into a bundle. Assets are stored under the
+    paths the game uses for them (relative to the folder's parent).
+
+    Args:
+        filepath: string path to the bundle file to write
+        root: string path to the folder to pack
+
+    Returns:
+        list of string asset paths packed
+    """
+    parent = os.path.dirname(os.path.normpath(root))
+    names = []
+    with zipfile.ZipFile(filepath, "w") as archive:
+        for folder, subfolders, files in os.walk(root):
+            # Walk in a fixed order, so the same files give the same bundle
+            subfolders.sort()
+            for filename in sorted(files):
+                extension = os.path.splitext(filename)[1].lower()
+                if extension not in BUNDLE_EXTENSIONS:
+                    continue
+                path = os.path.join(folder, filename)
+                name = asset_name(os.path.relpath(path, parent or "."))
+                archive.write(
+                    path, name, compress_type=BUNDLE_EXTENSIONS[extension]
+                )
+                names.append(name)
+    return names
+
+
+def main(argv=None):
+    """
+    Build a bundle from the command line.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        description="Pack the game's assets into a single bundle file."
+    )
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    parser.add_argument("--output", default=DEFAULT_BUNDLE_FILEPATH)
+    args = parser.parse_args(argv)
+    names = build_bundle(args.output, args.root)
+    print(f"Packed {len(names)} assets into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
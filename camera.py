@@ -0,0 +1,145 @@
+"""
+Animate the map camera panning from one map point to the next, rather than
+snapping straight to the new point.
+
+The pan runs on a fixed timestep: its state advances in steps of exactly
+1 / PAN_FPS seconds however long each frame takes, and each frame is drawn
+part way between the last two steps, so the pan takes the same time and moves
+at the same speed whether frames are fast or slow. Pressing a key or clicking
+skips the rest of the pan. The time taken by every frame drawn is recorded
+under the "pan_frame" metric.
+"""
+
+import time
+
+import pygame
+
+from instrumentation import METRICS
+from recorder import RECORDER
+
+# Frame rate the pan is updated and drawn at
+PAN_FPS = 60
+
+# Number of fixed timesteps a pan between two map points takes
+PAN_STEPS = 18
+
+# Input that skips the rest of a pan. It is left in the event queue, so it
+# still counts as the player's next move.
+SKIP_EVENTS = (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.QUIT)
+
+
+def ease(progress):
+    """
+    Smooth the progress of a pan so it speeds up and slows down gently.
+
+    Args:
+        progress: float between 0 and 1 of how far through the pan it is
+
+    Returns:
+        float between 0 and 1 of how far the camera has moved
+    """
+    return progress * progress * (3 - 2 * progress)
+
+
+class CameraPan:
+    """
+    Camera position moving between two points on a fixed timestep.
+    """
+
+    def __init__(self, start, end, steps=PAN_STEPS):
+        """
+        Start a pan.
+
+        Args:
+            start: tuple of two numbers (x, y) the camera moves from
+            end: tuple of two numbers (x, y) the camera moves to
+            steps: integer number of fixed timesteps the pan takes
+        """
+        self._start = start
+        self._end = end
+        self._steps = max(1, steps)
+        self._step = 0
+
+    @property
+    def done(self):
+        """
+        Check whether the camera has reached the end of the pan.
+
+        Returns:
+            boolean, True once every step has been taken
+        """
+        return self._step >= self._steps
+
+    def update(self):
+        """
+        Advance the pan by one fixed timestep.
+        """
+        self._step = min(self._step + 1, self._steps)
+
+    def center(self, alpha=0):
+        """
+        Find where the camera is, part way between the last step and the next.
+
+        Args:
+            alpha: float between 0 and 1 of how far the time since the last
+                step is through the next step
+
+        Returns:
+            tuple of two floats (x, y) the camera is centred on
+        """
+        progress = ease(min(1, (self._step + alpha) / self._steps))
+        return (
+            self._start[0] + (self._end[0] - self._start[0]) * progress,
+            self._start[1] + (self._end[1] - self._start[1]) * progress,
+        )
+
+
+def run_pan(map_scene, location_id, steps=PAN_STEPS):
+    """
+    Pan the map camera from the map point drawn last to a new one, drawing and
+    showing every frame, until the pan finishes or the player skips it. The
+    new map point is not drawn at rest; the caller draws it afterwards.
+
+    Args:
+        map_scene: MapScene to draw the frames with
+        location_id: integer ID of the map point to pan to
+        steps: integer number of fixed timesteps the pan takes
+
+    Returns:
+        list of float times in milliseconds taken to draw and show each frame
+    """
+    start_id = map_scene.location_id
+    if start_id is None or start_id == location_id:
+        return []
+
+    pan = CameraPan(
+        map_scene.point_position(start_id),
+        map_scene.point_position(location_id),
+        steps,
+    )
+    timestep = 1 / PAN_FPS
+    clock = pygame.time.Clock()
+    frame_times = []
+    accumulator = 0
+    previous = time.perf_counter()
+    while not pan.done:
+        if pygame.event.peek(SKIP_EVENTS):
+            METRICS.increment("pan_skipped")
+            break
+
+        # Take as many fixed steps as the time passed covers
+        now = time.perf_counter()
+        accumulator += now - previous
+        previous = now
+        while accumulator >= timestep and not pan.done:
+            pan.update()
+            accumulator -= timestep
+
+        map_scene.draw(location_id, camera=pan.center(accumulator / timestep))
+        pygame.display.update()
+        RECORDER.capture()
+        frame_time = (time.perf_counter() - now) * 1000
+        frame_times.append(frame_time)
+        METRICS.observe("pan_frame", frame_time)
+        clock.tick(PAN_FPS)
+    return frame_times
@@ -72,6 +72,10 @@ class PlayerCharacter(Character):
         super().__init__(sprite_path, health)
         self._inventory = []
 
+        # Number of times the inventory's contents have changed, so views of
+        # it can tell whether they need redrawing without comparing items
+        self._inventory_revision = 0
+
     @property
     def inventory(self):
         """
@@ -82,6 +86,16 @@ class PlayerCharacter(Character):
         """
         return self._inventory
 
+    @property
+    def inventory_revision(self):
+        """
+        Return how many times the inventory's contents have changed.
+
+        Returns:
+            integer which increases every time an item is added or removed
+        """
+        return self._inventory_revision
+
     def update_health(self, damage):
         """
         Subtracts health from the player and returns whether or not the player
@@ -112,6 +126,7 @@ class PlayerCharacter(Character):
             self._inventory.remove(item)
         else:
             self._inventory.append(str(item))
+        self._inventory_revision += 1
 
     def in_inventory(self, item):
         """
@@ -3,17 +3,55 @@ Take keyboard input to control different scenes within the game.
 """
 
 from abc import ABC, abstractmethod
-from json import load
-from ast import literal_eval
 import sys
 import pygame
 from pygame.locals import QUIT
 
+from hud import INVENTORY_PAGE_KEYS
+from instrumentation import LATENCY, METRICS, timed
+from options import load_option_table
+
 
 # Define all possible keys that will be looked for during event sequences. This
 # defines the maximum number of options to be displayed.
 EVENT_KEYS = [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4]
 
+# Key that dumps the collected metrics to file when metrics are enabled
+METRICS_DUMP_KEY = pygame.K_F9
+
+# Longest time in milliseconds to wait for input before running idle work
+IDLE_WAIT_TIME = 10
+
+# Key that shows or hides the latency overlay
+LATENCY_OVERLAY_KEY = pygame.K_F3
+
+# Key that takes back the player's last move or choice
+REWIND_KEY = pygame.K_BACKSPACE
+
+# Mouse button that travels to the clicked point on the map
+TRAVEL_BUTTON = 1
+
+# Time in milliseconds each map point is shown for while travelling to a
+# clicked point, so the player can follow the route
+AUTO_WALK_STEP_TIME = 150
+
+
+class Rewind(Exception):
+    """
+    Raised while waiting for input when the player asks to take back their
+    most recent steps.
+    """
+
+    def __init__(self, steps=1):
+        """
+        Record how far to rewind.
+
+        Args:
+            steps: integer number of steps to take back
+        """
+        super().__init__(steps)
+        self.steps = steps
+
 
 class Controller(ABC):
     """
@@ -28,59 +66,226 @@ class Controller(ABC):
         """
 
     @abstractmethod
-    def find_result_event(self, event_id):
+    def find_result_event(self, event_id, inventory=(), health=0):
         """
         Abstract method to determine what event follows an event decision
         """
 
 
+# PYLINT DISABLE: besides the options, the controller holds each optional
+# callback and helper it was given, and the state of travel and decisions.
+# pylint: disable-next=too-many-instance-attributes
 class TextController(Controller):
     """
     Controls the players interaction with the game using keyboard input.
     """
 
-    def __init__(self, event_data):
+    # PYLINT DISABLE: each optional callback is a separate keyword argument
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        event_data,
+        on_idle=None,
+        router=None,
+        on_resize=None,
+        on_inventory_page=None,
+        history=None,
+        on_latency_overlay=None,
+    ):
         """
         Opens the data file of the data for the events that can happen during
-        game play
+        game play. The parsed options are shared with the scenes, so the file
+        is only read and parsed once.
 
         args:
             event_data: string representing file path to the event data
+            on_idle: optional function taking no arguments, called regularly
+                while waiting for the player to press a key
+            router: optional MapRouter, which lets the player travel by
+                clicking on the map
+            on_resize: optional function taking a tuple of two ints (width,
+                height), called when the window is resized
+            on_inventory_page: optional function taking an integer number
+                of pages to turn the inventory panel forwards (negative for
+                backwards), called when a page key is pressed or the mouse
+                wheel is scrolled
+            history: optional ChoiceHistory of the player's steps, which
+                lets the player rewind them with the rewind key
+            on_latency_overlay: optional function taking no arguments, called
+                when the latency overlay key is pressed
+        """
+        self._options = load_option_table(event_data)
+        self.on_idle = on_idle
+        self.on_resize = on_resize
+        self.on_inventory_page = on_inventory_page
+        self._router = router
+        self._history = history
+        self.on_latency_overlay = on_latency_overlay
+
+        # Map point ID the player is travelling to after clicking on the map
+        self._destination = None
+
+        # Index of the option chosen in the most recent event decision
+        self._last_choice = None
+
+    @property
+    def last_choice(self):
+        """
+        Return which option the player chose in the most recent event.
+
+        Returns:
+            integer index of the chosen option, or None if no event decision
+                has been made yet
         """
-        with open(event_data, "r", encoding="utf-8") as datafile:
-            self._event_data = load(datafile)
+        return self._last_choice
 
+    @timed("input_wait")
     def get_next_move(self):
         """
         Determined what key is pressed down at a moment in the game. Keeps
         looping until a key is pressed down. Exists if an exit commands occurs
         during the loop.
 
+        The metrics dump key, inventory paging (page keys and the mouse
+        wheel), the latency overlay key and the rewind key are handled here
+        rather than returned, so they work at any point where the game is
+        waiting for input.
+
         returns:
             pygame key object representing the current key that is being pressed
-            down
+            down, or a tuple of two ints (x, y) of the window position that
+            was clicked
+
+        raises:
+            Rewind: if the rewind key is pressed and there are steps in the
+                history to take back
         """
         while True:
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN:
+            # Sleep until an event arrives rather than constantly polling, so
+            # background threads (like image prefetching) get time to run. If
+            # nothing happens for a while, run the idle work instead.
+            event = pygame.event.wait(IDLE_WAIT_TIME)
+            if event.type == pygame.NOEVENT:
+                if self.on_idle is not None:
+                    self.on_idle()
+                continue
+            if event.type == QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.VIDEORESIZE:
+                if self.on_resize is not None:
+                    self.on_resize(event.size)
+                continue
+            if event.type == pygame.KEYDOWN:
+                # Start timing how long the key press takes to show a result
+                # (the latest press that leads to a decision counts)
+                LATENCY.mark("input")
+                if not self._handle_key(event.key):
                     return event.key
+                continue
+            if event.type == pygame.MOUSEWHEEL:
+                # Scrolling up shows earlier items
+                if self.on_inventory_page is not None and event.y:
+                    self.on_inventory_page(-1 if event.y > 0 else 1)
+                continue
+            if (
+                event.type == pygame.MOUSEBUTTONDOWN
+                and event.button == TRAVEL_BUTTON
+            ):
+                LATENCY.mark("input")
+                return event.pos
+
+    def _handle_key(self, key):
+        """
+        Handle the keys that work at any point where the game is waiting for
+        input: the metrics dump key, the inventory page keys, the latency
+        overlay key and the rewind key.
+
+        Args:
+            key: pygame key that was pressed
+
+        Returns:
+            boolean, True if the key was handled (or ignored) here, False if
+                it should be returned to the caller
+
+        Raises:
+            Rewind: if the rewind key is pressed and there are steps in the
+                history to take back
+        """
+        if key == METRICS_DUMP_KEY and METRICS.enabled:
+            METRICS.dump()
+            return True
+        if key in INVENTORY_PAGE_KEYS and self.on_inventory_page is not None:
+            self.on_inventory_page(INVENTORY_PAGE_KEYS[key])
+            return True
+        if key == LATENCY_OVERLAY_KEY and self.on_latency_overlay is not None:
+            self.on_latency_overlay()
+            return True
+        if key == REWIND_KEY:
+            if self._history:
+                # Stop travelling to a clicked point, since the player may no
+                # longer be on the route
+                self._destination = None
+                raise Rewind(1)
+            return True
+        return False
 
-    def find_result_map(self, next_direction):
+    def _walk(self, map_id, destination):
+        """
+        Take the first step of the route towards a map point, remembering the
+        destination if there are more steps to come. Travel stops at any map
+        point with a special event.
+
+        Args:
+            map_id: integer ID of the map point the player is at
+            destination: integer ID of the map point to travel to
+
+        Returns:
+            integer ID of the map point to move to, or None if there is no
+                route there
+        """
+        next_id = self._router.next_hop(map_id, destination)
+        arrived = next_id is None or next_id == destination
+        if arrived or self._router.has_event(next_id):
+            self._destination = None
+        else:
+            self._destination = destination
+        return next_id
+
+    def find_result_map(self, next_direction, map_id=None, screen_to_map=None):
         """
         Determines what direction the player can move at each decision
-        point on the map
+        point on the map. If a router was given, the player can also click on
+        the map to travel to the nearest map point, one step per call.
 
         Args:
             next_direction: tuple of integers or None
+            map_id: optional integer ID of the map point the player is at,
+                needed to travel by clicking
+            screen_to_map: optional function converting a window position to
+                a position on the map image, needed to travel by clicking
 
         Return:
             integer representing the map ID to progress to
         """
+        # Carry on with a route the player is already travelling
+        if self._destination is not None and map_id is not None:
+            pygame.time.wait(AUTO_WALK_STEP_TIME)
+            next_id = self._walk(map_id, self._destination)
+            if next_id is not None:
+                return next_id
+
         while True:
             decision = self.get_next_move()
+            if isinstance(decision, tuple):
+                if self._router is None or None in (map_id, screen_to_map):
+                    continue
+                next_id = self._walk(
+                    map_id, self._router.nearest(screen_to_map(decision))
+                )
+                if next_id is not None:
+                    return next_id
+                continue
             if decision == pygame.K_LEFT and next_direction[0] is not None:
                 return next_direction[0]
             if decision == pygame.K_RIGHT and next_direction[1] is not None:
@@ -90,39 +295,37 @@ class TextController(Controller):
             if decision == pygame.K_DOWN and next_direction[3] is not None:
                 return next_direction[3]
 
-    def find_result_event(self, event_id):
+    def find_result_event(self, event_id, inventory=(), health=0):
         """
-        Determines the resultant of a players decision after an event
+        Determines the resultant of a players decision after an event. Only
+        the options shown to the player can be chosen, with the nth option
+        shown chosen by pressing key n.
 
         Args:
             event_id: integer representing the current event that the game is at
+            inventory: list of strings representing the player's inventory,
+                used to find which options are shown
+            health: integer representing the player's health, used to find
+                which options are shown
 
         Returns:
             integer representing the new event ID for the game to move to
-            integer representing character health change
-            string representing item to be toggled from character inventory
+            function applying the option's effect to the player's health and
+                inventory mask (see OptionTable.effect)
             string representing a game outcome message
-            tuple (string, int) with inventory modifier information
         """
-        # Load the current event data to determine how many options are possible
-        # and what the results of the keypress will be
-        current_event = self._event_data[event_id]
-
-        # Based on number of options, determine which keys can be pressed
-        moves = EVENT_KEYS[0 : len(literal_eval(current_event["TextOptions"]))]
-
         # Continue to loop until a correct key is pressed
         while True:
             decision = self.get_next_move()
-            for index, key in enumerate(moves):
-                if decision == key:
-                    return (
-                        # In importing to JSON, lists are stored as strings,
-                        # and literal_eval converts from the string back into a
-                        # list
-                        literal_eval(current_event["OptionResultID"])[index],
-                        literal_eval(current_event["HealthChange"])[index],
-                        literal_eval(current_event["AddInventory"])[index],
-                        literal_eval(current_event["GameEnd"])[index],
-                        literal_eval(current_event["ItemCheck"])[index],
-                    )
+
+            # Based on the options shown, determine which keys can be pressed
+            # and which option each key chooses. This is a cached lookup, and
+            # is checked after every key press in case the story data has been
+            # reloaded while waiting.
+            visible = self._options.visible_options(
+                event_id, self._options.inventory_mask(inventory), health
+            )
+            moves = dict(zip(EVENT_KEYS, visible))
+            if decision in moves:
+                self._last_choice = moves[decision]
+                return self._options.outcome(event_id, moves[decision])
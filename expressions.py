@@ -0,0 +1,426 @@
+"""
+A small expression language for the conditions and effects of event options.
+
+Conditions decide whether an option is shown to the player, for example:
+    has Flashlight and health > 3
+    not (has Jacket or has "Old Rock")
+
+They support `has ITEM`, `health OP NUMBER` (with OP one of < <= > >= == !=),
+`true`, `false`, `not`, `and`, `or` and brackets.
+
+Effects change the player's state when an option is chosen, as statements
+separated by semicolons, for example:
+    health -= 2; add Stick; remove Jacket
+
+They support `health += NUMBER`, `health -= NUMBER`, `health = NUMBER`,
+`add ITEM`, `remove ITEM` and `toggle ITEM`. Items are single words, or any
+text in double quotes.
+
+Expressions are parsed into trees once when the event data is loaded, then
+compiled into closures over the player's health and inventory bitmask, so
+evaluating them while playing (or while simulating many playthroughs) is a
+single function call with no parsing.
+"""
+
+import operator
+import re
+
+# Comparisons usable on health in conditions
+COMPARISONS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# Statements that change the inventory in effects
+ITEM_STATEMENTS = ("add", "remove", "toggle")
+
+# Numbers, quoted items, words, comparisons and assignments, and punctuation
+TOKEN_PATTERN = re.compile(
+    r'\s*(?:(-?\d+)|"([^"]*)"|(\w+)|([<>=!+-]=|[<>=]|[();]))'
+)
+
+
+def tokenize(source):
+    """
+    Split an expression into tokens.
+
+    Args:
+        source: string expression
+
+    Returns:
+        List of tuples (string kind, value), where kind is "number", "item",
+            "word" or "symbol"
+
+    Raises:
+        ValueError: if the expression contains something that isn't a token
+    """
+    tokens = []
+    position = 0
+    source = source.strip()
+    while position < len(source):
+        match = TOKEN_PATTERN.match(source, position)
+        if match is None:
+            raise ValueError(
+                f"Unexpected {source[position:]!r} in expression {source!r}"
+            )
+        number, quoted, word, symbol = match.groups()
+        if number is not None:
+            tokens.append(("number", int(number)))
+        elif quoted is not None:
+            tokens.append(("item", quoted))
+        elif word is not None:
+            tokens.append(("word", word))
+        else:
+            tokens.append(("symbol", symbol))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent parser over the tokens of one expression.
+    """
+
+    def __init__(self, source):
+        """
+        Split the expression into tokens ready to parse.
+
+        Args:
+            source: string expression
+        """
+        self._source = source
+        self._tokens = tokenize(source)
+        self._position = 0
+
+    def _error(self, message):
+        """
+        Create an error describing where parsing failed.
+
+        Args:
+            message: string describing what went wrong
+
+        Returns:
+            ValueError to raise
+        """
+        return ValueError(f"{message} in expression {self._source!r}")
+
+    def _peek(self):
+        """
+        Return the next token without consuming it.
+
+        Returns:
+            tuple (kind, value), or (None, None) at the end of the expression
+        """
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return (None, None)
+
+    def _next(self, kind=None, value=None):
+        """
+        Consume the next token, checking it is what the grammar expects.
+
+        Args:
+            kind: optional string kind the token must have
+            value: optional value the token must have
+
+        Returns:
+            The value of the token
+
+        Raises:
+            ValueError: if the token isn't what was expected
+        """
+        token_kind, token_value = self._peek()
+        if token_kind is None:
+            raise self._error("Unexpected end")
+        if (kind is not None and token_kind != kind) or (
+            value is not None and token_value != value
+        ):
+            raise self._error(f"Unexpected {token_value!r}")
+        self._position += 1
+        return token_value
+
+    def _accept(self, value):
+        """
+        Consume the next token only if it has a given value.
+
+        Args:
+            value: value to look for
+
+        Returns:
+            boolean, True if the token was consumed
+        """
+        if self._peek()[1] == value and self._peek()[0] != "item":
+            self._position += 1
+            return True
+        return False
+
+    def _item(self):
+        """
+        Parse an item name, either a word or quoted text.
+
+        Returns:
+            string item name
+        """
+        kind, _ = self._peek()
+        if kind not in ("word", "item"):
+            raise self._error("Expected an item")
+        return self._next()
+
+    def _end(self):
+        """
+        Check the whole expression has been parsed.
+
+        Raises:
+            ValueError: if there are tokens left over
+        """
+        if self._peek()[0] is not None:
+            raise self._error(f"Unexpected {self._peek()[1]!r}")
+
+    def condition(self):
+        """
+        Parse the whole expression as a condition.
+
+        Returns:
+            tuple condition tree
+        """
+        tree = self._or()
+        self._end()
+        return tree
+
+    def _or(self):
+        """
+        Parse conditions joined by "or", the loosest binding operator.
+
+        Returns:
+            tuple condition tree
+        """
+        tree = self._and()
+        while self._accept("or"):
+            tree = ("or", tree, self._and())
+        return tree
+
+    def _and(self):
+        """
+        Parse conditions joined by "and".
+
+        Returns:
+            tuple condition tree
+        """
+        tree = self._not()
+        while self._accept("and"):
+            tree = ("and", tree, self._not())
+        return tree
+
+    def _not(self):
+        """
+        Parse a condition, possibly negated by "not".
+
+        Returns:
+            tuple condition tree
+        """
+        if self._accept("not"):
+            return ("not", self._not())
+        return self._atom()
+
+    def _atom(self):
+        """
+        Parse a bracketed condition, an item check, a constant or a health
+        comparison.
+
+        Returns:
+            tuple condition tree
+        """
+        if self._accept("("):
+            tree = self._or()
+            self._next("symbol", ")")
+            return tree
+        if self._accept("has"):
+            return ("has", self._item())
+        if self._accept("true"):
+            return ("const", True)
+        if self._accept("false"):
+            return ("const", False)
+        self._next("word", "health")
+        comparison = self._next("symbol")
+        if comparison not in COMPARISONS:
+            raise self._error(f"Unknown comparison {comparison!r}")
+        return ("health", comparison, self._next("number"))
+
+    def effect(self):
+        """
+        Parse the whole expression as a list of effect statements.
+
+        Returns:
+            list of tuple statements
+        """
+        statements = []
+        while self._peek()[0] is not None:
+            if self._accept(";"):
+                continue
+            if self._accept("health"):
+                assignment = self._next("symbol")
+                if assignment not in ("=", "+=", "-="):
+                    raise self._error(f"Unknown assignment {assignment!r}")
+                statements.append(("health", assignment, self._next("number")))
+            else:
+                statement = self._next("word")
+                if statement not in ITEM_STATEMENTS:
+                    raise self._error(f"Unknown statement {statement!r}")
+                statements.append((statement, self._item()))
+            if self._peek()[0] is not None:
+                self._next("symbol", ";")
+        return statements
+
+
+def parse_condition(source):
+    """
+    Parse a condition into a tree of tuples.
+
+    Args:
+        source: string condition
+
+    Returns:
+        tuple condition tree
+
+    Raises:
+        ValueError: if the condition isn't valid
+    """
+    return _Parser(source).condition()
+
+
+def parse_effect(source):
+    """
+    Parse an effect into a list of statements.
+
+    Args:
+        source: string effect
+
+    Returns:
+        list of tuple statements
+
+    Raises:
+        ValueError: if the effect isn't valid
+    """
+    return _Parser(source).effect()
+
+
+def referenced_items(tree):
+    """
+    Find every item a condition tree or effect statement list refers to.
+
+    Args:
+        tree: tuple condition tree or list of effect statements
+
+    Returns:
+        set of string item names
+    """
+    if isinstance(tree, list):
+        return {
+            statement[1]
+            for statement in tree
+            if statement[0] in ITEM_STATEMENTS
+        }
+    if tree[0] == "has":
+        return {tree[1]}
+    if tree[0] in ("not", "and", "or"):
+        return set().union(*(referenced_items(child) for child in tree[1:]))
+    return set()
+
+
+def uses_health(tree):
+    """
+    Check whether a condition depends on the player's health.
+
+    Args:
+        tree: tuple condition tree
+
+    Returns:
+        boolean, True if the condition compares health
+    """
+    if tree[0] == "health":
+        return True
+    if tree[0] in ("not", "and", "or"):
+        return any(uses_health(child) for child in tree[1:])
+    return False
+
+
+def compile_condition(tree, item_bit):
+    """
+    Compile a condition tree into a function.
+
+    Args:
+        tree: tuple condition tree
+        item_bit: function taking a string item name and returning the
+            integer bit representing it in an inventory mask
+
+    Returns:
+        function taking integer health and integer inventory mask, returning
+            a boolean
+    """
+    kind = tree[0]
+    if kind == "const":
+        value = tree[1]
+        return lambda health, mask: value
+    if kind == "has":
+        bit = item_bit(tree[1])
+        return lambda health, mask: bool(mask & bit)
+    if kind == "health":
+        compare, value = COMPARISONS[tree[1]], tree[2]
+        return lambda health, mask: compare(health, value)
+    if kind == "not":
+        inner = compile_condition(tree[1], item_bit)
+        return lambda health, mask: not inner(health, mask)
+    left = compile_condition(tree[1], item_bit)
+    right = compile_condition(tree[2], item_bit)
+    if kind == "and":
+        return lambda health, mask: left(health, mask) and right(health, mask)
+    return lambda health, mask: left(health, mask) or right(health, mask)
+
+
+def compile_effect(statements, item_bit):
+    """
+    Compile a list of effect statements into a function.
+
+    Every statement is either an affine change to health or a bitwise change
+    to the inventory, so the whole list folds into four constants and the
+    compiled effect does no more work than a single statement would.
+
+    Args:
+        statements: list of tuple statements
+        item_bit: function taking a string item name and returning the
+            integer bit representing it in an inventory mask
+
+    Returns:
+        function taking integer health and integer inventory mask, returning
+            a tuple of the new health and inventory mask
+    """
+    # health becomes health * keep + offset, and the inventory becomes
+    # (mask & kept_bits) ^ flipped_bits
+    keep, offset = 1, 0
+    kept_bits, flipped_bits = -1, 0
+    for kind, *arguments in statements:
+        if kind == "health":
+            assignment, value = arguments
+            if assignment == "=":
+                keep, offset = 0, value
+            else:
+                offset += value if assignment == "+=" else -value
+            continue
+        bit = item_bit(arguments[0])
+        if kind == "add":
+            kept_bits &= ~bit
+            flipped_bits = (flipped_bits & ~bit) | bit
+        elif kind == "remove":
+            kept_bits &= ~bit
+            flipped_bits &= ~bit
+        else:
+            flipped_bits ^= bit
+
+    return lambda health, mask: (
+        health * keep + offset,
+        (mask & kept_bits) ^ flipped_bits,
+    )
@@ -0,0 +1,398 @@
+"""
+Pre-baked bitmap font atlases, so text is drawn by copying glyphs rather than
+rasterising every new string with FreeType.
+
+An atlas is every printable ASCII glyph of a font at one size, rasterised once
+in white onto a single image, with a table of where each glyph is and how far
+it advances the pen. A string is drawn as one batch of blits (Surface.blits)
+of its glyphs from a copy of the atlas tinted to the text color.
+
+Atlases for the sizes the game uses are built ahead of time and saved next to
+the font, so starting the game never needs the font module:
+```
+python fontatlas.py
+```
+Atlases for any other size (such as when the window is scaled) are built the
+first time that size is used. Characters missing from an atlas are rasterised
+once when first drawn and kept alongside it.
+"""
+
+import argparse
+import json
+import os
+import string
+
+import pygame
+
+from bundle import asset_exists, asset_source, open_asset
+
+# Characters rasterised into every atlas
+ATLAS_CHARSET = "".join(char for char in string.printable if char.isprintable())
+
+# Width in pixels of atlas images, and the gap left around each glyph
+ATLAS_WIDTH = 512
+GLYPH_PADDING = 1
+
+# Font and sizes pre-baked by the build step (the game's small and large text)
+DEFAULT_FONT_FILEPATH = "data/fonts/pixel.ttf"
+DEFAULT_SIZES = (20, 48)
+
+# Color glyphs are rasterised in, so they can be tinted to any color
+GLYPH_COLOR = (255, 255, 255)
+
+
+def atlas_filepaths(font_filepath, size):
+    """
+    Find where the pre-baked atlas of a font at a size is saved.
+
+    Args:
+        font_filepath: string path to the font file
+        size: integer font size in pixels
+
+    Returns:
+        Tuple of the string path of the atlas image and the string path of
+            its metrics table
+    """
+    stem = os.path.splitext(font_filepath)[0]
+    return f"{stem}_{size}_atlas.png", f"{stem}_{size}_atlas.json"
+
+
+def _open_font(font_filepath, size):
+    """
+    Open a font with FreeType, only initialising the font module when a glyph
+    actually needs rasterising.
+
+    Args:
+        font_filepath: string path to the font file
+        size: integer font size in pixels
+
+    Returns:
+        pygame Font object
+    """
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.Font(asset_source(font_filepath), size)
+
+
+class FontAtlas:
+    """
+    Glyphs of a font at one size packed into a single image.
+    """
+
+    def __init__(self, image, glyphs, height, font_filepath, size):
+        """
+        Wrap an atlas image and its metrics table.
+
+        Args:
+            image: pygame Surface with per-pixel alpha holding every glyph in
+                white
+            glyphs: dictionary mapping each string character to a tuple of
+                its pygame Rect in the image, and its integer advance, left
+                bearing and rise in pixels (see _glyph_offsets)
+            height: integer height in pixels of a line of text
+            font_filepath: string path to the font, used to rasterise any
+                characters missing from the atlas
+            size: integer font size in pixels
+        """
+        self._image = image
+        self._glyphs = glyphs
+        self._height = height
+        self._font_filepath = font_filepath
+        self._size = size
+
+        # Copies of the atlas tinted to each color drawn, and characters that
+        # had to be rasterised outside of it, keyed by (color, character)
+        self._tinted = {}
+        self._extra = {}
+
+    @property
+    def height(self):
+        """
+        Return the height of a line of text.
+
+        Returns:
+            integer height in pixels
+        """
+        return self._height
+
+    @property
+    def image(self):
+        """
+        Return the atlas image.
+
+        Returns:
+            pygame Surface holding every glyph in white
+        """
+        return self._image
+
+    @property
+    def glyphs(self):
+        """
+        Return the metrics table of the glyphs in the atlas.
+
+        Returns:
+            dictionary mapping each string character to a tuple of its pygame
+                Rect in the atlas image, and its integer advance, left bearing
+                and rise in pixels (see _glyph_offsets)
+        """
+        return self._glyphs
+
+    def _tint(self, color):
+        """
+        Return a copy of the atlas in a color, only tinting it the first time
+        the color is used.
+
+        Args:
+            color: tuple of three ints (r, g, b)
+
+        Returns:
+            pygame Surface of the tinted atlas
+        """
+        if color not in self._tinted:
+            tinted = self._image.copy()
+            tinted.fill(color, special_flags=pygame.BLEND_RGB_MULT)
+            self._tinted[color] = tinted
+        return self._tinted[color]
+
+    def _extra_glyph(self, char, color):
+        """
+        Rasterise a character missing from the atlas, only the first time it
+        is drawn in each color.
+
+        Args:
+            char: string of one character
+            color: tuple of three ints (r, g, b)
+
+        Returns:
+            Tuple of the pygame Surface of the rendered character and its
+                integer advance, left bearing and rise (see _glyph_offsets)
+        """
+        key = (color, char)
+        if key not in self._extra:
+            font = _open_font(self._font_filepath, self._size)
+            self._extra[key] = (font.render(char, True, color),) + (
+                _glyph_offsets(font, char)
+            )
+        return self._extra[key]
+
+    def _layout(self, text, color):
+        """
+        Work out where each glyph of a string goes, lining them up on the
+        font's baseline in the same way pygame.font.Font.render does.
+
+        Args:
+            text: string of text
+            color: tuple of three ints (r, g, b) of the text color
+
+        Returns:
+            Tuple of a list of (source Surface, area Rect, integer x, integer
+                rise) for each glyph, relative to the pen starting at (0, 0)
+                on the top of a normal line, and a pygame Rect bounding every
+                glyph (and the line itself) in the same coordinates
+        """
+        tinted = self._tint(color)
+        placed = []
+        bounds = pygame.Rect(0, 0, 0, self._height)
+        x = 0
+        for char in text:
+            glyph = self._glyphs.get(char)
+            if glyph is None:
+                source, advance, left, rise = self._extra_glyph(char, color)
+                area = source.get_rect()
+            else:
+                source = tinted
+                area, advance, left, rise = glyph
+            placed.append((source, area, x + left, rise))
+            # Glyphs can reach past their advance on either side, and glyphs
+            # taller than the line make the whole line taller
+            bounds.union_ip((x, 0, advance, self._height))
+            bounds.union_ip((x + left, -rise, area.width, area.height))
+            x += advance
+        return placed, bounds
+
+    def size(self, text):
+        """
+        Find the size of a string of text.
+
+        Args:
+            text: string of text
+
+        Returns:
+            tuple of two ints (width, height) in pixels
+        """
+        return self._layout(text, GLYPH_COLOR)[1].size
+
+    def render(self, text, color):
+        """
+        Draw a string of text onto a new transparent surface, in the same way
+        pygame.font.Font.render does.
+
+        Args:
+            text: string of text to draw
+            color: tuple of three ints (r, g, b) of the text color
+
+        Returns:
+            pygame Surface with per-pixel alpha holding the text
+        """
+        placed, bounds = self._layout(text, color)
+        surface = pygame.Surface(
+            (max(1, bounds.width), bounds.height), pygame.SRCALPHA
+        )
+        # Glyphs are copied in as they are (rather than blended onto the
+        # transparent surface, which would darken their edges)
+        surface.blits(
+            [
+                (
+                    source,
+                    (x - bounds.left, -rise - bounds.top),
+                    area,
+                    pygame.BLEND_RGBA_MAX,
+                )
+                for source, area, x, rise in placed
+            ],
+            doreturn=False,
+        )
+        return surface
+
+
+def _glyph_offsets(font, char):
+    """
+    Find how a rendered glyph lines up with the others in a string.
+
+    Args:
+        font: pygame Font object
+        char: string of one character
+
+    Returns:
+        Tuple of the integer advance of the pen, the integer number of pixels
+            the rendered glyph starts left of the pen (zero or negative) and
+            the integer number of pixels it rises above the font's ascent
+            (zero or positive)
+    """
+    metrics = font.metrics(char)[0]
+    if metrics is None:
+        return font.size(char)[0], 0, 0
+    min_x, _, _, max_y, advance = metrics
+    return advance, min(0, min_x), max(0, max_y - font.get_ascent())
+
+
+def build_atlas(font_filepath, size, charset=ATLAS_CHARSET):
+    """
+    Rasterise a font's glyphs into an atlas.
+
+    Args:
+        font_filepath: string path to the font file
+        size: integer font size in pixels
+        charset: string of the characters to include
+
+    Returns:
+        FontAtlas object
+    """
+    font = _open_font(font_filepath, size)
+    rendered = [
+        (char, font.render(char, True, GLYPH_COLOR)) for char in charset
+    ]
+
+    # Pack the glyphs into rows of equal height (some glyphs are taller than
+    # the font's line height)
+    row_height = GLYPH_PADDING + max(
+        [font.get_height()] + [glyph.get_height() for _, glyph in rendered]
+    )
+    glyphs = {}
+    x, y = GLYPH_PADDING, GLYPH_PADDING
+    for char, glyph in rendered:
+        width = glyph.get_width()
+        if x + width + GLYPH_PADDING > ATLAS_WIDTH:
+            x, y = GLYPH_PADDING, y + row_height
+        glyphs[char] = (
+            pygame.Rect(x, y, width, glyph.get_height()),
+        ) + _glyph_offsets(font, char)
+        x += width + GLYPH_PADDING
+
+    image = pygame.Surface((ATLAS_WIDTH, y + row_height), pygame.SRCALPHA)
+    image.blits(
+        [
+            (glyph, glyphs[char][0].topleft, None, pygame.BLEND_RGBA_MAX)
+            for char, glyph in rendered
+        ],
+        doreturn=False,
+    )
+    return FontAtlas(image, glyphs, font.get_height(), font_filepath, size)
+
+
+def save_atlas(atlas, font_filepath, size):
+    """
+    Save an atlas next to its font, so it can be loaded without rasterising.
+
+    Args:
+        atlas: FontAtlas object to save
+        font_filepath: string path to the font file it was built from
+        size: integer font size in pixels it was built at
+    """
+    image_filepath, metrics_filepath = atlas_filepaths(font_filepath, size)
+    pygame.image.save(atlas.image, image_filepath)
+    metrics = {
+        "size": size,
+        "height": atlas.height,
+        "glyphs": {
+            char: list(rect) + list(offsets)
+            for char, (rect, *offsets) in atlas.glyphs.items()
+        },
+    }
+    with open(metrics_filepath, "w", encoding="utf-8") as metrics_file:
+        json.dump(metrics, metrics_file, sort_keys=True)
+
+
+def load_atlas(font_filepath, size):
+    """
+    Load the pre-baked atlas of a font at a size if it has been built, or
+    build it otherwise.
+
+    Args:
+        font_filepath: string path to the font file
+        size: integer font size in pixels
+
+    Returns:
+        FontAtlas object
+    """
+    image_filepath, metrics_filepath = atlas_filepaths(font_filepath, size)
+    if not (asset_exists(image_filepath) and asset_exists(metrics_filepath)):
+        return build_atlas(font_filepath, size)
+    with open_asset(metrics_filepath) as metrics_file:
+        metrics = json.load(metrics_file)
+    glyphs = {
+        char: (pygame.Rect(values[:4]),) + tuple(values[4:])
+        for char, values in metrics["glyphs"].items()
+    }
+    return FontAtlas(
+        pygame.image.load(asset_source(image_filepath), image_filepath),
+        glyphs,
+        metrics["height"],
+        font_filepath,
+        size,
+    )
+
+
+def main(argv=None):
+    """
+    Build and save the atlases of a font at the given sizes.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        description="Pre-bake bitmap font atlases."
+    )
+    parser.add_argument("--font", default=DEFAULT_FONT_FILEPATH)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES)
+    )
+    args = parser.parse_args(argv)
+    for size in args.sizes:
+        save_atlas(build_atlas(args.font, size), args.font, size)
+        print(f"Saved {atlas_filepaths(args.font, size)[0]}")
+    pygame.font.quit()
+
+
+if __name__ == "__main__":
+    main()
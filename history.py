@@ -0,0 +1,176 @@
+"""
+Remember the player's recent moves and choices, so they can be taken back.
+
+Every step the player takes is stored as a compact delta: the map point or
+event the step was taken from, how much health it cost and which items it
+added to or removed from the inventory (as a bitmask, see OptionTable). Steps
+are kept in a fixed size ring buffer of flat arrays, so the history takes the
+same memory however long the game goes on, with the oldest steps forgotten
+once it is full.
+
+Rewinding N steps reads the last N deltas once, combining them into a single
+change to undo, so it takes O(N) time and the player's state is only updated
+once. The steps can also be read back in order (see ChoiceHistory.steps), for
+writing saves and replay logs straight from the ring buffer.
+"""
+
+from array import array
+
+from scene import NO_EVENT_ID
+
+# Number of steps remembered before the oldest are forgotten
+DEFAULT_HISTORY_LENGTH = 256
+
+# Kinds of step: moving between map points, and choosing an option of an event
+MAP_STEP = 0
+EVENT_STEP = 1
+
+
+class ChoiceHistory:
+    """
+    A bounded history of the player's steps, newest last.
+    """
+
+    def __init__(self, capacity=DEFAULT_HISTORY_LENGTH):
+        """
+        Allocate room for every step remembered.
+
+        Args:
+            capacity: integer most steps remembered
+
+        Raises:
+            ValueError: if the capacity isn't positive
+        """
+        if capacity <= 0:
+            raise ValueError("history capacity must be positive")
+        self._capacity = capacity
+
+        # One entry per step in each array: the kind of step, the ID of the
+        # map point or event it was taken from, the health it cost and the
+        # bitmask of items it toggled. Item masks can grow past a machine
+        # integer, so they are kept in a list.
+        self._kinds = bytearray(capacity)
+        self._nodes = array("q", bytes(8 * capacity))
+        self._damage = array("q", bytes(8 * capacity))
+        self._toggles = [0] * capacity
+
+        # Index the next step is written to, and the number of steps held
+        self._end = 0
+        self._length = 0
+
+    @property
+    def capacity(self):
+        """
+        Return the most steps remembered.
+
+        Returns:
+            integer number of steps
+        """
+        return self._capacity
+
+    def __len__(self):
+        """
+        Return the number of steps that can be rewound.
+
+        Returns:
+            integer number of steps remembered
+        """
+        return self._length
+
+    def _push(self, kind, node, damage, toggle):
+        """
+        Remember a step, forgetting the oldest step if the history is full.
+
+        Args:
+            kind: MAP_STEP or EVENT_STEP
+            node: integer ID of the map point or event the step was taken from
+            damage: integer health the step cost (negative if it healed)
+            toggle: integer bitmask of the items the step added or removed
+        """
+        index = self._end
+        self._kinds[index] = kind
+        self._nodes[index] = node
+        self._damage[index] = damage
+        self._toggles[index] = toggle
+        self._end = (index + 1) % self._capacity
+        self._length = min(self._length + 1, self._capacity)
+
+    def record_move(self, map_id):
+        """
+        Remember that the player moved away from a map point.
+
+        Args:
+            map_id: integer ID of the map point moved away from
+        """
+        self._push(MAP_STEP, map_id, 0, 0)
+
+    def record_choice(self, event_id, damage, toggle):
+        """
+        Remember that the player chose an option of an event.
+
+        Args:
+            event_id: integer ID of the event the option was chosen in
+            damage: integer health the option cost (negative if it healed)
+            toggle: integer bitmask of the items the option added or removed
+        """
+        self._push(EVENT_STEP, event_id, damage, toggle)
+
+    def rewind(self, steps, map_id):
+        """
+        Forget the most recent steps, finding where the player was before
+        them and the change to their state to undo.
+
+        Args:
+            steps: integer number of steps to rewind, limited to the number
+                remembered
+            map_id: integer ID of the map point the player is at now
+
+        Returns:
+            Tuple of the integer ID of the map point to go back to, the
+                integer ID of the event to go back to (NO_EVENT_ID if the
+                player goes back to the map), the integer total health the
+                rewound steps cost, and the integer bitmask of the items they
+                toggled
+        """
+        event_id, damage, toggle = NO_EVENT_ID, 0, 0
+        for _ in range(min(steps, self._length)):
+            index = self._end = (self._end - 1) % self._capacity
+            self._length -= 1
+            damage += self._damage[index]
+            toggle ^= self._toggles[index]
+            self._toggles[index] = 0
+
+            # Only the oldest step rewound decides where the player ends up,
+            # but every map step on the way changes which map point that is
+            if self._kinds[index] == MAP_STEP:
+                map_id, event_id = self._nodes[index], NO_EVENT_ID
+            else:
+                event_id = self._nodes[index]
+        return map_id, event_id, damage, toggle
+
+    def steps(self):
+        """
+        Read the remembered steps, oldest first, without copying them.
+
+        Yields:
+            Tuple of the kind of step (MAP_STEP or EVENT_STEP), the integer ID
+                of the map point or event it was taken from, the integer
+                health it cost and the integer bitmask of the items it toggled
+        """
+        start = self._end - self._length
+        for offset in range(self._length):
+            index = (start + offset) % self._capacity
+            yield (
+                self._kinds[index],
+                self._nodes[index],
+                self._damage[index],
+                self._toggles[index],
+            )
+
+    def clear(self):
+        """
+        Forget every step.
+        """
+        self._toggles = [0] * self._capacity
+        self._end = 0
+        self._length = 0
@@ -0,0 +1,259 @@
+"""
+Watch the story data and the images it uses while the game is running, and
+reload whatever changes without restarting, for quicker writing and testing
+of the story (run the game with `python main.py --dev`).
+
+Files are checked by polling their modification times while the game waits
+for input, so no extra dependencies are needed. When a data file changes, only
+the records that differ from what is loaded are re-parsed, and they are
+updated in place in the lists shared by the scenes, the controller, the
+prefetcher and the map router. When an image changes, only that image is
+dropped from the image cache. The player's health, inventory and position
+are kept as they are.
+"""
+
+import os
+import sys
+import time
+from json import JSONDecodeError, load
+
+import assets
+from scene import split_lines
+
+# Shortest time in seconds between checks for changed files
+POLL_INTERVAL = 0.25
+
+# Columns of events.json holding image filepaths
+EVENT_IMAGE_COLUMNS = ("BackgroundImage", "PromptImage")
+
+
+def _modified_time(filepath):
+    """
+    Find when a file was last modified.
+
+    Args:
+        filepath: string path to the file
+
+    Returns:
+        integer modification time in nanoseconds, or None if the file can't
+            be found
+    """
+    try:
+        return os.stat(filepath).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _update_records(records, new_records):
+    """
+    Update a list of records in place to match a newly loaded list, replacing
+    only the records that differ.
+
+    Args:
+        records: list of dictionaries currently loaded, which is modified
+        new_records: list of dictionaries loaded from the changed file
+
+    Returns:
+        Tuple of a list of (old record or None, new record) pairs for every
+            added or changed record, and a list of removed records
+    """
+    changed = []
+    for index, record in enumerate(new_records):
+        if index >= len(records):
+            records.append(record)
+            changed.append((None, record))
+        elif records[index] != record:
+            changed.append((records[index], record))
+            records[index] = record
+    removed = records[len(new_records) :]
+    del records[len(new_records) :]
+    return changed, removed
+
+
+# PYLINT DISABLE: the watcher needs both data files, the lists they are loaded
+# into and everything that depends on them, and only has one thing to do (poll).
+# pylint: disable-next=too-many-instance-attributes,too-few-public-methods
+class StoryWatcher:
+    """
+    Reload the event data, map data and story images when they change on disk.
+    """
+
+    def __init__(
+        self,
+        event_filepath,
+        map_filepath,
+        options,
+        dependents=(),
+        static_images=(),
+    ):
+        """
+        Record the current modification time of every watched file.
+
+        Args:
+            event_filepath: string path to the event data file
+            map_filepath: string path to the map data file
+            options: OptionTable built from the event data, updated whenever
+                events change
+            dependents: list of objects built from the story graph (such as
+                the AssetPrefetcher and MapRouter), whose invalidate method is
+                called when it changes
+            static_images: list of string image filepaths to watch that
+                aren't named in the story data (such as the map background)
+        """
+        self._event_filepath = event_filepath
+        self._map_filepath = map_filepath
+        self._options = options
+        self._dependents = list(dependents)
+        self._static_images = list(static_images)
+        self._last_poll = time.monotonic()
+
+        # The lists shared with the rest of the game, updated in place
+        self._event_data = assets.load_json(event_filepath)
+        self._map_data = assets.load_json(map_filepath)
+
+        self._modified = {
+            filepath: _modified_time(filepath)
+            for filepath in self._watched_files()
+        }
+
+    def _watched_files(self):
+        """
+        Find every file to watch: the data files and every image they use.
+
+        Returns:
+            list of string filepaths
+        """
+        images = {
+            event[column]
+            for event in self._event_data
+            for column in EVENT_IMAGE_COLUMNS
+            if event.get(column)
+        }
+        return [self._event_filepath, self._map_filepath] + sorted(
+            images.union(self._static_images)
+        )
+
+    def poll(self):
+        """
+        Reload every watched file that has changed since it was last checked.
+        Checks at most once every POLL_INTERVAL seconds, so this can be called
+        on every pass of the input loop.
+
+        Returns:
+            boolean, True if anything was reloaded and the screen should be
+                redrawn
+        """
+        now = time.monotonic()
+        if now - self._last_poll < POLL_INTERVAL:
+            return False
+        self._last_poll = now
+
+        reloaded = False
+        for filepath in self._watched_files():
+            modified = _modified_time(filepath)
+            if filepath in self._modified and (
+                modified == self._modified[filepath]
+            ):
+                continue
+            self._modified[filepath] = modified
+            if modified is None:
+                continue
+            if filepath == self._event_filepath:
+                reloaded |= self._reload_events()
+            elif filepath == self._map_filepath:
+                reloaded |= self._reload_map()
+            else:
+                # Newly referenced images are loaded when first drawn, so only
+                # images already in use need evicting
+                assets.evict_image(filepath)
+                reloaded = True
+        return reloaded
+
+    @staticmethod
+    def _read(filepath):
+        """
+        Read a changed data file.
+
+        Args:
+            filepath: string path to the data file
+
+        Returns:
+            list of records, or None if the file can't be parsed (such as when
+                it is only partly written)
+        """
+        try:
+            with open(filepath, "r", encoding="utf-8") as datafile:
+                return load(datafile)
+        except (OSError, JSONDecodeError) as error:
+            print(f"Not reloading {filepath}: {error}", file=sys.stderr)
+            return None
+
+    def _reload_events(self):
+        """
+        Re-parse the events that changed, and forget the prompt text rendered
+        from the old versions.
+
+        Returns:
+            boolean, True if any event changed
+        """
+        new_events = self._read(self._event_filepath)
+        if new_events is None:
+            return False
+
+        # Events with invalid conditions or effects keep their old version, so
+        # one mistake doesn't stop the rest of the game from working
+        for index, event in enumerate(new_events):
+            if index < len(self._event_data) and (
+                self._event_data[index] == event
+            ):
+                continue
+            try:
+                self._options.update_event(event)
+            except (ValueError, SyntaxError, KeyError) as error:
+                print(
+                    f"Not reloading event {event.get('ID')}: {error}",
+                    file=sys.stderr,
+                )
+                if index >= len(self._event_data):
+                    # New events have no old version to fall back to, so the
+                    # events from the first invalid one on aren't added
+                    del new_events[index:]
+                    break
+                new_events[index] = self._event_data[index]
+
+        changed, removed = _update_records(self._event_data, new_events)
+        for event in removed:
+            self._options.remove_event(event["ID"])
+        for old_event, _ in changed:
+            if old_event is not None:
+                assets.evict_text(split_lines(old_event["TextPrompt"]))
+        return self._story_changed(changed or removed)
+
+    def _reload_map(self):
+        """
+        Replace the map points that changed.
+
+        Returns:
+            boolean, True if any map point changed
+        """
+        new_map = self._read(self._map_filepath)
+        if new_map is None:
+            return False
+        changed, removed = _update_records(self._map_data, new_map)
+        return self._story_changed(changed or removed)
+
+    def _story_changed(self, changed):
+        """
+        Tell everything built from the story graph that it has changed, if it
+        has.
+
+        Args:
+            changed: boolean, True if any records changed
+
+        Returns:
+            boolean, True if any records changed
+        """
+        if changed:
+            for dependent in self._dependents:
+                dependent.invalidate()
+        return bool(changed)
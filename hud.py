@@ -0,0 +1,152 @@
+"""
+Heads-up display panels drawn over scenes.
+
+The inventory panel only shows one page of the player's items at a time, with
+a count of the items on other pages, so a large inventory neither runs off the
+bottom of the window nor takes longer to draw. The page is rendered onto a
+single surface which is kept until the inventory changes (tracked by the
+player's inventory revision), the page is turned or the window is scaled, so
+each frame draws the whole panel with one blit.
+"""
+
+import pygame
+
+from instrumentation import METRICS
+
+# Most inventory items shown on one page
+INVENTORY_ROWS = 6
+
+# Keys that turn the inventory panel's page, and which way
+INVENTORY_PAGE_KEYS = {pygame.K_PAGEUP: -1, pygame.K_PAGEDOWN: 1}
+
+
+class InventoryPanel:
+    """
+    A cached, paginated list of the player's inventory.
+    """
+
+    def __init__(self, rows=INVENTORY_ROWS):
+        """
+        Start on the first page, with nothing rendered yet.
+
+        Args:
+            rows: integer most items shown on one page
+        """
+        self._rows = rows
+        self._page = 0
+
+        # Number of items when last rendered, so paging can stop at the end
+        self._item_count = 0
+
+        # Rendered panel, and the (revision, page, line height) it shows
+        self._surface = None
+        self._key = None
+
+    @property
+    def page(self):
+        """
+        Return the page of items being shown.
+
+        Returns:
+            integer index of the page, starting from 0
+        """
+        return self._page
+
+    def page_count(self, item_count):
+        """
+        Find how many pages a number of items takes up.
+
+        Args:
+            item_count: integer number of items in the inventory
+
+        Returns:
+            integer number of pages, at least 1
+        """
+        return max(1, -(-item_count // self._rows))
+
+    def scroll(self, pages):
+        """
+        Turn the page, stopping at the first and last pages.
+
+        Args:
+            pages: integer number of pages to move forwards (or backwards if
+                negative)
+
+        Returns:
+            boolean, True if a different page is now shown
+        """
+        last_page = self.page_count(self._item_count) - 1
+        page = min(max(self._page + pages, 0), last_page)
+        changed = page != self._page
+        self._page = page
+        return changed
+
+    def lines(self, inventory):
+        """
+        Find the lines of text shown on the current page.
+
+        Args:
+            inventory: list of strings representing the player's inventory
+
+        Returns:
+            list of strings, the title followed by the items on the page and,
+                if any items aren't shown, a count of them
+        """
+        pages = self.page_count(len(inventory))
+        page = min(self._page, pages - 1)
+        start = page * self._rows
+        shown = inventory[start : start + self._rows]
+        title = "Inventory:"
+        if pages > 1:
+            title = f"Inventory ({page + 1}/{pages}):"
+        lines = [title] + list(shown)
+        if len(shown) < len(inventory):
+            lines.append(f"+{len(inventory) - len(shown)} more")
+        return lines
+
+    def render(self, inventory, revision, render_text, line_height):
+        """
+        Return the panel showing the current page of the inventory, only
+        rendering it again if anything shown has changed since last time.
+
+        Args:
+            inventory: list of strings representing the player's inventory
+            revision: integer inventory revision of the player (see
+                PlayerCharacter.inventory_revision), or None to always render
+                the panel again
+            render_text: function taking a string and returning a pygame
+                Surface of it rendered at the window's resolution
+            line_height: integer distance in window pixels between the tops
+                of each line
+
+        Returns:
+            pygame Surface with per-pixel alpha holding the panel
+        """
+        # Keep the page in range if items have been removed
+        self._item_count = len(inventory)
+        self.scroll(0)
+
+        key = (revision, self._page, line_height)
+        if revision is not None and key == self._key:
+            return self._surface
+
+        texts = [render_text(line) for line in self.lines(inventory)]
+        surface = pygame.Surface(
+            (
+                max(text.get_width() for text in texts),
+                line_height * (len(texts) - 1) + texts[-1].get_height(),
+            ),
+            pygame.SRCALPHA,
+        )
+        # Lines are copied in as they are (rather than blended onto the
+        # transparent surface, which would darken their edges)
+        surface.blits(
+            [
+                (text, (0, line_height * row), None, pygame.BLEND_RGBA_MAX)
+                for row, text in enumerate(texts)
+            ],
+            doreturn=False,
+        )
+        METRICS.increment("inventory_panel_renders")
+        self._surface, self._key = surface, key
+        return surface
@@ -0,0 +1,689 @@
+"""
+Opt-in instrumentation used to find out where time goes while the game runs.
+
+Per-frame metrics are collected into the module level METRICS object, which
+does nothing until enabled. Functions on the hot path are wrapped with the
+timed decorator, and the collected metrics can be dumped as JSON or in the
+Prometheus text format at any time.
+
+The module level LATENCY tracer follows each transition from the key press
+(or click) that caused it to the display update that shows its result,
+breaking the time down into the decision, the wait before drawing, the draw
+(and the image decoding, scaling and text rendering within it), the scene
+transition and the display flip.
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+import json
+import sys
+import time
+
+# Number of most recent samples each histogram keeps for percentiles
+HISTOGRAM_WINDOW = 1024
+
+# Upper bounds in milliseconds of the buckets used in Prometheus histograms.
+# Input waits are included, so the buckets go up to a full minute.
+HISTOGRAM_BUCKETS = (
+    0.5,
+    1,
+    2,
+    4,
+    8,
+    16,
+    33,
+    66,
+    133,
+    266,
+    500,
+    1000,
+    5000,
+    10000,
+    60000,
+)
+
+# Stages of a transition the latency tracer timestamps, in the order they
+# happen: the key press, the decision it leads to, the start and end of drawing
+# the new scene, the start of the display update and the end of it
+LATENCY_STAGES = ("input", "decision", "draw", "drawn", "flip", "shown")
+
+# Phases of a transition the latency tracer reports, each the time between two
+# stages (or the whole transition), and the work timed within drawing
+LATENCY_PHASES = {
+    "decide": ("input", "decision"),
+    "wait": ("decision", "draw"),
+    "draw": ("draw", "drawn"),
+    "transition": ("drawn", "flip"),
+    "flip": ("flip", "shown"),
+    "total": ("input", "shown"),
+}
+LATENCY_PARTS = ("decode", "scale", "text")
+
+# Prefix added to every metric name in the Prometheus output
+PROMETHEUS_PREFIX = "pbbq_"
+
+# Default file metrics are dumped to, and the formats they can be dumped in
+DEFAULT_METRICS_FILEPATH = "metrics.json"
+METRICS_FORMATS = ("json", "prometheus")
+
+
+def percentile(samples, fraction):
+    """
+    Find the value at a given percentile of a list of samples, linearly
+    interpolating between the two closest ranks.
+
+    Args:
+        samples: non-empty list of numbers
+        fraction: float between 0 and 1 representing the percentile to find
+
+    Returns:
+        float representing the value at the given percentile
+    """
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (
+        position - lower
+    )
+
+
+class StartupProfiler:
+    """
+    Timestamp each phase of starting the game, up until the first frame is
+    shown to the player.
+
+    Time is measured from when the profiler is created, so module imports
+    before that point are not included (use python -X importtime for those).
+    """
+
+    def __init__(self, enabled=True, stream=None):
+        """
+        Start timing the startup of the game.
+
+        Args:
+            enabled: boolean, if False every method does nothing so the
+                profiler can be left in place when not profiling
+            stream: file object to write the report to, defaults to stderr
+        """
+        self._enabled = enabled
+        self._stream = stream
+        self._start = time.perf_counter()
+        self._last = self._start
+        self._phases = []
+        self._finished = False
+
+    @property
+    def phases(self):
+        """
+        Return every phase that has been timed so far.
+
+        Returns:
+            List of tuples (string phase name, float phase duration in ms,
+                float time since startup began in ms)
+        """
+        return self._phases
+
+    def mark(self, phase):
+        """
+        Record that a phase of startup has just finished.
+
+        Args:
+            phase: string name of the phase that finished
+        """
+        if not self._enabled or self._finished:
+            return
+        now = time.perf_counter()
+        self._phases.append(
+            (
+                phase,
+                (now - self._last) * 1000,
+                (now - self._start) * 1000,
+            )
+        )
+        self._last = now
+
+    def first_frame(self):
+        """
+        Record that the first frame has been shown and write the report.
+
+        Only the first call does anything, so this can be called after every
+        display update.
+        """
+        if not self._enabled or self._finished:
+            return
+        self.mark("first frame")
+        self._finished = True
+        print(self.report(), file=self._stream or sys.stderr)
+
+    def report(self):
+        """
+        Format all timed phases into a human readable table.
+
+        Returns:
+            string representing the table of phases
+        """
+        lines = [f"{'startup phase':<24}{'ms':>10}{'total ms':>10}"]
+        for phase, duration, total in self._phases:
+            lines.append(f"{phase:<24}{duration:>10.1f}{total:>10.1f}")
+        return "\n".join(lines)
+
+
+class RollingHistogram:
+    """
+    Record durations, keeping a window of the most recent samples for
+    percentiles along with lifetime bucket counts for Prometheus.
+    """
+
+    def __init__(self, window=HISTOGRAM_WINDOW, buckets=HISTOGRAM_BUCKETS):
+        """
+        Create an empty histogram.
+
+        Args:
+            window: integer number of recent samples kept for percentiles
+            buckets: tuple of increasing bucket upper bounds in milliseconds
+        """
+        self._recent = deque(maxlen=window)
+        self._buckets = buckets
+        self._bucket_counts = [0] * len(buckets)
+        self._count = 0
+        self._sum = 0.0
+
+    @property
+    def count(self):
+        """
+        Return the number of samples recorded over the histogram's lifetime.
+
+        Returns:
+            integer number of samples
+        """
+        return self._count
+
+    def observe(self, value):
+        """
+        Record a single sample.
+
+        Args:
+            value: float duration in milliseconds
+        """
+        self._recent.append(value)
+        self._count += 1
+        self._sum += value
+        for index, bound in enumerate(self._buckets):
+            if value <= bound:
+                self._bucket_counts[index] += 1
+                break
+
+    def summary(self):
+        """
+        Summarise the recent samples of the histogram.
+
+        Returns:
+            Dictionary with the lifetime count and sum, along with the mean,
+                p50, p90, p99 and max of the recent samples in milliseconds.
+        """
+        recent = list(self._recent)
+        if not recent:
+            return {"count": self._count, "sum_ms": self._sum}
+        return {
+            "count": self._count,
+            "sum_ms": self._sum,
+            "mean_ms": sum(recent) / len(recent),
+            "p50_ms": percentile(recent, 0.5),
+            "p90_ms": percentile(recent, 0.9),
+            "p99_ms": percentile(recent, 0.99),
+            "max_ms": max(recent),
+        }
+
+    def prometheus_lines(self, name):
+        """
+        Format the histogram in the Prometheus text exposition format.
+
+        Args:
+            name: string full metric name
+
+        Returns:
+            List of strings, one per line of output
+        """
+        lines = [f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, bucket_count in zip(self._buckets, self._bucket_counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self._count}')
+        lines.append(f"{name}_sum {self._sum}")
+        lines.append(f"{name}_count {self._count}")
+        return lines
+
+
+class Metrics:
+    """
+    Collect named duration histograms, counters and gauges while the game
+    runs.
+
+    Every method returns straight away while metrics are disabled, so the
+    calls can stay in the game's hot paths.
+    """
+
+    def __init__(self, enabled=False):
+        """
+        Create an empty set of metrics.
+
+        Args:
+            enabled: boolean, if True metrics are recorded straight away
+        """
+        self.enabled = enabled
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._dump_filepath = DEFAULT_METRICS_FILEPATH
+        self._dump_format = "json"
+
+    def configure_dump(self, filepath, output_format="json"):
+        """
+        Set where metrics are written when they are dumped on demand.
+
+        Args:
+            filepath: string path of the file to write
+            output_format: string, either "json" or "prometheus"
+        """
+        self._dump_filepath = filepath
+        self._dump_format = output_format
+
+    def reset(self):
+        """
+        Forget every recorded metric.
+        """
+        self._histograms.clear()
+        self._counters.clear()
+        self._gauges.clear()
+
+    def observe(self, name, value):
+        """
+        Record a duration in a named histogram.
+
+        Args:
+            name: string histogram name
+            value: float duration in milliseconds
+        """
+        if not self.enabled:
+            return
+        if name not in self._histograms:
+            self._histograms[name] = RollingHistogram()
+        self._histograms[name].observe(value)
+
+    def increment(self, name, label=None, amount=1):
+        """
+        Add to a named counter.
+
+        Args:
+            name: string counter name
+            label: optional string or integer used to keep separate counts
+                under one name (for example an event ID)
+            amount: integer amount to add
+        """
+        if not self.enabled:
+            return
+        key = (name, label)
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value):
+        """
+        Record the current value of a named gauge, replacing its last value.
+
+        Args:
+            name: string gauge name
+            value: number, such as a size in bytes
+        """
+        if not self.enabled:
+            return
+        self._gauges[name] = value
+
+    def gauge(self, name):
+        """
+        Return the current value of a gauge.
+
+        Args:
+            name: string gauge name
+
+        Returns:
+            number last recorded, or None if nothing has been recorded
+        """
+        return self._gauges.get(name)
+
+    def counter(self, name, label=None):
+        """
+        Return the current value of a counter.
+
+        Args:
+            name: string counter name
+            label: optional label the count was recorded under
+
+        Returns:
+            integer count, zero if nothing has been recorded
+        """
+        return self._counters.get((name, label), 0)
+
+    def histogram(self, name):
+        """
+        Return a named histogram.
+
+        Args:
+            name: string histogram name
+
+        Returns:
+            RollingHistogram, or None if nothing has been recorded
+        """
+        return self._histograms.get(name)
+
+    def hit_ratio(self, cache):
+        """
+        Find the hit ratio of a cache that counts its hits and misses under
+        "<cache>_hits" and "<cache>_misses".
+
+        Args:
+            cache: string name of the cache
+
+        Returns:
+            float ratio of hits to lookups, or None if there were no lookups
+        """
+        hits = self.counter(f"{cache}_hits")
+        lookups = hits + self.counter(f"{cache}_misses")
+        if lookups == 0:
+            return None
+        return hits / lookups
+
+    @contextmanager
+    def time(self, name):
+        """
+        Context manager recording how long its block takes into a histogram.
+
+        Args:
+            name: string histogram name
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def to_dict(self):
+        """
+        Collect every metric into plain data.
+
+        Returns:
+            Dictionary with "histograms" (name to summary), "counters" (name
+                to count, or to a dictionary of label to count), "gauges"
+                (name to value) and "cache_hit_ratios" (cache name to ratio)
+        """
+        counters = {}
+        caches = set()
+        for (name, label), count in sorted(
+            self._counters.items(), key=lambda item: str(item[0])
+        ):
+            if label is None:
+                counters[name] = count
+            else:
+                counters.setdefault(name, {})[str(label)] = count
+            if name.endswith("_hits") or name.endswith("_misses"):
+                caches.add(name.rsplit("_", 1)[0])
+        return {
+            "histograms": {
+                name: histogram.summary()
+                for name, histogram in sorted(self._histograms.items())
+            },
+            "counters": counters,
+            "gauges": dict(sorted(self._gauges.items())),
+            "cache_hit_ratios": {
+                cache: self.hit_ratio(cache) for cache in sorted(caches)
+            },
+        }
+
+    def to_json(self):
+        """
+        Dump every metric as JSON.
+
+        Returns:
+            string of JSON (see to_dict for the layout)
+        """
+        return json.dumps(self.to_dict(), indent=4)
+
+    def to_prometheus(self):
+        """
+        Dump every metric in the Prometheus text exposition format.
+
+        Returns:
+            string of Prometheus metrics
+        """
+        lines = []
+        for name, histogram in sorted(self._histograms.items()):
+            lines += histogram.prometheus_lines(f"{PROMETHEUS_PREFIX}{name}_ms")
+
+        typed = set()
+        for (name, label), count in sorted(
+            self._counters.items(), key=lambda item: str(item[0])
+        ):
+            full_name = f"{PROMETHEUS_PREFIX}{name}_total"
+            if full_name not in typed:
+                lines.append(f"# TYPE {full_name} counter")
+                typed.add(full_name)
+            if label is None:
+                lines.append(f"{full_name} {count}")
+            else:
+                lines.append(f'{full_name}{{id="{label}"}} {count}')
+
+        for name, value in sorted(self._gauges.items()):
+            full_name = f"{PROMETHEUS_PREFIX}{name}"
+            lines.append(f"# TYPE {full_name} gauge")
+            lines.append(f"{full_name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, filepath=None, output_format=None):
+        """
+        Write every metric to a file. Nothing is written while metrics are
+        disabled.
+
+        Args:
+            filepath: string path of the file to write, defaults to the one
+                set by configure_dump
+            output_format: string, either "json" or "prometheus", defaults to
+                the one set by configure_dump
+        """
+        if not self.enabled:
+            return
+        filepath = filepath or self._dump_filepath
+        output_format = output_format or self._dump_format
+        if output_format == "prometheus":
+            text = self.to_prometheus()
+        else:
+            text = self.to_json()
+        with open(filepath, "w", encoding="utf-8") as file:
+            file.write(text)
+
+
+# Metrics shared by the whole game, disabled until the game is launched with
+# metrics turned on.
+METRICS = Metrics()
+
+
+class LatencyTracer:
+    """
+    Trace how long each transition takes to become visible after the key
+    press that caused it, keeping rolling percentiles of each phase.
+    """
+
+    def __init__(self, enabled=False, window=HISTOGRAM_WINDOW):
+        """
+        Create a tracer with nothing traced yet.
+
+        Args:
+            enabled: boolean, if True transitions are traced straight away
+            window: integer number of recent transitions kept for percentiles
+        """
+        self.enabled = enabled
+        self.overlay = False
+        self._histograms = {
+            phase: RollingHistogram(window)
+            for phase in list(LATENCY_PHASES) + list(LATENCY_PARTS)
+        }
+
+        # Timestamps of the stages of the transition being traced, time spent
+        # on each part of drawing it, and the breakdown of the last transition
+        self._stages = {}
+        self._parts = {}
+        self._last = {}
+
+    @property
+    def last(self):
+        """
+        Return the breakdown of the most recent transition traced.
+
+        Returns:
+            Dictionary mapping each phase and part to its time in
+                milliseconds, empty if no transition has been traced
+        """
+        return self._last
+
+    def toggle_overlay(self):
+        """
+        Show or hide the on-screen overlay of latencies, tracing transitions
+        from now on if they weren't already.
+
+        Returns:
+            boolean, True if the overlay is now shown
+        """
+        self.enabled = True
+        self.overlay = not self.overlay
+        return self.overlay
+
+    def mark(self, stage):
+        """
+        Timestamp a stage of the transition being traced. A key press starts
+        a new transition; other stages are ignored unless a transition has
+        been started, and the display update being shown finishes it.
+
+        Args:
+            stage: string stage name from LATENCY_STAGES
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if stage == "input":
+            self._stages = {"input": now}
+            self._parts = {}
+            return
+        if "input" not in self._stages:
+            return
+        self._stages[stage] = now
+        if stage == "shown":
+            self._finish()
+
+    @contextmanager
+    def part(self, name):
+        """
+        Context manager adding how long its block takes to a part of drawing
+        the transition being traced. Blocks outside of drawing aren't counted.
+
+        Args:
+            name: string part name from LATENCY_PARTS
+        """
+        if not self.enabled or "draw" not in self._stages:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if "drawn" not in self._stages:
+                self._parts[name] = (
+                    self._parts.get(name, 0)
+                    + (time.perf_counter() - start) * 1000
+                )
+
+    def _finish(self):
+        """
+        Record the breakdown of the transition being traced, if every stage
+        of it was timestamped, and stop tracing it.
+        """
+        stages, self._stages = self._stages, {}
+        if any(stage not in stages for stage in LATENCY_STAGES):
+            return
+        breakdown = {
+            phase: (stages[end] - stages[start]) * 1000
+            for phase, (start, end) in LATENCY_PHASES.items()
+        }
+        for part in LATENCY_PARTS:
+            breakdown[part] = self._parts.get(part, 0.0)
+        for phase, value in breakdown.items():
+            self._histograms[phase].observe(value)
+            METRICS.observe(f"latency_{phase}", value)
+        self._last = breakdown
+
+    def summary(self):
+        """
+        Summarise the recent transitions traced.
+
+        Returns:
+            Dictionary mapping each phase and part to its histogram summary
+                (see RollingHistogram.summary)
+        """
+        return {
+            phase: histogram.summary()
+            for phase, histogram in self._histograms.items()
+        }
+
+    def overlay_lines(self):
+        """
+        Format the last transition's breakdown and rolling percentiles for the
+        on-screen overlay.
+
+        Returns:
+            list of strings, one per line of the overlay
+        """
+        if not self._last:
+            return ["Latency: press a key"]
+        lines = ["Latency ms: last p50 p99"]
+        summary = self.summary()
+        for phase, value in self._last.items():
+            lines.append(
+                f"{phase}: {value:.1f} {summary[phase]['p50_ms']:.1f} "
+                f"{summary[phase]['p99_ms']:.1f}"
+            )
+        return lines
+
+
+# Latency of the game's transitions, traced once the game is launched with
+# metrics or the latency overlay turned on.
+LATENCY = LatencyTracer()
+
+
+def timed(name):
+    """
+    Decorator recording how long each call of a function takes into a METRICS
+    histogram.
+
+    Args:
+        name: string histogram name
+
+    Returns:
+        decorator function
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                METRICS.observe(name, (time.perf_counter() - start) * 1000)
+
+        return wrapper
+
+    return decorator
@@ -1,138 +1,807 @@
 """
 Bring together model, view, and controller to implement Parcel B Beetle Quest.
+
+Run the game with `python main.py`. Passing --profile-startup (or setting the
+PBBQ_PROFILE_STARTUP environment variable) prints how long each phase of
+starting the game took once the first frame has been shown.
+
+Passing --metrics records per-frame timings (draws, input waits, display
+updates and transitions), cache hit ratios and event visit counts. Metrics are
+written to --metrics-file when F9 is pressed, when the process receives
+SIGUSR1, and when the game exits.
+
+Passing --analytics-log appends a record of every decision the player makes to
+the given log, for aggregation with analytics.py.
+
+Map points and events can declare background music and sound effects, which
+are played unless --no-audio is passed or the game is running headless.
+
+Passing --record writes every frame shown to a session file, which
+recorder.py plays back.
+
+Passing --bundle reads every asset from a single bundle file built with
+bundle.py, rather than from the data folder.
+
+Passing --low-memory stores the map and event backgrounds as 8-bit palettised
+images, and --memory-budget caps how much memory decoded images take up.
+--metrics records how much memory the surfaces in each cache take up.
+
+Passing --dev reloads the story data and images whenever they are edited,
+redrawing the current scene without restarting the game.
+
+Moving between map points pans the camera smoothly at 60 FPS; pressing a key
+skips the pan, and --metrics records how long each frame of it took.
+
+The window can be resized, or opened at a given size with --window-size (or
+--fullscreen). Scenes are laid out on an 800x500 canvas that is scaled to fit.
+
+The inventory shows one page of items at a time; Page Up/Page Down or the
+mouse wheel turns the page.
+
+F3 (or --latency-overlay) shows how long the last key press took to show its
+result, broken down into the decision, drawing (and the image decoding, scaling
+and text rendering within it), the scene transition and the display flip, with
+rolling percentiles of each. --metrics records the same breakdown.
+
+Backspace takes back the player's last move or choice, up to
+--history-length steps ago.
+
+Switching between the map and an event cross-dissolves between them by
+default; --transition chooses a fade or an instant cut instead, and
+--transition-time sets how long it takes.
 """
+import argparse
+import atexit
+import os
+import signal
 import sys
+import time
 from ast import literal_eval
 import pygame
+import assets
+from audio import play_event_audio, play_map_audio, start_audio
+from analytics import PlaythroughLogger
+from bundle import mount_bundle
+from camera import run_pan
 from character import PlayerCharacter
+from history import DEFAULT_HISTORY_LENGTH, ChoiceHistory
+from hotreload import StoryWatcher
+from hud import InventoryPanel
+from instrumentation import (
+    DEFAULT_METRICS_FILEPATH,
+    LATENCY,
+    METRICS,
+    METRICS_FORMATS,
+    StartupProfiler,
+)
+from options import load_option_table
+from prefetch import AssetPrefetcher
+from recorder import RECORDER
+from routing import MapRouter
+from scene import NO_EVENT_ID
+from transitions import (
+    DEFAULT_TRANSITION_TIME,
+    TRANSITION_KINDS,
+    SceneTransition,
+)
+from viewport import Viewport
 import scene
 import controller
 
 
-pygame.init()
-pygame.display.set_caption("Parcel B: Beetle Quest")
-
-# Define constants related to pygame window
-HEIGHT = 500
-WIDTH = 800
+# Define constants related to pygame window, defaulting to the size of the
+# canvas the scenes are laid out on
+HEIGHT = scene.GLOBAL_WINDOW_HEIGHT
+WIDTH = scene.GLOBAL_WINDOW_WIDTH
 FPS = 60
+WINDOW_CAPTION = "Parcel B: Beetle Quest"
+
+# Time in milliseconds to show the end of game screens before quitting
+DEATH_SCREEN_TIME = 10000
+WIN_SCREEN_TIME = 6000
 
 # Define player character & related constants
 PLAYER_SPRITE_FILEPATH = "data/sprite_data/resting.png"
 DEFAULT_PLAYER_HEALTH = 10
-player = PlayerCharacter(PLAYER_SPRITE_FILEPATH, DEFAULT_PLAYER_HEALTH)
-
-# Setup pygame clock
-FramePerSec = pygame.time.Clock()
-
-# Define surface to draw on and sprites
-displaysurface = pygame.display.set_mode((WIDTH, HEIGHT))
-displaysurface.fill((0, 0, 0))
-
-# Define map and scene objects to draw
-#
-# Additionally, load the scene data associated with these objects into this
-# class so the appropriate control methods can be called and scene switches
-# can occur.
-event_scene = scene.EventScene(displaysurface, player)
-event_data = event_scene.scene_data
-map_scene = scene.MapScene(displaysurface, player)
-map_data = map_scene.scene_data
-
-controls = controller.TextController("data/event_data/events.json")
-
-# Define map starting point
-#
-# PYLINT DISABLE: This is not a constant, but needs to be defined outside of the
-# loop so it isn't reset on every iteration, and this makes pylint mad that it's
-# not uppercase, so disabling.
-current_map_scene = 0  # pylint: disable=invalid-name
-
-while True:
-    # Check if there is a valid event that occurs at this scene. If so, this
-    # event should be drawn first.
-    #
-    # If there is no special event, trying to pull from the event datafile from
-    # a blank index will result in an error, at which point the code will
-    # continue on.
-    #
-    # Since events often lead to new events, this loop continues until an error
-    # is thrown, representing that you have reached the end of the current event
-    # tree.
 
+# Layout of the latency overlay on the logical canvas: its top right corner
+# (below the minimap), line height, padding and how opaque its backdrop is
+LATENCY_OVERLAY_TOP = 120
+LATENCY_OVERLAY_LINE_HEIGHT = 22
+LATENCY_OVERLAY_PADDING = 6
+LATENCY_OVERLAY_ALPHA = 200
+
+# Environment variable that turns on startup profiling, for boot scripts that
+# can't easily pass command line arguments
+PROFILE_STARTUP_ENV = "PBBQ_PROFILE_STARTUP"
+
+
+def window_size(text):
+    """
+    Parse a window size given on the command line.
+
+    Args:
+        text: string of the form WIDTHxHEIGHT, such as 1920x1080
+
+    Returns:
+        tuple of two ints (width, height)
+
+    Raises:
+        argparse.ArgumentTypeError: if the size isn't two positive integers
+    """
     try:
-        current_event = event_data[map_data[current_map_scene]["SpecialEvent"]][
-            "ID"
-        ]
-        while True:
-            event_scene.draw(current_event)
-            pygame.display.update()
-
-            # Get the player's input on which decision to make
-            (
-                new_event_id,
-                health_change,
-                inventory_change,
-                end_message,
-                item_check,
-            ) = controls.find_result_event(current_event)
-
-            # If a particular event is changed by a the presence of an item in
-            # the inventory, then modify the health that is to be removed.
-            #
-            # This tuple is structured (str, int), where string is the item
-            # being searched for in inventory and the int is the difference
-            # in the amount of damage done (such that damage done is decreased)
-            if item_check is not None:
-                if player.in_inventory(item_check[0]):
-                    health_change -= item_check[1]
-
-            # Update player state based on event outcome
-            if health_change != 0:
-                # Update health returns a boolean representing if the character
-                # is still alive. If the player has died, display a death
-                # screen, potentially with a custom death message
-                alive = player.update_health(health_change)
-                if not alive:
-                    if end_message is not None:
-                        event_scene.draw_death_scene(end_message)
-                    else:
-                        event_scene.draw_death_scene()
-
-                    pygame.display.update()
-                    # If the player has died, display the death screen for 10
-                    # seconds, then quit the game
-                    pygame.time.wait(10000)
-                    pygame.quit()
-                    sys.exit()
-
-            # If there is a game end message and the player hasn't already died,
-            # it is assumed that they won.
-            if health_change == 0 and end_message is not None:
-                event_scene.draw_win_scene(end_message)
-                pygame.display.update()
-                # If the player has died, display the death screen for 10
-                # seconds, then quit the game
-                pygame.time.wait(6000)
-                pygame.quit()
-                sys.exit()
-
-            # Add/remove items from the inventory
-            if inventory_change is not None:
-                player.update_inventory(inventory_change)
-
-            # Loop will continue with the next result id
-            current_event = new_event_id
-            FramePerSec.tick(FPS)
-
-    except (KeyError, ValueError, IndexError):
-        # If this block is reached, there is no event at the given map point,
-        # so the code continues on.
-
-        # Print the map scene and then get the next map location
-        map_scene.draw(current_map_scene)
+        width, height = (int(part) for part in text.lower().split("x"))
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(
+            f"window size must be WIDTHxHEIGHT, not {text!r}"
+        ) from error
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError("window size must be positive")
+    return (width, height)
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments used to launch the game.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+
+    Returns:
+        argparse Namespace with the parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Parcel B: Beetle Quest")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        default=bool(os.environ.get(PROFILE_STARTUP_ENV)),
+        help="print the time taken by each phase of startup",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="record per-frame metrics",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=DEFAULT_METRICS_FILEPATH,
+        help="file metrics are dumped to",
+    )
+    parser.add_argument(
+        "--metrics-format",
+        choices=METRICS_FORMATS,
+        default="json",
+        help="format metrics are dumped in",
+    )
+    parser.add_argument(
+        "--analytics-log",
+        help="append a record of each decision made to this log",
+    )
+    # Dev mode watches the loose files on disk, so can't be used with a
+    # bundle
+    sources = parser.add_mutually_exclusive_group()
+    sources.add_argument(
+        "--dev",
+        action="store_true",
+        help="reload story data and images when they are edited",
+    )
+    sources.add_argument(
+        "--bundle",
+        help="read the story data, images and fonts from this bundle file",
+    )
+    parser.add_argument(
+        "--window-size",
+        type=window_size,
+        default=(WIDTH, HEIGHT),
+        help="size of the window as WIDTHxHEIGHT",
+    )
+    parser.add_argument(
+        "--fullscreen",
+        action="store_true",
+        help="fill the screen at its native resolution",
+    )
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="store large backgrounds as 8-bit palettised images",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        help="MiB decoded images may take up before old ones are forgotten",
+    )
+    parser.add_argument(
+        "--transition",
+        choices=TRANSITION_KINDS,
+        default="dissolve",
+        help="transition shown when switching between the map and events",
+    )
+    parser.add_argument(
+        "--transition-time",
+        type=int,
+        default=DEFAULT_TRANSITION_TIME,
+        help="length of scene transitions in milliseconds",
+    )
+    parser.add_argument(
+        "--latency-overlay",
+        action="store_true",
+        help="show how long key presses take to show their result (F3)",
+    )
+    parser.add_argument(
+        "--no-audio",
+        action="store_true",
+        help="play no music or sound effects",
+    )
+    parser.add_argument(
+        "--record",
+        help="record every frame shown to this session file",
+    )
+    parser.add_argument(
+        "--history-length",
+        type=int,
+        default=DEFAULT_HISTORY_LENGTH,
+        help="most steps the player can rewind with Backspace",
+    )
+    return parser.parse_args(argv)
+
+
+def enable_metrics(filepath, output_format):
+    """
+    Start recording metrics, and dump them to file on SIGUSR1 (where the
+    platform supports it) and when the game exits.
+
+    Args:
+        filepath: string path of the file metrics are dumped to
+        output_format: string format metrics are dumped in
+    """
+    METRICS.enabled = True
+    LATENCY.enabled = True
+    METRICS.configure_dump(filepath, output_format)
+    atexit.register(METRICS.dump)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: METRICS.dump())
+
+
+def enable_logging(args):
+    """
+    Start recording metrics and logging decisions, if asked to on the command
+    line.
+
+    Args:
+        args: argparse Namespace returned by parse_args
+
+    Returns:
+        PlaythroughLogger to record decisions with, or None if decisions
+            aren't being logged
+    """
+    if args.metrics:
+        enable_metrics(args.metrics_file, args.metrics_format)
+    analytics = None
+    if args.analytics_log:
+        analytics = PlaythroughLogger(args.analytics_log)
+        atexit.register(analytics.close)
+    return analytics
+
+
+def create_window(profiler, size=(WIDTH, HEIGHT), fullscreen=False):
+    """
+    Start pygame and open the game window.
+
+    Args:
+        profiler: StartupProfiler told when each phase is done
+        size: tuple of two ints (width, height) of the window
+        fullscreen: boolean, True to fill the screen at its native resolution
+            instead
+
+    Returns:
+        Tuple of the pygame Surface of the window to draw on and the Viewport
+            fitting the scenes' canvas to it
+    """
+    # Only initialise the pygame modules the game actually uses. Fonts are
+    # initialised the first time text is drawn.
+    pygame.display.init()
+    profiler.mark("pygame init")
+
+    # Define surface to draw on
+    pygame.display.set_caption(WINDOW_CAPTION)
+    if fullscreen:
+        displaysurface = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    else:
+        displaysurface = pygame.display.set_mode(size, pygame.RESIZABLE)
+
+    # Scale the scenes' logical canvas to fit the window
+    viewport = Viewport(
+        displaysurface.get_size(),
+        (scene.GLOBAL_WINDOW_WIDTH, scene.GLOBAL_WINDOW_HEIGHT),
+    )
+    fit_window(displaysurface, viewport)
+    profiler.mark("window")
+    return displaysurface, viewport
+
+
+def fit_window(surface, viewport):
+    """
+    Clear the window and only allow drawing on the area the scaled canvas
+    covers, so the bars either side of it stay black.
+
+    Args:
+        surface: pygame Surface of the window
+        viewport: Viewport fitting the canvas to the window
+    """
+    surface.set_clip(None)
+    surface.fill((0, 0, 0))
+    surface.set_clip(viewport.rect)
+
+
+def resize_window(surface, viewport, size):
+    """
+    Fit the scenes' canvas to a window that has been resized, dropping the
+    images scaled for the old size.
+
+    Args:
+        surface: pygame Surface of the window
+        viewport: Viewport fitting the canvas to the window
+        size: tuple of two ints (width, height) of the resized window
+    """
+    viewport.resize(size)
+    assets.evict_scaled()
+    fit_window(surface, viewport)
+
+
+def create_watcher(args, options, dependents):
+    """
+    In dev mode, create a watcher that reloads the story files when they are
+    edited.
+
+    Args:
+        args: argparse Namespace of the parsed command line arguments
+        options: OptionTable updated when events change
+        dependents: list of objects to invalidate when the story changes
+
+    Returns:
+        StoryWatcher object, or None if not in dev mode
+    """
+    if not args.dev:
+        return None
+    return StoryWatcher(
+        scene.EVENT_SCENES_FILEPATH,
+        scene.MAP_SCENES_FILEPATH,
+        options,
+        dependents,
+        static_images=[scene.MAP_BACKGROUND_FILEPATH],
+    )
+
+
+def draw_latency_overlay(shown):
+    """
+    Draw the latency of the last transition and its rolling percentiles over
+    the right hand side of a scene that has just been drawn.
+
+    Args:
+        shown: Scene that has just been drawn
+    """
+    texts = [shown.render_text(line) for line in LATENCY.overlay_lines()]
+    padding = shown.viewport.scale_length(LATENCY_OVERLAY_PADDING)
+    line_height = shown.viewport.scale_length(LATENCY_OVERLAY_LINE_HEIGHT)
+    backdrop = pygame.Surface(
+        (
+            max(text.get_width() for text in texts) + 2 * padding,
+            line_height * len(texts) + 2 * padding,
+        )
+    )
+    backdrop.set_alpha(LATENCY_OVERLAY_ALPHA)
+    right, top = shown.viewport.to_screen(
+        (
+            scene.GLOBAL_WINDOW_WIDTH - scene.SIDE_EDGE_OFFSET,
+            LATENCY_OVERLAY_TOP,
+        )
+    )
+    left = right - backdrop.get_width()
+    shown.surface.blit(backdrop, (left, top))
+    shown.surface.blits(
+        [
+            (text, (left + padding, top + padding + line_height * row))
+            for row, text in enumerate(texts)
+        ],
+        doreturn=False,
+    )
+
+
+def present(profiler, decision_time=None, transition=None, shown=None):
+    """
+    Show the frame that has just been drawn to the player, recording how long
+    the display update took.
+
+    Args:
+        profiler: StartupProfiler told when the first frame is shown
+        decision_time: optional float perf_counter time the player's decision
+            that led to this frame was made, to record how long the transition
+            to the new scene took (including any fade or dissolve)
+        transition: optional SceneTransition to play first, if the scene
+            shown has changed
+        shown: optional Scene that has just been drawn, to draw the latency
+            overlay over (and show again) if the overlay is shown
+    """
+    if transition is not None:
+        transition.play(pygame.display.get_surface())
+    LATENCY.mark("flip")
+    with METRICS.time("present"):
+        pygame.display.update()
+    LATENCY.mark("shown")
+    RECORDER.capture()
+
+    # The overlay is drawn once the frame has been shown, so it includes this
+    # transition without adding to its latency
+    if shown is not None and LATENCY.overlay:
+        draw_latency_overlay(shown)
         pygame.display.update()
-        current_map_scene = controls.find_result_map(
-            literal_eval(map_data[current_map_scene]["DirectionsToMove"])
+        RECORDER.capture()
+    profiler.first_frame()
+    assets.record_surface_memory()
+    if decision_time is not None:
+        METRICS.observe(
+            "transition", (time.perf_counter() - decision_time) * 1000
         )
-        current_event = current_map_scene
+
+
+def end_game(wait_time):
+    """
+    Show the end of game screen that has just been drawn for a set amount of
+    time, then quit the game.
+
+    Args:
+        wait_time: integer time in milliseconds to show the screen for
+    """
+    pygame.display.update()
+    RECORDER.capture()
+    pygame.time.wait(wait_time)
+    pygame.quit()
+    sys.exit()
+
+
+# PYLINT DISABLE: the decision is recorded in the history as it is applied,
+# which needs the event it was made in alongside the scene and options used.
+# pylint: disable-next=too-many-arguments
+def apply_event_outcome(
+    player, event_scene, options, outcome, *, history=None, event_id=None
+):
+    """
+    Update the player's health and inventory based on the outcome of an event
+    decision. If the decision ends the game, the death or win screen is shown
+    and the game quits.
+
+    Args:
+        player: PlayerCharacter whose state is updated
+        event_scene: EventScene used to draw the end of game screens
+        options: OptionTable used to convert the player's inventory to and
+            from a bitmask
+        outcome: tuple returned by TextController.find_result_event
+        history: optional ChoiceHistory to record the decision in
+        event_id: integer ID of the event the decision was made in, needed to
+            record the decision
+
+    Returns:
+        integer ID of the event the decision leads to
+    """
+    new_event_id, effect, end_message = outcome
+
+    # The compiled effect covers the option's health change (reduced if the
+    # player has the right item), inventory change and any scripted effect
+    inventory_mask = options.inventory_mask(player.inventory)
+    new_health, new_inventory_mask = effect(player.health, inventory_mask)
+    health_change = player.health - new_health
+
+    # Update player state based on event outcome
+    if health_change != 0:
+        # Update health returns a boolean representing if the character is still
+        # alive. If the player has died, display a death screen, potentially
+        # with a custom death message
+        alive = player.update_health(health_change)
+        if not alive:
+            if end_message is not None:
+                event_scene.draw_death_scene(end_message)
+            else:
+                event_scene.draw_death_scene()
+
+            # If the player has died, display the death screen for 10 seconds,
+            # then quit the game
+            end_game(DEATH_SCREEN_TIME)
+
+    # If there is a game end message and the player hasn't already died, it is
+    # assumed that they won.
+    if health_change == 0 and end_message is not None:
+        event_scene.draw_win_scene(end_message)
+        # Display the win screen for 6 seconds, then quit the game
+        end_game(WIN_SCREEN_TIME)
+
+    # Add/remove every item whose bit the effect changed
+    for item in options.mask_items(inventory_mask ^ new_inventory_mask):
+        player.update_inventory(item)
+
+    if history is not None:
+        history.record_choice(
+            event_id, health_change, inventory_mask ^ new_inventory_mask
+        )
+    return new_event_id
+
+
+def rewind_player(player, options, history, steps, map_id):
+    """
+    Take back the player's most recent steps, restoring their health and
+    inventory to what they were before them.
+
+    Args:
+        player: PlayerCharacter whose state is restored
+        options: OptionTable used to convert the items toggled from a bitmask
+        history: ChoiceHistory of the player's steps
+        steps: integer number of steps to take back
+        map_id: integer ID of the map point the player is at
+
+    Returns:
+        integer ID of the map point to go back to
+        integer ID of the event to go back to, or NO_EVENT_ID to go back to
+            the map
+    """
+    map_id, event_id, damage, toggle = history.rewind(steps, map_id)
+    if damage != 0:
+        player.update_health(-damage)
+
+    # Items removed are added back to the end of the inventory
+    for item in options.mask_items(toggle):
+        player.update_inventory(item)
+    METRICS.increment("rewinds")
+    return map_id, event_id
+
+
+# PYLINT DISABLE: the game loop needs access to every scene and piece of player
+# state at once, and sets each of them up in turn.
+# pylint: disable-next=too-many-locals,too-many-statements
+def main(argv=None):
+    """
+    Set up the game window, scenes and controls, then run the game until the
+    player wins, dies or closes the window.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+    """
+    args = parse_args(argv)
+    profiler = StartupProfiler(args.profile_startup)
+    if args.bundle:
+        mount_bundle(args.bundle)
+    assets.configure_memory(
+        args.low_memory,
+        None if args.memory_budget is None else int(args.memory_budget * 2**20),
+    )
+    analytics = enable_logging(args)
+    if args.latency_overlay:
+        LATENCY.toggle_overlay()
+
+    displaysurface, viewport = create_window(
+        profiler, args.window_size, args.fullscreen
+    )
+    start_audio(not args.no_audio)
+    if args.record:
+        RECORDER.start(args.record, displaysurface)
+        atexit.register(RECORDER.stop)
+
+    # Define player character, and the history of their steps they can rewind
+    player = PlayerCharacter(PLAYER_SPRITE_FILEPATH, DEFAULT_PLAYER_HEALTH)
+    history = ChoiceHistory(args.history_length)
+
+    # Define map and scene objects to draw
+    #
+    # Additionally, load the scene data associated with these objects into
+    # this class so the appropriate control methods can be called and scene
+    # switches can occur. Images are only decoded once a scene first needs
+    # them.
+    inventory_panel = InventoryPanel()
+    event_scene = scene.EventScene(
+        displaysurface, player, viewport, inventory_panel
+    )
+    event_data = event_scene.scene_data
+    map_scene = scene.MapScene(
+        displaysurface, player, viewport, inventory_panel
+    )
+    map_data = map_scene.scene_data
+
+    # Decode the images of the scenes the player could reach next in the
+    # background, converting them for display while waiting for input
+    prefetcher = AssetPrefetcher(event_data, map_data)
+    atexit.register(prefetcher.shutdown)
+    options = load_option_table(scene.EVENT_SCENES_FILEPATH)
+
+    # Index the map points so the player can travel by clicking on the map
+    router = MapRouter(map_data)
+
+    # In dev mode, also check for edited story files while waiting for input,
+    # redrawing whichever scene is on screen if anything is reloaded
+    watcher = create_watcher(
+        args, options, [prefetcher, router, map_scene.minimap]
+    )
+    showing = map_scene
+
+    # Blend between scenes when switching between the map and events
+    transition = SceneTransition(args.transition, args.transition_time)
+
+    def redraw():
+        """
+        Redraw whichever scene is on screen, with the latency overlay if it is
+        shown.
+        """
+        showing.redraw()
+        if LATENCY.overlay:
+            draw_latency_overlay(showing)
+        pygame.display.update()
+        RECORDER.capture()
+
+    def on_idle():
+        """
+        Convert prefetched images while waiting for input, and in dev mode
+        reload edited story files.
+        """
+        assets.collect_prefetched()
+        if watcher is not None and watcher.poll():
+            redraw()
+
+    def on_resize(size):
+        """
+        Fit the canvas to the resized window and redraw whichever scene is on
+        screen.
+
+        Args:
+            size: tuple of two ints (width, height) of the resized window
+        """
+        resize_window(displaysurface, viewport, size)
+        redraw()
+
+    def on_inventory_page(pages):
+        """
+        Turn the page of the inventory panel, redrawing whichever scene is on
+        screen if the page changed.
+
+        Args:
+            pages: integer number of pages to turn forwards (negative for
+                backwards)
+        """
+        if inventory_panel.scroll(pages):
+            redraw()
+
+    def on_latency_overlay():
+        """
+        Show or hide the latency overlay.
+        """
+        LATENCY.toggle_overlay()
+        redraw()
+
+    controls = controller.TextController(
+        scene.EVENT_SCENES_FILEPATH,
+        on_idle=on_idle,
+        router=router,
+        on_resize=on_resize,
+        on_inventory_page=on_inventory_page,
+        history=history,
+        on_latency_overlay=on_latency_overlay,
+    )
+    profiler.mark("scenes")
+
+    # Setup pygame clock
+    frame_clock = pygame.time.Clock()
+
+    # Define map starting point
+    current_map_scene = 0
+
+    # Time the last decision was made, used to measure scene transitions
+    decision_time = None
+
+    # Event to carry on from after a rewind (NO_EVENT_ID to stay on the map),
+    # rather than the special event of the map point
+    rewound_event = None
+
+    while True:
+        # Check if there is a valid event that occurs at this scene. If so, this
+        # event should be drawn first.
+        #
+        # Since events often lead to new events, the event loop continues
+        # until a decision leads back to the map (NO_EVENT_ID), representing
+        # that you have reached the end of the current event tree. The map
+        # point is then drawn and the player picks where to go next.
+        #
+        # Pressing the rewind key while waiting for input interrupts either
+        # loop, and the game carries on from where the player was before.
+
+        try:
+            # A map point naming an event missing from the data is treated as
+            # having no event. Only this lookup is guarded, so errors from
+            # drawing or playing the event aren't mistaken for it.
+            try:
+                if rewound_event is None:
+                    current_event = map_data[current_map_scene]["SpecialEvent"]
+                else:
+                    current_event, rewound_event = rewound_event, None
+                if current_event != NO_EVENT_ID:
+                    current_event = event_data[current_event]["ID"]
+            except (KeyError, IndexError):
+                current_event = NO_EVENT_ID
+
+            if current_event != NO_EVENT_ID:
+                showing = transition.switch(
+                    showing, event_scene, displaysurface
+                )
+
+            # A decision leading back to the map ends the event tree before
+            # anything is drawn for it. Drawing the ID would show whichever
+            # event sits at that list index, and the transition to the map
+            # would start from that frame.
+            while current_event not in (None, NO_EVENT_ID):
+                LATENCY.mark("draw")
+                event_scene.draw(current_event)
+                LATENCY.mark("drawn")
+                METRICS.increment("event_visits", current_event)
+                present(profiler, decision_time, transition, event_scene)
+                play_event_audio(event_data[current_event])
+                prefetcher.prefetch_event(current_event)
+
+                # Get the player's input on which decision to make
+                outcome = controls.find_result_event(
+                    current_event, player.inventory, player.health
+                )
+                decision_time = time.perf_counter()
+                LATENCY.mark("decision")
+
+                # Log the decision with the player state it was made in
+                if analytics is not None:
+                    analytics.record(
+                        current_event,
+                        controls.last_choice,
+                        player.health,
+                        player.inventory,
+                    )
+
+                # Update the player based on the decision, then loop will
+                # continue with the next result id
+                current_event = apply_event_outcome(
+                    player,
+                    event_scene,
+                    options,
+                    outcome,
+                    history=history,
+                    event_id=current_event,
+                )
+                frame_clock.tick(FPS)
+
+            # Print the map scene and then get the next map location
+            showing = transition.switch(showing, map_scene, displaysurface)
+            LATENCY.mark("draw")
+            map_scene.draw(current_map_scene)
+            LATENCY.mark("drawn")
+            METRICS.increment("map_visits", current_map_scene)
+            present(profiler, decision_time, transition, map_scene)
+            play_map_audio(map_data[current_map_scene])
+            prefetcher.prefetch_map(current_map_scene)
+            next_map_scene = controls.find_result_map(
+                literal_eval(map_data[current_map_scene]["DirectionsToMove"]),
+                current_map_scene,
+                map_scene.screen_to_map,
+            )
+            LATENCY.mark("decision")
+            history.record_move(current_map_scene)
+            current_map_scene = next_map_scene
+
+            # Pan the camera to the new map point before anything there is
+            # drawn. Pan frames are timed separately, so transitions are timed
+            # from the end of the pan.
+            run_pan(map_scene, current_map_scene)
+            decision_time = time.perf_counter()
+
+        except controller.Rewind as rewind:
+            # Go back to where the player was, with the health and inventory
+            # they had there
+            current_map_scene, rewound_event = rewind_player(
+                player, options, history, rewind.steps, current_map_scene
+            )
+            decision_time = time.perf_counter()
+            LATENCY.mark("decision")
+
+
+if __name__ == "__main__":
+    main()
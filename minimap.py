@@ -0,0 +1,187 @@
+"""
+Draw a small copy of the whole map in a corner of the map scene, marking the
+map points the player has visited and where the player is now.
+
+The map background is scaled down once, starting from the nearest level of a
+cached mipmap pyramid (see assets.load_mipmaps) rather than the full size
+image. Visited map points are marked on a persistent copy of the scaled map as
+they are visited, so drawing the minimap each frame is a single blit plus the
+marker for the current position.
+"""
+
+import pygame
+
+import assets
+
+# Colors of the minimap markers and border
+VISITED_COLOR = (255, 255, 255)
+CURRENT_COLOR = (255, 0, 0)
+BORDER_COLOR = (255, 255, 255)
+
+# Radii in pixels of the visited and current position markers
+VISITED_RADIUS = 2
+CURRENT_RADIUS = 4
+
+
+class Minimap:
+    """
+    Scaled down copy of the map background with visited map points marked.
+    """
+
+    def __init__(self, map_data, image_filepath, width):
+        """
+        Set up the minimap. Nothing is scaled until it is first drawn.
+
+        Args:
+            map_data: list of map point dictionaries loaded from map.json
+            image_filepath: string path to the map background image
+            width: integer width of the minimap in pixels; the height keeps
+                the map's aspect ratio
+        """
+        self._map_data = map_data
+        self._image_filepath = image_filepath
+        self._width = width
+
+        # IDs of the map points the player has visited
+        self._visited = set()
+
+        # Mipmap levels the overlay was scaled from, to notice when the image
+        # is reloaded, and the scaled map with visited points marked on it
+        self._levels = None
+        self._overlay = None
+
+    @property
+    def visited(self):
+        """
+        Return the map points the player has visited.
+
+        Returns:
+            frozenset of integer map point IDs
+        """
+        return frozenset(self._visited)
+
+    def invalidate(self):
+        """
+        Forget the scaled map and markers, so they are drawn again from the
+        current map data and image the next time the minimap is drawn.
+        """
+        self._levels = None
+        self._overlay = None
+
+    def resize(self, width):
+        """
+        Change the width of the minimap, such as when the window is resized,
+        scaling it again the next time it is drawn if the width has changed.
+
+        Args:
+            width: integer width of the minimap in pixels
+        """
+        if width != self._width:
+            self._width = width
+            self.invalidate()
+
+    def _scale(self):
+        """
+        Find the scale from map image pixels to minimap pixels.
+
+        Returns:
+            float number of minimap pixels per map image pixel
+        """
+        return self._width / self._levels[0].get_width()
+
+    def _to_minimap(self, map_id):
+        """
+        Find where a map point is on the minimap.
+
+        Args:
+            map_id: integer ID of the map point
+
+        Returns:
+            tuple of two ints (x, y) in minimap pixels
+        """
+        point = self._map_data[map_id]
+        scale = self._scale()
+        return (
+            round(point["MapPointCenterWidth"] * scale),
+            round(point["MapPointCenterHeight"] * scale),
+        )
+
+    def _mark(self, map_id):
+        """
+        Mark a visited map point on the overlay.
+
+        Args:
+            map_id: integer ID of the map point
+        """
+        pygame.draw.circle(
+            self._overlay,
+            VISITED_COLOR,
+            self._to_minimap(map_id),
+            VISITED_RADIUS,
+        )
+
+    def _build(self, levels):
+        """
+        Scale the map background down to the minimap size and mark every
+        visited map point on it.
+
+        Args:
+            levels: list of pygame Surfaces, the mipmap pyramid of the map
+                background
+        """
+        self._levels = levels
+        height = round(
+            levels[0].get_height() * self._width / levels[0].get_width()
+        )
+        # Scale from the smallest level that is still at least as large as the
+        # minimap, so the final scale is by less than half
+        source = levels[0]
+        for level in levels:
+            if level.get_width() < self._width or level.get_height() < height:
+                break
+            source = level
+        self._overlay = pygame.transform.smoothscale(
+            source, (self._width, height)
+        )
+        for map_id in self._visited:
+            self._mark(map_id)
+
+    def visit(self, map_id):
+        """
+        Record that the player has visited a map point, marking it on the
+        overlay if it has already been drawn.
+
+        Args:
+            map_id: integer ID of the map point
+        """
+        if map_id in self._visited:
+            return
+        self._visited.add(map_id)
+        if self._overlay is not None:
+            self._mark(map_id)
+
+    def draw(self, surface, position, map_id):
+        """
+        Draw the minimap with the player's current map point marked.
+
+        Args:
+            surface: pygame Surface to draw onto
+            position: tuple of two ints (x, y) of the minimap's top left
+                corner on the surface
+            map_id: integer ID of the map point the player is at
+        """
+        # The pyramid is cached, so this is a lookup that only differs from
+        # the last one if the image has been reloaded
+        levels = assets.load_mipmaps(self._image_filepath)
+        if self._overlay is None or levels is not self._levels:
+            self._build(levels)
+
+        rect = surface.blit(self._overlay, position)
+        x, y = self._to_minimap(map_id)
+        pygame.draw.circle(
+            surface,
+            CURRENT_COLOR,
+            (position[0] + x, position[1] + y),
+            CURRENT_RADIUS,
+        )
+        pygame.draw.rect(surface, BORDER_COLOR, rect, 1)
@@ -0,0 +1,425 @@
+"""
+Work out which options of each event are shown to the player, and what
+choosing each option does.
+
+An option can require an item to be shown, declared per option in the
+RequiresItem column of events.json (None for options that are always shown),
+or more generally a condition in the Condition column (see expressions.py).
+Which options are visible only depends on the player's inventory (and health,
+for conditions that compare it), so the visible options are worked out once
+per (event, inventory mask) and looked up from then on. The renderer, the
+controller and the balance analysis all read from the same table, so a hidden
+option can never be chosen.
+
+The effect of choosing an option combines the HealthChange, AddInventory and
+ItemCheck columns with any statements in the Effect column, compiled into one
+function of the player's health and inventory mask.
+
+Parsing and compiling every event's columns happens once here, so drawing an
+event or handling a keypress never has to parse the strings stored in the data
+file.
+"""
+
+from ast import literal_eval
+
+import assets
+from expressions import (
+    compile_condition,
+    compile_effect,
+    parse_condition,
+    parse_effect,
+    referenced_items,
+    uses_health,
+)
+
+# Columns of events.json storing one value per option
+OPTION_COLUMNS = (
+    "TextOptions",
+    "OptionResultID",
+    "HealthChange",
+    "AddInventory",
+    "GameEnd",
+    "ItemCheck",
+    "RequiresItem",
+    "Condition",
+    "Effect",
+)
+
+# Option tables already built, keyed by event data filepath
+_tables = {}
+
+
+def _legacy_effect(health_change, item_bit, item_check, effect):
+    """
+    Create the function applying an option's HealthChange, AddInventory and
+    ItemCheck columns, followed by its compiled Effect.
+
+    Args:
+        health_change: integer health removed by the option
+        item_bit: integer bit of the item toggled by the option, or 0
+        item_check: tuple (integer item bit, integer damage reduction) or None
+        effect: compiled effect function, or None
+
+    Returns:
+        function taking integer health and integer inventory mask, returning
+            a tuple of the new health and inventory mask
+    """
+    check_bit, reduction = item_check or (0, 0)
+
+    def apply(health, mask):
+        # The damage done is reduced if the player has the checked item
+        health -= (
+            health_change - reduction if mask & check_bit else health_change
+        )
+        mask ^= item_bit
+        if effect is not None:
+            return effect(health, mask)
+        return health, mask
+
+    return apply
+
+
+class OptionTable:
+    """
+    Parsed event options, the options of each event visible with each
+    inventory, and the compiled effect of each option.
+    """
+
+    def __init__(self, event_data):
+        """
+        Parse every event's options and number every item the game uses, so
+        inventories can be stored as bitmasks. Then compile each option's
+        condition and effect.
+
+        Args:
+            event_data: list of event dictionaries loaded from events.json
+
+        Raises:
+            ValueError: if a condition or effect isn't valid
+        """
+        self._events = {}
+        items = set()
+        for event in event_data:
+            parsed = _parse_event(event)
+            self._events[event["ID"]] = parsed
+            items.update(_event_items(parsed))
+
+        # One bit per item. Sorted so masks are the same from run to run.
+        self._item_bits = {
+            item: 1 << index for index, item in enumerate(sorted(items))
+        }
+
+        self._conditions = {}
+        self._effects = {}
+        self._health_conditions = set()
+        for event_id, parsed in self._events.items():
+            self._compile(event_id, parsed)
+
+        # Visible option indices, keyed by (event ID, inventory mask), plus
+        # health for events with conditions comparing it
+        self._visible = {}
+
+    def update_event(self, event):
+        """
+        Parse and compile a single added or changed event, leaving every other
+        event as it is. Used when story data is reloaded while playing.
+
+        Items the table hasn't seen before are given new bits after the
+        existing ones, so inventory masks made before the update stay valid.
+
+        Args:
+            event: event dictionary in the format stored in events.json
+
+        Raises:
+            ValueError: if a condition or effect isn't valid, in which case the
+                table is left unchanged
+        """
+        parsed = _parse_event(event)
+        for item in sorted(_event_items(parsed) - set(self._item_bits)):
+            self._item_bits[item] = 1 << len(self._item_bits)
+        self._events[event["ID"]] = parsed
+        self._compile(event["ID"], parsed)
+        self._forget_visible(event["ID"])
+
+    def remove_event(self, event_id):
+        """
+        Forget an event that has been removed from the story data.
+
+        Args:
+            event_id: integer ID of the event
+        """
+        for table in (self._events, self._conditions, self._effects):
+            table.pop(event_id, None)
+        self._forget_visible(event_id)
+
+    def _forget_visible(self, event_id):
+        """
+        Forget the visible options worked out for an event.
+
+        Args:
+            event_id: integer ID of the event
+        """
+        for key in [key for key in self._visible if key[0] == event_id]:
+            del self._visible[key]
+
+    def _compile(self, event_id, parsed):
+        """
+        Compile the conditions and effects of every option of an event.
+
+        Args:
+            event_id: integer ID of the event
+            parsed: dictionary of the event's parsed columns
+        """
+        self._health_conditions.discard(event_id)
+        self._conditions[event_id] = tuple(
+            None if tree is None else compile_condition(tree, self.item_bit)
+            for tree in parsed["Condition"]
+        )
+        if any(
+            tree is not None and uses_health(tree)
+            for tree in parsed["Condition"]
+        ):
+            self._health_conditions.add(event_id)
+
+        effects = []
+        for index, statements in enumerate(parsed["Effect"]):
+            item = parsed["AddInventory"][index]
+            check = parsed["ItemCheck"][index]
+            effects.append(
+                _legacy_effect(
+                    parsed["HealthChange"][index],
+                    0 if item is None else self.item_bit(item),
+                    (
+                        None
+                        if check is None
+                        else (self.item_bit(check[0]), check[1])
+                    ),
+                    (
+                        None
+                        if statements is None
+                        else compile_effect(statements, self.item_bit)
+                    ),
+                )
+            )
+        self._effects[event_id] = tuple(effects)
+
+    @property
+    def event_ids(self):
+        """
+        Return the ID of every event.
+
+        Returns:
+            dictionary view of integer event IDs, supporting fast membership
+                checks
+        """
+        return self._events.keys()
+
+    def event(self, event_id):
+        """
+        Return the parsed options of an event.
+
+        Args:
+            event_id: integer ID of the event
+
+        Returns:
+            Dictionary mapping each column in OPTION_COLUMNS to a list of
+                values, one per option
+        """
+        return self._events[event_id]
+
+    def item_bit(self, item):
+        """
+        Return the bit representing an item in an inventory mask.
+
+        Args:
+            item: string item name
+
+        Returns:
+            integer with the item's bit set, or 0 if the game never uses the
+                item
+        """
+        return self._item_bits.get(str(item), 0)
+
+    def inventory_mask(self, inventory):
+        """
+        Convert an inventory into a bitmask.
+
+        Args:
+            inventory: list of string item names
+
+        Returns:
+            integer bitmask of the items in the inventory
+        """
+        mask = 0
+        for item in inventory:
+            mask |= self.item_bit(item)
+        return mask
+
+    def mask_items(self, inventory_mask):
+        """
+        Convert an inventory bitmask back into item names.
+
+        Args:
+            inventory_mask: integer bitmask of items
+
+        Returns:
+            list of string item names, in the order their bits were assigned
+        """
+        return [
+            item
+            for item, bit in self._item_bits.items()
+            if inventory_mask & bit
+        ]
+
+    def visible_options(self, event_id, inventory_mask, health):
+        """
+        Find the options of an event shown to a player, in the order they are
+        shown. The nth option shown is chosen by pressing key n.
+
+        Args:
+            event_id: integer ID of the event
+            inventory_mask: integer bitmask of the player's inventory
+            health: integer player health, only used by conditions that
+                compare it
+
+        Returns:
+            tuple of integer option indices
+        """
+        key = (event_id, inventory_mask)
+        if event_id in self._health_conditions:
+            key += (health,)
+        if key not in self._visible:
+            self._visible[key] = tuple(
+                index
+                for index, condition in enumerate(self._conditions[event_id])
+                if condition is None or condition(health, inventory_mask)
+            )
+        return self._visible[key]
+
+    def effect(self, event_id, index):
+        """
+        Return the compiled effect of choosing an option.
+
+        Args:
+            event_id: integer ID of the event
+            index: integer index of the option
+
+        Returns:
+            function taking integer health and integer inventory mask,
+                returning a tuple of the new health and inventory mask
+        """
+        return self._effects[event_id][index]
+
+    def outcome(self, event_id, index):
+        """
+        Return the outcome of choosing an option.
+
+        Args:
+            event_id: integer ID of the event
+            index: integer index of the option
+
+        Returns:
+            integer ID of the next event (or None/-100 to end the event tree)
+            compiled effect function (see effect)
+            string game end message, or None
+        """
+        event = self._events[event_id]
+        return (
+            event["OptionResultID"][index],
+            self._effects[event_id][index],
+            event["GameEnd"][index],
+        )
+
+
+def _parse_event(event):
+    """
+    Parse every per-option column of an event, and parse the conditions and
+    effects of its options into trees ready to compile.
+
+    Args:
+        event: event dictionary in the format stored in events.json
+
+    Returns:
+        Dictionary mapping each column in OPTION_COLUMNS to a list of values,
+            one per option
+
+    Raises:
+        ValueError: if a condition or effect isn't valid
+    """
+    # In importing to JSON, lists are stored as strings, and literal_eval
+    # converts from the string back into a list. Events written before
+    # RequiresItem, Condition or Effect were added leave them as None.
+    count = len(literal_eval(event["TextOptions"]))
+    parsed = {
+        key: literal_eval(event.get(key, repr([None] * count)))
+        for key in OPTION_COLUMNS
+    }
+    parsed["Condition"] = [
+        _parse_option_condition(required, condition)
+        for required, condition in zip(
+            parsed["RequiresItem"], parsed["Condition"]
+        )
+    ]
+    parsed["Effect"] = [
+        None if effect is None else parse_effect(effect)
+        for effect in parsed["Effect"]
+    ]
+    return parsed
+
+
+def _event_items(parsed):
+    """
+    Find every item a parsed event refers to.
+
+    Args:
+        parsed: dictionary of the event's parsed columns
+
+    Returns:
+        set of string item names
+    """
+    items = {str(item) for item in parsed["AddInventory"] if item}
+    items.update(check[0] for check in parsed["ItemCheck"] if check is not None)
+    for tree in parsed["Condition"] + parsed["Effect"]:
+        if tree is not None:
+            items.update(referenced_items(tree))
+    return items
+
+
+def _parse_option_condition(required_item, condition):
+    """
+    Parse the condition for showing an option, combining the item it requires
+    with its Condition.
+
+    Args:
+        required_item: string item name from RequiresItem, or None
+        condition: string condition from Condition, or None
+
+    Returns:
+        tuple condition tree, or None if the option is always shown
+    """
+    trees = []
+    if required_item is not None:
+        trees.append(("has", str(required_item)))
+    if condition is not None:
+        trees.append(parse_condition(condition))
+    if not trees:
+        return None
+    if len(trees) == 1:
+        return trees[0]
+    return ("and", trees[0], trees[1])
+
+
+def load_option_table(filepath):
+    """
+    Return the option table for an event data file, building it the first time
+    it is needed so every user of the file shares one table.
+
+    Args:
+        filepath: string path to the event data file
+
+    Returns:
+        OptionTable built from the file
+    """
+    if filepath not in _tables:
+        _tables[filepath] = OptionTable(assets.load_json(filepath))
+    return _tables[filepath]
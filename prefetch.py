@@ -0,0 +1,246 @@
+"""
+Decode the images and sound effects of every scene the player could reach
+next on a background thread, so moving to a new scene never has to wait for a
+PNG or an effect to be decoded.
+
+While the player is at an event, the events they can reach are known from its
+OptionResultID list, and while they are on the map the map points they can
+reach are known from DirectionsToMove. The images of all of those scenes (and
+the effects of their events, when audio is played) are decoded in the
+background while the player is still reading.
+"""
+
+from ast import literal_eval
+from concurrent.futures import ThreadPoolExecutor
+
+import assets
+from audio import SOUND_COLUMN, audio_enabled
+from scene import MAP_BACKGROUND_FILEPATH, NO_EVENT_ID
+
+# Number of background threads decoding images
+PREFETCH_WORKERS = 1
+
+
+class AssetPrefetcher:
+    """
+    Follow the story graph from the player's current scene and decode the
+    images and sound effects of the scenes that could come next.
+    """
+
+    def __init__(self, event_data, map_data, workers=PREFETCH_WORKERS):
+        """
+        Start the background threads used to decode images and effects.
+
+        Args:
+            event_data: list of event dictionaries loaded from events.json
+            map_data: list of map point dictionaries loaded from map.json
+            workers: integer number of background threads
+        """
+        self._event_data = event_data
+        self._map_data = map_data
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="asset-prefetch"
+        )
+
+        # Images and effects to prefetch from each scene, worked out the first
+        # time the player reaches that scene
+        self._event_prefetches = {}
+        self._map_prefetches = {}
+
+    def event_images(self, event_id):
+        """
+        Find the images drawn by an event.
+
+        Args:
+            event_id: integer ID of the event
+
+        Returns:
+            List of string image filepaths
+        """
+        event = self._event_data[event_id]
+        return [
+            event[key]
+            for key in ("BackgroundImage", "PromptImage")
+            if event[key] != ""
+        ]
+
+    def event_sounds(self, event_id):
+        """
+        Find the sound effects played by an event.
+
+        Args:
+            event_id: integer ID of the event
+
+        Returns:
+            List of string sound filepaths
+        """
+        sound = self._event_data[event_id].get(SOUND_COLUMN)
+        return [sound] if sound else []
+
+    def _prefetches_after_event(self, event_id):
+        """
+        Find the images and effects of every scene that could be shown after
+        an event.
+
+        Args:
+            event_id: integer ID of the event the player is at
+
+        Returns:
+            Tuple of a list of string image filepaths and a list of string
+                sound filepaths
+        """
+        if event_id not in self._event_prefetches:
+            images = []
+            sounds = []
+            for next_id in literal_eval(
+                self._event_data[event_id]["OptionResultID"]
+            ):
+                # None ends the game and needs no images
+                if next_id is None:
+                    continue
+                if next_id == NO_EVENT_ID:
+                    images.append(MAP_BACKGROUND_FILEPATH)
+                else:
+                    images += self.event_images(next_id)
+                    sounds += self.event_sounds(next_id)
+            self._event_prefetches[event_id] = (
+                list(dict.fromkeys(images)),
+                list(dict.fromkeys(sounds)),
+            )
+        return self._event_prefetches[event_id]
+
+    def _prefetches_after_map(self, map_id):
+        """
+        Find the images and effects of the events at every map point the
+        player could move to next.
+
+        Args:
+            map_id: integer ID of the map point the player is at
+
+        Returns:
+            Tuple of a list of string image filepaths and a list of string
+                sound filepaths
+        """
+        if map_id not in self._map_prefetches:
+            images = []
+            sounds = []
+            for next_id in literal_eval(
+                self._map_data[map_id]["DirectionsToMove"]
+            ):
+                if next_id is None:
+                    continue
+                event_id = self._map_data[next_id]["SpecialEvent"]
+                if event_id != NO_EVENT_ID:
+                    images += self.event_images(event_id)
+                    sounds += self.event_sounds(event_id)
+            self._map_prefetches[map_id] = (
+                list(dict.fromkeys(images)),
+                list(dict.fromkeys(sounds)),
+            )
+        return self._map_prefetches[map_id]
+
+    def images_after_event(self, event_id):
+        """
+        Find the images of every scene that could be shown after an event.
+
+        Args:
+            event_id: integer ID of the event the player is at
+
+        Returns:
+            List of string image filepaths
+        """
+        return self._prefetches_after_event(event_id)[0]
+
+    def sounds_after_event(self, event_id):
+        """
+        Find the sound effects of every event that could be shown after an
+        event.
+
+        Args:
+            event_id: integer ID of the event the player is at
+
+        Returns:
+            List of string sound filepaths
+        """
+        return self._prefetches_after_event(event_id)[1]
+
+    def images_after_map(self, map_id):
+        """
+        Find the images of the events at every map point the player could
+        move to next.
+
+        Args:
+            map_id: integer ID of the map point the player is at
+
+        Returns:
+            List of string image filepaths
+        """
+        return self._prefetches_after_map(map_id)[0]
+
+    def sounds_after_map(self, map_id):
+        """
+        Find the sound effects of the events at every map point the player
+        could move to next.
+
+        Args:
+            map_id: integer ID of the map point the player is at
+
+        Returns:
+            List of string sound filepaths
+        """
+        return self._prefetches_after_map(map_id)[1]
+
+    def invalidate(self):
+        """
+        Forget the images and effects worked out for every scene, after the
+        story data they were worked out from has changed.
+        """
+        self._event_prefetches.clear()
+        self._map_prefetches.clear()
+
+    def prefetch_event(self, event_id):
+        """
+        Start decoding the images of every scene reachable from an event, and
+        their effects if audio is played.
+
+        Args:
+            event_id: integer ID of the event the player is at
+        """
+        images, sounds = self._prefetches_after_event(event_id)
+        for filepath in images:
+            assets.prefetch_image(filepath, self._executor)
+        self._prefetch_sounds(sounds)
+
+    def prefetch_map(self, map_id):
+        """
+        Start decoding the images of every event reachable from a map point,
+        and their effects if audio is played.
+
+        Args:
+            map_id: integer ID of the map point the player is at
+        """
+        images, sounds = self._prefetches_after_map(map_id)
+        for filepath in images:
+            assets.prefetch_image(filepath, self._executor)
+        self._prefetch_sounds(sounds)
+
+    def _prefetch_sounds(self, sounds):
+        """
+        Start decoding sound effects, if audio is played.
+
+        Args:
+            sounds: list of string sound filepaths
+        """
+        if audio_enabled():
+            for filepath in sounds:
+                assets.prefetch_sound(filepath, self._executor)
+
+    def shutdown(self, wait=False):
+        """
+        Stop the background threads.
+
+        Args:
+            wait: boolean, if True wait for every queued decode to finish,
+                otherwise drop any decodes not yet started
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
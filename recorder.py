@@ -0,0 +1,786 @@
+"""
+Record every frame shown to the player to a session file, and play sessions
+back, so support can see exactly what a player saw.
+
+While the game runs with --record, the recorder copies each frame into a
+reusable buffer straight after the display update, which is the only work done
+on the game loop. Windows at least twice the size of the logical canvas are
+recorded at a whole fraction of their size (every second pixel of every second
+row at 1920x1080, every fourth at 3840x2160), so the copy stays as cheap at
+kiosk resolutions as at the canvas's own size. A background thread compares
+the frame with the one before it, keeps only the tiles that changed (merged
+into rectangles), compresses them and appends them to the session file. Every
+so often a whole frame is stored instead (a keyframe), and an index of where
+each frame starts is written when the recording stops, so any frame can be
+rebuilt by reading from the keyframe before it. A session cut short by a crash
+has no index, but can still be read up to the last whole frame.
+
+Play a session back with:
+    python recorder.py session.pbrec
+Space plays and pauses, Left/Right step one frame, Page Up/Page Down jump 5
+seconds, Home/End go to the start or end, and clicking or dragging on the
+timeline at the bottom seeks. A single frame can be saved without opening a
+window with:
+    python recorder.py session.pbrec --export 120 frame.png
+"""
+
+import argparse
+import bisect
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+import pygame
+
+from instrumentation import METRICS
+from scene import GLOBAL_WINDOW_HEIGHT, GLOBAL_WINDOW_WIDTH
+
+# Marks the start of a session file, and the end of its index
+RECORDING_MAGIC = b"PBBQREC1"
+INDEX_MAGIC = b"PBBQIDX1"
+
+# The session file starts with the magic and the pixel format's red, green,
+# blue and alpha masks. Each frame is a header (keyframe flag, seconds since
+# recording started, frame width and height, number of rectangles and length
+# of the compressed pixels), its rectangles (x, y, width, height) and its
+# compressed pixels. The index stores each frame's time, file offset and
+# keyframe flag, and the footer where the index starts and how many frames it
+# covers.
+FILE_HEADER = struct.Struct("<8s4I")
+FRAME_HEADER = struct.Struct("<BdHHHI")
+RECT = struct.Struct("<4H")
+INDEX_ENTRY = struct.Struct("<dQB")
+FOOTER = struct.Struct("<QI8s")
+
+# Size in pixels of the square tiles frames are compared in. Smaller tiles
+# store less of each changed area, but give more rectangles.
+TILE_SIZE = 16
+
+# Smallest size in pixels (width, height) frames are recorded at. Larger windows
+# are recorded at the smallest whole fraction of their size that is still at
+# least this large, which keeps every pixel of the logical canvas.
+RECORD_SIZE = (GLOBAL_WINDOW_WIDTH, GLOBAL_WINDOW_HEIGHT)
+
+# Number of frames between keyframes, bounding how many frames are read to
+# rebuild any one frame
+KEYFRAME_INTERVAL = 120
+
+# Most frames waiting to be compressed (plus the previous frame kept to compare
+# with). A frame captured while all of them are in use is dropped rather than
+# making the game wait.
+MAX_PENDING_FRAMES = 8
+
+# Niceness of the thread compressing frames, so it yields the CPU to the game
+# loop on machines with few cores
+WRITER_NICENESS = 10
+
+# zlib level frames are compressed at, favouring speed
+COMPRESSION_LEVEL = 1
+
+# Default location of the session file
+DEFAULT_RECORDING_FILEPATH = "session.pbrec"
+
+# Height in pixels of the player's timeline, how far Page Up/Page Down jump in
+# seconds, and how often the player checks for input while playing
+TIMELINE_HEIGHT = 16
+JUMP_TIME = 5
+PLAYER_FPS = 60
+
+
+def changed_rects(pixels, previous, tile=TILE_SIZE):
+    """
+    Find which parts of a frame changed since the previous one, comparing the
+    frames in square tiles and joining neighbouring changed tiles into
+    rectangles.
+
+    Args:
+        pixels: NumPy array of the frame's pixels, indexed by (y, x)
+        previous: NumPy array of the previous frame's pixels, the same size
+        tile: integer size in pixels of the tiles compared
+
+    Returns:
+        list of tuples of integers (x, y, width, height) of each changed
+            rectangle, clipped to the frame
+    """
+    height, width = pixels.shape
+    rows = -(-height // tile)
+    columns = -(-width // tile)
+
+    # Pad the differences out to whole tiles, so every tile can be checked at
+    # once
+    changed = np.zeros((rows * tile, columns * tile), dtype=bool)
+    np.not_equal(pixels, previous, out=changed[:height, :width])
+    tiles = changed.reshape((rows, tile, columns, tile)).any(axis=(1, 3))
+
+    return [
+        (
+            int(x * tile),
+            int(y * tile),
+            int(min(width, (x + w) * tile) - x * tile),
+            int(min(height, (y + h) * tile) - y * tile),
+        )
+        for x, y, w, h in _merge_tiles(tiles)
+    ]
+
+
+def capture_step(size, record_size=RECORD_SIZE):
+    """
+    Work out how much a window's frames are shrunk by when recorded.
+
+    Args:
+        size: tuple of two ints (width, height) of the window in pixels
+        record_size: tuple of two ints (width, height) of the smallest size
+            frames are recorded at
+
+    Returns:
+        integer step between the pixels recorded, in both directions, 1 to
+            record every pixel
+    """
+    return max(1, min(size[0] // record_size[0], size[1] // record_size[1]))
+
+
+def _merge_tiles(tiles):
+    """
+    Join runs of changed tiles along each row into rectangles, growing each
+    rectangle downwards while the next row has a run in the same place.
+
+    Args:
+        tiles: NumPy array of booleans indexed by (row, column), True for
+            each tile that changed
+
+    Returns:
+        list of lists of integers [column, row, width, height] of each
+            rectangle, measured in tiles
+    """
+    found = []
+    # Rectangles that reached the row above, keyed by their first and last
+    # tile column
+    growing = {}
+    for row in np.flatnonzero(tiles.any(axis=1)):
+        # Runs start where a row of flags goes from unchanged to changed, and
+        # end where it goes back
+        edges = np.flatnonzero(
+            np.diff(tiles[row].astype(np.int8), prepend=0, append=0)
+        )
+        reached = {}
+        for start, end in zip(edges[::2], edges[1::2]):
+            rect = growing.get((start, end))
+            if rect is None or rect[1] + rect[3] != row:
+                rect = [start, row, end - start, 0]
+                found.append(rect)
+            rect[3] += 1
+            reached[(start, end)] = rect
+        growing = reached
+    return found
+
+
+# PYLINT DISABLE: besides the session file and thread, the recorder holds the
+# queues and buffers shared with the thread, and the index written at the end.
+# pylint: disable-next=too-many-instance-attributes
+class SessionRecorder:
+    """
+    Record every frame shown to the player to a session file, compressing and
+    writing them on a background thread.
+    """
+
+    def __init__(self):
+        """
+        Create a recorder that isn't recording yet.
+        """
+        self._file = None
+        self._thread = None
+        self._keyframe_interval = KEYFRAME_INTERVAL
+        self._start = 0
+
+        # Frames waiting to be written, and buffers free to copy frames into
+        self._pending = queue.Queue()
+        self._free = queue.SimpleQueue()
+        self._buffers = 0
+
+        # Time and file offset of each frame written, and whether it is a
+        # keyframe
+        self._index = []
+
+        self.dropped = 0
+
+    @property
+    def recording(self):
+        """
+        Return whether frames are being recorded.
+
+        Returns:
+            boolean, True between start and stop
+        """
+        return self._file is not None
+
+    def start(
+        self,
+        filepath=DEFAULT_RECORDING_FILEPATH,
+        surface=None,
+        keyframe_interval=KEYFRAME_INTERVAL,
+    ):
+        """
+        Open the session file and start the thread that writes frames to it.
+
+        Args:
+            filepath: string path of the session file, overwritten if it exists
+            surface: optional pygame Surface frames will be captured from,
+                defaults to the window
+            keyframe_interval: integer number of frames between keyframes
+
+        Raises:
+            ValueError: if the surface doesn't have 4 bytes per pixel
+        """
+        surface = surface or pygame.display.get_surface()
+        if surface.get_bytesize() != 4:
+            raise ValueError(
+                "can only record 32-bit displays, not "
+                f"{surface.get_bitsize()}-bit"
+            )
+        self.stop()
+        self._keyframe_interval = keyframe_interval
+        self._index = []
+        self.dropped = 0
+        self._file = open(filepath, "wb")  # pylint: disable=consider-using-with
+        self._file.write(
+            FILE_HEADER.pack(RECORDING_MAGIC, *surface.get_masks())
+        )
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._write_frames, name="session-recorder", daemon=True
+        )
+        self._thread.start()
+
+    def capture(self, surface=None):
+        """
+        Record the frame that has just been shown. This only copies the frame
+        (every capture_step-th pixel of it) into a free buffer and queues it,
+        so it is safe to call from the game loop straight after each display
+        update. Does nothing unless recording.
+
+        Args:
+            surface: optional pygame Surface the frame was drawn on, defaults
+                to the window
+        """
+        if self._file is None:
+            return
+        start = time.perf_counter()
+        surface = surface or pygame.display.get_surface()
+        width, height = surface.get_size()
+        step = capture_step((width, height))
+
+        # Rows can be padded past the frame's width, so the pixels are viewed
+        # a row at a time and cut down to the frame before picking every
+        # step-th pixel
+        pixels = np.frombuffer(surface.get_buffer(), dtype=np.uint32)
+        pixels = pixels.reshape((height, surface.get_pitch() // 4))
+        pixels = pixels[::step, :width:step]
+        buffer = self._take_buffer(pixels.shape)
+        if buffer is None:
+            self.dropped += 1
+            METRICS.increment("recording_frames_dropped")
+            return
+        np.copyto(buffer, pixels)
+        self._pending.put((start - self._start, buffer))
+        METRICS.observe("record_capture", (time.perf_counter() - start) * 1000)
+
+    def stop(self):
+        """
+        Write the frames still waiting and the index, and close the session
+        file. Safe to call more than once.
+        """
+        if self._file is None:
+            return
+        self._pending.put(None)
+        self._thread.join()
+        offset = self._file.tell()
+        self._file.write(
+            b"".join(INDEX_ENTRY.pack(*entry) for entry in self._index)
+        )
+        self._file.write(FOOTER.pack(offset, len(self._index), INDEX_MAGIC))
+        self._file.close()
+        self._file = None
+
+    def _take_buffer(self, shape):
+        """
+        Find a buffer to copy a frame into, creating one if fewer than the
+        most allowed exist.
+
+        Args:
+            shape: tuple of two ints (height, width) of the frame recorded
+
+        Returns:
+            NumPy array of pixels of the given shape, or None if every buffer
+                is in use
+        """
+        try:
+            buffer = self._free.get_nowait()
+        except queue.Empty:
+            if self._buffers > MAX_PENDING_FRAMES:
+                return None
+            self._buffers += 1
+            return np.empty(shape, dtype=np.uint32)
+        # Buffers from before the window was resized are the wrong size
+        if buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint32)
+        return buffer
+
+    def _write_frames(self):
+        """
+        Compress queued frames and append them to the session file until the
+        recorder is stopped. Runs on the background thread.
+        """
+        # Give the game loop's thread the CPU first. Only Linux gives each
+        # thread its own priority; elsewhere the ID would name a process.
+        if sys.platform.startswith("linux"):
+            try:
+                os.setpriority(
+                    os.PRIO_PROCESS, threading.get_native_id(), WRITER_NICENESS
+                )
+            except OSError:
+                pass
+        previous = None
+        since_keyframe = 0
+        while True:
+            frame = self._pending.get()
+            if frame is None:
+                break
+            frame_time, pixels = frame
+            height, width = pixels.shape
+
+            keyframe = (
+                previous is None
+                or previous.shape != pixels.shape
+                or since_keyframe >= self._keyframe_interval
+            )
+            if keyframe:
+                rects = [(0, 0, width, height)]
+                since_keyframe = 0
+            else:
+                rects = changed_rects(pixels, previous)
+            since_keyframe += 1
+
+            self._write_frame(frame_time, pixels, rects, keyframe)
+
+            # The previous frame is no longer needed to compare with
+            if previous is not None:
+                self._free.put(previous)
+            previous = pixels
+
+    def _write_frame(self, frame_time, pixels, rects, keyframe):
+        """
+        Compress the changed rectangles of a frame and append them to the
+        session file. Runs on the background thread.
+
+        Args:
+            frame_time: float seconds since the recording started
+            pixels: NumPy array of the frame's pixels, indexed by (y, x)
+            rects: list of tuples of integers (x, y, width, height) of the
+                rectangles to store
+            keyframe: boolean, True if the whole frame is being stored
+        """
+        # Each rectangle is compressed straight from a contiguous copy of its
+        # pixels, since NumPy copies and zlib let go of the GIL while they
+        # work, so the game loop isn't held up waiting for it
+        compressor = zlib.compressobj(COMPRESSION_LEVEL)
+        chunks = [
+            compressor.compress(
+                np.ascontiguousarray(pixels[y : y + h, x : x + w])
+            )
+            for x, y, w, h in rects
+        ]
+        chunks.append(compressor.flush())
+        data = b"".join(chunks)
+
+        height, width = pixels.shape
+        self._index.append((frame_time, self._file.tell(), keyframe))
+        self._file.write(
+            FRAME_HEADER.pack(
+                keyframe, frame_time, width, height, len(rects), len(data)
+            )
+        )
+        self._file.write(b"".join(RECT.pack(*rect) for rect in rects))
+        self._file.write(data)
+
+
+# Recorder used by the game, started with --record
+RECORDER = SessionRecorder()
+
+
+class Recording:
+    """
+    Read the frames of a recorded session, rebuilding any frame from the
+    keyframe before it.
+    """
+
+    def __init__(self, filepath):
+        """
+        Open a session file and read its index, or find where each frame starts
+        if the index is missing.
+
+        Args:
+            filepath: string path of the session file
+
+        Raises:
+            ValueError: if the file isn't a session recording
+        """
+        self._file = open(filepath, "rb")  # pylint: disable=consider-using-with
+        magic, *masks = FILE_HEADER.unpack(self._file.read(FILE_HEADER.size))
+        if magic != RECORDING_MAGIC:
+            self._file.close()
+            raise ValueError(f"{filepath} is not a session recording")
+        self._masks = tuple(masks)
+        self._times, self._offsets, keyframes = self._read_index()
+        self._keyframes = [
+            index for index, keyframe in enumerate(keyframes) if keyframe
+        ]
+
+        # Frame most recently rebuilt, so stepping forwards only reads the
+        # frames in between
+        self._position = None
+        self._pixels = None
+
+    def __enter__(self):
+        """
+        Returns:
+            the Recording itself
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Close the session file.
+        """
+        self.close()
+
+    def __len__(self):
+        """
+        Returns:
+            integer number of frames in the session
+        """
+        return len(self._offsets)
+
+    @property
+    def times(self):
+        """
+        Return when each frame was shown.
+
+        Returns:
+            list of float seconds since the recording started
+        """
+        return self._times
+
+    @property
+    def keyframes(self):
+        """
+        Return which frames were stored whole.
+
+        Returns:
+            list of integer frame indices
+        """
+        return self._keyframes
+
+    def close(self):
+        """
+        Close the session file.
+        """
+        self._file.close()
+
+    def at_time(self, seconds):
+        """
+        Find the frame being shown at a point in the session.
+
+        Args:
+            seconds: float seconds since the recording started
+
+        Returns:
+            integer index of the last frame shown at or before that time
+        """
+        return max(0, bisect.bisect_right(self._times, seconds) - 1)
+
+    def size(self, index):
+        """
+        Find the size of a frame, which changes if the window was resized.
+
+        Args:
+            index: integer index of the frame
+
+        Returns:
+            tuple of two ints (width, height)
+        """
+        self._file.seek(self._offsets[index])
+        header = FRAME_HEADER.unpack(self._file.read(FRAME_HEADER.size))
+        return header[2], header[3]
+
+    def frame(self, index):
+        """
+        Rebuild a frame by drawing the changes recorded since the keyframe
+        before it (or since the frame rebuilt last, if that is closer).
+
+        Args:
+            index: integer index of the frame
+
+        Returns:
+            NumPy array of the frame's pixels, indexed by (y, x). It is reused
+                by later calls, so copy it to keep it.
+
+        Raises:
+            IndexError: if there is no such frame
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"frame {index} is not in the session")
+        keyframe = self._keyframes[
+            bisect.bisect_right(self._keyframes, index) - 1
+        ]
+        if self._position is None or not keyframe <= self._position <= index:
+            self._position = keyframe - 1
+        for position in range(self._position + 1, index + 1):
+            self._apply(position)
+        self._position = index
+        return self._pixels
+
+    def surface(self, index):
+        """
+        Rebuild a frame as a pygame Surface.
+
+        Args:
+            index: integer index of the frame
+
+        Returns:
+            pygame Surface of the frame, in the pixel format it was recorded in
+        """
+        pixels = self.frame(index)
+        height, width = pixels.shape
+        surface = pygame.Surface((width, height), 0, 32, self._masks)
+        pygame.surfarray.pixels2d(surface)[...] = pixels.T
+        return surface
+
+    def _apply(self, index):
+        """
+        Draw the rectangles stored for a frame over the frame before it.
+
+        Args:
+            index: integer index of the frame
+        """
+        self._file.seek(self._offsets[index])
+        keyframe, _, width, height, count, length = FRAME_HEADER.unpack(
+            self._file.read(FRAME_HEADER.size)
+        )
+        rects = list(RECT.iter_unpack(self._file.read(RECT.size * count)))
+        data = zlib.decompress(self._file.read(length))
+        if keyframe:
+            self._pixels = np.empty((height, width), dtype=np.uint32)
+        start = 0
+        for x, y, w, h in rects:
+            end = start + w * h * 4
+            self._pixels[y : y + h, x : x + w] = np.frombuffer(
+                data[start:end], dtype=np.uint32
+            ).reshape(h, w)
+            start = end
+
+    def _read_index(self):
+        """
+        Read the index at the end of the session file, or if it is missing
+        (the recording was cut short), walk through the frames to find where
+        each one starts.
+
+        Returns:
+            Tuple of lists of each frame's float time, integer file offset and
+                boolean keyframe flag
+        """
+        self._file.seek(0, 2)
+        end = self._file.tell()
+        if end >= FILE_HEADER.size + FOOTER.size:
+            self._file.seek(end - FOOTER.size)
+            offset, count, magic = FOOTER.unpack(self._file.read(FOOTER.size))
+            if magic == INDEX_MAGIC:
+                self._file.seek(offset)
+                entries = INDEX_ENTRY.iter_unpack(
+                    self._file.read(INDEX_ENTRY.size * count)
+                )
+                times, offsets, keyframes = (
+                    zip(*entries) if count else ([],) * 3
+                )
+                return list(times), list(offsets), list(keyframes)
+
+        times, offsets, keyframes = [], [], []
+        offset = FILE_HEADER.size
+        while offset + FRAME_HEADER.size <= end:
+            self._file.seek(offset)
+            keyframe, frame_time, _, _, count, length = FRAME_HEADER.unpack(
+                self._file.read(FRAME_HEADER.size)
+            )
+            following = offset + FRAME_HEADER.size + RECT.size * count + length
+            if following > end:
+                break
+            times.append(frame_time)
+            offsets.append(offset)
+            keyframes.append(bool(keyframe))
+            offset = following
+        return times, offsets, keyframes
+
+
+def _seek_key(recording, index, key):
+    """
+    Work out which frame a key press in the player moves to.
+
+    Args:
+        recording: Recording being played
+        index: integer index of the frame shown
+        key: pygame key that was pressed
+
+    Returns:
+        integer index of the frame to show, or None if the key doesn't seek
+    """
+    last = len(recording) - 1
+    jumps = {pygame.K_PAGEUP: -JUMP_TIME, pygame.K_PAGEDOWN: JUMP_TIME}
+    if key == pygame.K_LEFT:
+        return max(0, index - 1)
+    if key == pygame.K_RIGHT:
+        return min(last, index + 1)
+    if key in jumps:
+        return recording.at_time(recording.times[index] + jumps[key])
+    if key == pygame.K_HOME:
+        return 0
+    if key == pygame.K_END:
+        return last
+    return None
+
+
+def _draw_player(window, recording, index):
+    """
+    Draw a frame of the session being played, with the timeline below it
+    showing how far through the session it is and where the keyframes are.
+
+    Args:
+        window: pygame Surface of the player's window
+        recording: Recording being played
+        index: integer index of the frame to draw
+    """
+    window.fill((0, 0, 0))
+    window.blit(recording.surface(index), (0, 0))
+    top = window.get_height() - TIMELINE_HEIGHT
+    width = window.get_width()
+    duration = recording.times[-1] or 1
+    window.fill((40, 40, 40), (0, top, width, TIMELINE_HEIGHT))
+    for keyframe in recording.keyframes:
+        x = int(recording.times[keyframe] / duration * (width - 1))
+        window.fill((90, 90, 90), (x, top, 1, TIMELINE_HEIGHT))
+    played = int(recording.times[index] / duration * (width - 1))
+    window.fill((200, 160, 40), (0, top + TIMELINE_HEIGHT // 2 - 1, played, 3))
+    window.fill((255, 255, 255), (played - 1, top, 3, TIMELINE_HEIGHT))
+    pygame.display.set_caption(
+        f"Frame {index + 1}/{len(recording)}, "
+        f"{recording.times[index]:.2f}/{recording.times[-1]:.2f} s"
+    )
+    pygame.display.update()
+
+
+# PYLINT DISABLE: the play loop tracks the frame shown and the playback clock
+# alongside the window it draws to.
+# pylint: disable-next=too-many-locals
+def play(recording):
+    """
+    Open a window showing a recorded session, letting the user play it back
+    at the speed it was recorded and scrub through it, until the window is
+    closed or Escape is pressed.
+
+    Args:
+        recording: Recording to play
+    """
+    pygame.init()
+    sizes = [recording.size(keyframe) for keyframe in recording.keyframes]
+    width = max(size[0] for size in sizes)
+    height = max(size[1] for size in sizes)
+    window = pygame.display.set_mode((width, height + TIMELINE_HEIGHT))
+    clock = pygame.time.Clock()
+    index = 0
+    shown = None
+
+    # Session time and wall clock time playing last started from
+    playing_from = None
+    duration = recording.times[-1] or 1
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (
+                event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE
+            ):
+                pygame.quit()
+                return
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                playing = playing_from is None and index < len(recording) - 1
+                playing_from = (
+                    (recording.times[index], time.perf_counter())
+                    if playing
+                    else None
+                )
+            elif event.type == pygame.KEYDOWN:
+                target = _seek_key(recording, index, event.key)
+                if target is not None:
+                    index, playing_from = target, None
+            elif (
+                event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION)
+                and pygame.mouse.get_pressed()[0]
+                and event.pos[1] >= window.get_height() - TIMELINE_HEIGHT
+            ):
+                fraction = event.pos[0] / (window.get_width() - 1)
+                index = recording.at_time(fraction * duration)
+                playing_from = None
+
+        if playing_from is not None:
+            session_time, wall_time = playing_from
+            index = recording.at_time(
+                session_time + time.perf_counter() - wall_time
+            )
+            if index == len(recording) - 1:
+                playing_from = None
+        if index != shown:
+            _draw_player(window, recording, index)
+            shown = index
+        clock.tick(PLAYER_FPS)
+
+
+def main(argv=None):
+    """
+    Play a recorded session, or save one of its frames, from the command line.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+
+    Returns:
+        integer exit code, 1 if the session has no frames and 0 otherwise
+    """
+    parser = argparse.ArgumentParser(description="Play a recorded session.")
+    parser.add_argument("session", help="session file recorded with --record")
+    parser.add_argument(
+        "--export",
+        nargs=2,
+        metavar=("FRAME", "IMAGE"),
+        help="save the given frame number (from 0) as an image and exit",
+    )
+    args = parser.parse_args(argv)
+
+    with Recording(args.session) as recording:
+        if not recording:
+            print(f"{args.session} has no frames", file=sys.stderr)
+            return 1
+        print(
+            f"{len(recording)} frames ({len(recording.keyframes)} keyframes) "
+            f"over {recording.times[-1]:.2f} s",
+            file=sys.stderr,
+        )
+        if args.export:
+            frame, filepath = args.export
+            pygame.image.save(recording.surface(int(frame)), filepath)
+        else:
+            play(recording)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Find the map point nearest to a position on the map, and route the player
+between map points, so the player can travel by clicking on the map.
+
+Map points are bucketed into a uniform grid over the map image, so finding the
+point nearest a click only searches the grid cells around it. Routes follow the
+DirectionsToMove graph: for each destination a next-hop table (the first step
+towards the destination from every point) is worked out once with a breadth
+first search, after which every step of every route to that destination is a
+single lookup.
+"""
+
+import math
+from ast import literal_eval
+from collections import deque
+
+from scene import NO_EVENT_ID
+
+# Average number of map points per grid cell the grid is sized for
+POINTS_PER_CELL = 2
+
+
+# PYLINT DISABLE: the grid needs its origin, cell size and extent alongside the
+# cells themselves to answer nearest point queries.
+# pylint: disable-next=too-many-instance-attributes
+class MapRouter:
+    """
+    Spatial index and next-hop routing tables over the map points.
+    """
+
+    def __init__(self, map_data):
+        """
+        Build the grid of map points and the graph of moves between them.
+
+        Args:
+            map_data: list of map point dictionaries loaded from map.json
+        """
+        self._map_data = map_data
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Rebuild the grid and graph and forget every routing table, after the
+        map data they were built from has changed.
+        """
+        # In importing to JSON, tuples are stored as strings, and literal_eval
+        # converts from the string back into a tuple. Moves into each map
+        # point are kept, for searching back from destinations.
+        self._previous = [[] for _ in self._map_data]
+        for map_id, point in enumerate(self._map_data):
+            for next_id in literal_eval(point["DirectionsToMove"]):
+                if next_id is not None:
+                    self._previous[next_id].append(map_id)
+
+        self._positions = [
+            (point["MapPointCenterWidth"], point["MapPointCenterHeight"])
+            for point in self._map_data
+        ]
+
+        # Size the cells so each holds a few points on average
+        min_x = min(x for x, _ in self._positions)
+        min_y = min(y for _, y in self._positions)
+        area = max(
+            1,
+            (max(x for x, _ in self._positions) - min_x + 1)
+            * (max(y for _, y in self._positions) - min_y + 1),
+        )
+        self._cell_size = max(
+            1.0, math.sqrt(area * POINTS_PER_CELL / len(self._positions))
+        )
+        self._origin = (min_x, min_y)
+        self._grid = {}
+        for map_id, position in enumerate(self._positions):
+            self._grid.setdefault(self._cell(position), []).append(map_id)
+        self._grid_span = max(
+            max(abs(column), abs(row)) for column, row in self._grid
+        )
+
+        # Next-hop tables, keyed by destination map ID
+        self._next_hops = {}
+
+    def _cell(self, position):
+        """
+        Find the grid cell a position is in.
+
+        Args:
+            position: tuple of two numbers (x, y) in map image pixels
+
+        Returns:
+            tuple of two integers (column, row)
+        """
+        return (
+            math.floor((position[0] - self._origin[0]) / self._cell_size),
+            math.floor((position[1] - self._origin[1]) / self._cell_size),
+        )
+
+    def nearest(self, position):
+        """
+        Find the map point nearest to a position on the map.
+
+        Grid cells are searched in rings around the position's cell. Every
+        point beyond ring r is at least r cell widths away (the position may be
+        at the edge of its own cell), so the search stops once the nearest
+        point found is closer than that.
+
+        Args:
+            position: tuple of two numbers (x, y) in map image pixels
+
+        Returns:
+            integer ID of the nearest map point
+        """
+        column, row = self._cell(position)
+        best_id, best_distance = None, math.inf
+        # Rings beyond this cover no more of the grid
+        last_ring = self._grid_span + max(abs(column), abs(row))
+        ring = 0
+        while ring <= last_ring and (
+            best_distance > (ring - 1) * self._cell_size
+        ):
+            for cell in _ring_cells(column, row, ring):
+                for map_id in self._grid.get(cell, ()):
+                    distance = math.dist(position, self._positions[map_id])
+                    if distance < best_distance:
+                        best_id, best_distance = map_id, distance
+            ring += 1
+        return best_id
+
+    def has_event(self, map_id):
+        """
+        Check whether arriving at a map point starts an event.
+
+        Args:
+            map_id: integer ID of the map point
+
+        Returns:
+            boolean, True if the map point has a special event
+        """
+        return self._map_data[map_id]["SpecialEvent"] != NO_EVENT_ID
+
+    def _next_hop_table(self, destination):
+        """
+        Return the first step towards a destination from every map point,
+        working it out with a breadth first search back from the destination
+        the first time it is needed.
+
+        Args:
+            destination: integer ID of the destination map point
+
+        Returns:
+            list with, for each map point, the integer ID of the next map point
+                on a shortest route to the destination (or None if there is no
+                route, or it is the destination)
+        """
+        if destination not in self._next_hops:
+            table = [None] * len(self._previous)
+            reached = {destination}
+            frontier = deque([destination])
+            while frontier:
+                map_id = frontier.popleft()
+                for source in self._previous[map_id]:
+                    if source not in reached:
+                        reached.add(source)
+                        table[source] = map_id
+                        frontier.append(source)
+            self._next_hops[destination] = table
+        return self._next_hops[destination]
+
+    def next_hop(self, source, destination):
+        """
+        Find the first step of a shortest route between two map points.
+
+        Args:
+            source: integer ID of the map point the player is at
+            destination: integer ID of the map point to travel to
+
+        Returns:
+            integer ID of the map point to move to next, or None if the player
+                is already there or it can't be reached
+        """
+        return self._next_hop_table(destination)[source]
+
+    def route(self, source, destination):
+        """
+        Find the map points the player walks through travelling towards a
+        destination. The walk stops early at any map point with a special
+        event.
+
+        Args:
+            source: integer ID of the map point the player is at
+            destination: integer ID of the map point to travel to
+
+        Returns:
+            list of integer map point IDs moved to, in order
+        """
+        table = self._next_hop_table(destination)
+        steps = []
+        map_id = table[source]
+        while map_id is not None:
+            steps.append(map_id)
+            if self.has_event(map_id):
+                break
+            map_id = table[map_id]
+        return steps
+
+
+def _ring_cells(column, row, ring):
+    """
+    Find the grid cells on the square ring a number of cells away from a cell.
+
+    Args:
+        column: integer column of the centre cell
+        row: integer row of the centre cell
+        ring: integer distance of the ring in cells (0 is the centre cell)
+
+    Returns:
+        list of tuple (column, row) cells
+    """
+    if ring == 0:
+        return [(column, row)]
+    cells = []
+    for offset in range(-ring, ring + 1):
+        cells.append((column + offset, row - ring))
+        cells.append((column + offset, row + ring))
+    for offset in range(-ring + 1, ring):
+        cells.append((column - ring, row + offset))
+        cells.append((column + ring, row + offset))
+    return cells
@@ -0,0 +1,333 @@
+"""
+Measure how loading and playing the game scale with the size of the story, by
+running against synthetic story packs (see storypack.py).
+
+For each pack the driver reports:
+- how long it takes to load the data files, parse every event into the option
+  table and index the map for click-to-travel, and the peak memory allocated
+  while doing so,
+- the latency of each transition of a seeded random playthrough: moving
+  between map points, and choosing an option of an event (finding the visible
+  options, applying the chosen option's effect and finding where it leads),
+- the latency of click-to-travel routes between random map points, which
+  includes building the routing table for each new destination.
+
+Drawing isn't included, since it doesn't depend on the size of the story (see
+benchmark.py for the draw paths).
+
+Run with:
+    python scale_benchmark.py --nodes 1000 10000 100000
+    python scale_benchmark.py --pack packs/100k
+
+NOTE: memory is measured with tracemalloc, which only sees memory allocated
+through Python, so it is measured in a separate pass from the timings.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from ast import literal_eval
+
+import assets
+from balance import DEFAULT_PLAYER_HEALTH
+from instrumentation import percentile
+from options import OptionTable
+from routing import MapRouter
+from scene import NO_EVENT_ID
+from storypack import EVENTS_FILENAME, MAP_FILENAME, write_pack
+
+# Default sizes of the packs generated and benchmarked
+DEFAULT_NODE_COUNTS = (1000, 10000, 100000)
+
+# Default number of playthrough transitions and click-to-travel routes timed
+DEFAULT_TRANSITIONS = 10000
+DEFAULT_ROUTES = 10
+
+
+def load_pack(events_filepath, map_filepath):
+    """
+    Load a story pack the way the game does at startup, timing each step.
+
+    Args:
+        events_filepath: string path to the pack's events file
+        map_filepath: string path to the pack's map file
+
+    Returns:
+        Tuple of the list of map point dictionaries, the OptionTable built
+            from the events, the MapRouter built from the map, and a
+            dictionary mapping the name of each step to its time in
+            milliseconds
+    """
+    assets.clear_cache()
+    start = time.perf_counter()
+    event_data = assets.load_json(events_filepath)
+    map_data = assets.load_json(map_filepath)
+    parsed = time.perf_counter()
+    options = OptionTable(event_data)
+    tabled = time.perf_counter()
+    router = MapRouter(map_data)
+    indexed = time.perf_counter()
+    return (
+        map_data,
+        options,
+        router,
+        {
+            "json_ms": (parsed - start) * 1000,
+            "options_ms": (tabled - parsed) * 1000,
+            "router_ms": (indexed - tabled) * 1000,
+        },
+    )
+
+
+def measure_load_memory(events_filepath, map_filepath):
+    """
+    Find the peak memory allocated while loading a story pack.
+
+    Args:
+        events_filepath: string path to the pack's events file
+        map_filepath: string path to the pack's map file
+
+    Returns:
+        integer peak number of bytes allocated
+    """
+    assets.clear_cache()
+    tracemalloc.start()
+    try:
+        load_pack(events_filepath, map_filepath)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        assets.clear_cache()
+    return peak
+
+
+def _move(map_data, map_id, rng):
+    """
+    Move from a map point in a random direction, in the same way the game
+    reads the directions to move when a map point is shown.
+
+    Args:
+        map_data: list of map point dictionaries
+        map_id: integer ID of the map point the player is at
+        rng: random.Random choosing the direction
+
+    Returns:
+        integer ID of the map point moved to, or None if the player can't
+            move anywhere
+    """
+    directions = [
+        next_id
+        for next_id in literal_eval(map_data[map_id]["DirectionsToMove"])
+        if next_id is not None
+    ]
+    return rng.choice(directions) if directions else None
+
+
+def measure_transitions(map_data, options, count, seed=0):
+    """
+    Time the transitions of a random playthrough, choosing uniformly between
+    the directions to move and the visible options. The player starts again
+    from the first map point whenever the game ends or they get stuck.
+
+    Args:
+        map_data: list of map point dictionaries
+        options: OptionTable built from the events
+        count: integer number of transitions to time
+        seed: integer or string seed for the playthrough's choices
+
+    Returns:
+        Dictionary mapping "map" and "event" to lists of the float time in
+            milliseconds of each transition of that kind
+    """
+    rng = random.Random(seed)
+    times = {"map": [], "event": []}
+    map_id, event_id = 0, map_data[0]["SpecialEvent"]
+    health, mask = DEFAULT_PLAYER_HEALTH, 0
+    for _ in range(count):
+        start = time.perf_counter()
+        if event_id == NO_EVENT_ID:
+            kind = "map"
+            map_id = _move(map_data, map_id, rng)
+            ended = map_id is None
+            if not ended:
+                event_id = map_data[map_id]["SpecialEvent"]
+        else:
+            kind = "event"
+            event_id, effect, end_message = options.outcome(
+                event_id,
+                rng.choice(options.visible_options(event_id, mask, health)),
+            )
+            health, mask = effect(health, mask)
+            ended = end_message is not None or health <= 0
+            if event_id is None:
+                event_id = NO_EVENT_ID
+        times[kind].append((time.perf_counter() - start) * 1000)
+
+        if ended:
+            map_id, event_id = 0, map_data[0]["SpecialEvent"]
+            health, mask = DEFAULT_PLAYER_HEALTH, 0
+    return times
+
+
+def measure_routes(router, node_count, count, seed=0):
+    """
+    Time click-to-travel routes between random map points.
+
+    Args:
+        router: MapRouter built from the map
+        node_count: integer number of map points
+        count: integer number of routes to time
+        seed: integer or string seed for the points chosen
+
+    Returns:
+        list of the float time in milliseconds of each route
+    """
+    rng = random.Random(seed)
+    times = []
+    for _ in range(count):
+        source, destination = rng.randrange(node_count), rng.randrange(
+            node_count
+        )
+        start = time.perf_counter()
+        router.route(source, destination)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def run_pack(
+    directory,
+    transitions=DEFAULT_TRANSITIONS,
+    routes=DEFAULT_ROUTES,
+    seed=0,
+):
+    """
+    Run every measurement against a story pack.
+
+    Args:
+        directory: string path to the directory holding the pack
+        transitions: integer number of playthrough transitions to time
+        routes: integer number of click-to-travel routes to time
+        seed: integer or string seed for the playthrough and routes
+
+    Returns:
+        Dictionary mapping the name of each measurement to its value
+    """
+    events_filepath = os.path.join(directory, EVENTS_FILENAME)
+    map_filepath = os.path.join(directory, MAP_FILENAME)
+    map_data, options, router, result = load_pack(events_filepath, map_filepath)
+    result["map_points"] = len(map_data)
+    result["events"] = len(options.event_ids)
+    result["size_mib"] = (
+        os.path.getsize(events_filepath) + os.path.getsize(map_filepath)
+    ) / 2**20
+
+    times = measure_transitions(map_data, options, transitions, seed)
+    for kind, samples in times.items():
+        if samples:
+            result[f"{kind}_p50_us"] = percentile(samples, 0.5) * 1000
+            result[f"{kind}_p99_us"] = percentile(samples, 0.99) * 1000
+    if routes:
+        samples = measure_routes(router, len(map_data), routes, seed)
+        result["route_p50_ms"] = percentile(samples, 0.5)
+        result["route_p99_ms"] = percentile(samples, 0.99)
+
+    # Free the pack before measuring its memory, so the two aren't both held
+    del map_data, options, router
+    result["load_peak_mib"] = (
+        measure_load_memory(events_filepath, map_filepath) / 2**20
+    )
+    return result
+
+
+def format_results(results):
+    """
+    Format the results of every pack into a human readable table.
+
+    Args:
+        results: dictionary mapping a string pack name to its results (see
+            run_pack)
+
+    Returns:
+        string representing the table of results
+    """
+    columns = (
+        ("map_points", "points", "d"),
+        ("size_mib", "MiB", ".1f"),
+        ("json_ms", "json ms", ".1f"),
+        ("options_ms", "table ms", ".1f"),
+        ("router_ms", "router ms", ".1f"),
+        ("load_peak_mib", "peak MiB", ".1f"),
+        ("map_p99_us", "map p99 us", ".1f"),
+        ("event_p99_us", "event p99 us", ".1f"),
+        ("route_p99_ms", "route p99 ms", ".2f"),
+    )
+    lines = [
+        f"{'pack':<12}" + "".join(f"{title:>14}" for _, title, _ in columns)
+    ]
+    for name, result in results.items():
+        lines.append(
+            f"{name:<12}"
+            + "".join(
+                f"{result[key]:>14{spec}}" if key in result else f"{'-':>14}"
+                for key, _, spec in columns
+            )
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Generate story packs of each size (or use an existing pack) and run the
+    measurements against them from the command line.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark loading and playing large story packs."
+    )
+    parser.add_argument(
+        "--nodes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_NODE_COUNTS),
+        help="number of map points (and events) of each pack to generate",
+    )
+    parser.add_argument("--pack", help="benchmark an existing pack directory")
+    parser.add_argument(
+        "--keep", help="directory to keep generated packs in, under their size"
+    )
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--transitions", type=int, default=DEFAULT_TRANSITIONS)
+    parser.add_argument("--routes", type=int, default=DEFAULT_ROUTES)
+    parser.add_argument("--output", help="JSON file to write the results to")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if args.pack:
+        results[os.path.basename(os.path.normpath(args.pack))] = run_pack(
+            args.pack, args.transitions, args.routes, args.seed
+        )
+    else:
+        with tempfile.TemporaryDirectory() as scratch:
+            for node_count in args.nodes:
+                directory = os.path.join(args.keep or scratch, str(node_count))
+                write_pack(directory, node_count, seed=args.seed)
+                results[str(node_count)] = run_pack(
+                    directory, args.transitions, args.routes, args.seed
+                )
+                print(f"Benchmarked {node_count} map points", file=sys.stderr)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
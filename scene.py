@@ -2,14 +2,18 @@
 Code to render each type of scene in the game.
 """
 
-from json import load
 from abc import ABC, abstractmethod
 from ast import literal_eval
 
-from PIL import Image
-import pygame
+import assets
+from hud import InventoryPanel
+from instrumentation import timed
+from minimap import Minimap
+from options import load_option_table
+from viewport import Viewport
 
-# Pygame window size constants
+# Size of the logical canvas scenes are laid out on, which is scaled to fit the
+# window (see viewport.py)
 GLOBAL_WINDOW_WIDTH = 800
 GLOBAL_WINDOW_HEIGHT = 500
 
@@ -18,6 +22,10 @@ MAP_SCENES_FILEPATH = "data/scene_data/map.json"
 MAP_BACKGROUND_FILEPATH = "data/scene_data/map_final.png"
 EVENT_SCENES_FILEPATH = "data/event_data/events.json"
 
+# ID used in the data files to signify the end of an event tree (returning the
+# player to the map), or that a map point has no special event
+NO_EVENT_ID = -100
+
 # Pygame font constants
 FONT_FILEPATH = "data/fonts/pixel.ttf"
 SMALL_FONT_SIZE = 20
@@ -33,6 +41,9 @@ MAX_STRING_LENGTH = 280
 HEALTH_HEIGHT = 10
 INVENTORY_HEIGHT = HEALTH_HEIGHT + (LINE_OFFSET * 2)
 
+# Width in pixels of the minimap drawn in the top right corner of map scenes
+MINIMAP_WIDTH = 160
+
 # Text constants related to printing directions
 DIRECTION_KEY = ["Left <-", "Right ->", "Forward ^", "Down V"]
 
@@ -40,42 +51,82 @@ DIRECTION_KEY = ["Left <-", "Right ->", "Forward ^", "Down V"]
 DEFAULT_DEATH_MESSAGE = "Your health has reached zero."
 
 
+def split_lines(text):
+    """
+    Split text that is too long to fit on the screen into a single line into
+    lines WORDS_PER_LINE words long, as they are drawn.
+
+    Args:
+        text: string representing all text to be printed
+
+    Returns:
+        list of strings of each line, top to bottom
+    """
+    text_split = text.split(" ")
+    lines = []
+
+    # Split the text into lines WORDS_PER_LINE words long
+    while len(text_split) > WORDS_PER_LINE:
+        words = " ".join(text_split[0:WORDS_PER_LINE])
+        lines.append(words)
+        text_split = text_split[WORDS_PER_LINE : len(text_split)]
+
+    # Append the line shorter than number per line or the entire thing if
+    # shorter than the number per line to the split text
+    lines.append(" ".join(text_split[0 : len(text_split)]))
+    return lines
+
+
 class Scene(ABC):
     """
     Handles displaying and updating scenes to the player
     """
 
-    def __init__(self, surface, player) -> None:
+    def __init__(
+        self, surface, player, viewport=None, inventory_panel=None
+    ) -> None:
         """
-        Loads the pygame surface that scenes will be displayed on and
-        defines the fonts that will be used on text throughout the game
+        Loads the pygame surface that scenes will be displayed on. Fonts used
+        on text throughout the game are only loaded once they are first drawn.
 
         Args:
             surface: pygame surface representing the surface to draw
             scenes objects on to
             player: PlayerCharacter object to keep track of scene state in
+            viewport: optional Viewport fitting the logical canvas to the
+                surface, shared between scenes so they can be resized
+                together. Defaults to fitting the surface's current size.
+            inventory_panel: optional InventoryPanel showing the player's
+                inventory, shared between scenes so they show the same page
+                and reuse each other's rendering
         """
         super().__init__()
 
         # Load the pygame surface being used
         self._surface = surface
-
-        # Define fonts to be used in drawing a scene
-        self._pixel_font_small = pygame.font.Font(
-            FONT_FILEPATH, SMALL_FONT_SIZE
-        )
+        if viewport is None:
+            viewport = Viewport(
+                surface.get_size(), (GLOBAL_WINDOW_WIDTH, GLOBAL_WINDOW_HEIGHT)
+            )
+        self._viewport = viewport
 
         # Define font text colors
-        self._white = WHITE
         self._red = (255, 0, 0)
         self._green = (0, 255, 0)
 
         # Load the player character for later reference (health, inventory, etc)
         #
-        # Create a copy of the player using the player_sprite class, which
-        # extends the pygame sprite class.
+        # The player's sprite image is loaded from the character's filepath
+        # when drawn, scaled to the window's resolution.
         self._player = player
-        self._player_sprite = PlayerSprite(self._player)
+
+        # ID of the location drawn most recently, so it can be redrawn
+        self._location_id = None
+
+        # Page of the player's inventory shown, rendered once per change
+        if inventory_panel is None:
+            inventory_panel = InventoryPanel()
+        self._inventory_panel = inventory_panel
 
     @property
     def surface(self):
@@ -85,6 +136,95 @@ class Scene(ABC):
         Returns:
             pygame surface object being drawn on
         """
+        return self._surface
+
+    @property
+    def inventory_panel(self):
+        """
+        Return the panel showing the player's inventory.
+
+        Returns:
+            InventoryPanel object
+        """
+        return self._inventory_panel
+
+    @property
+    def viewport(self):
+        """
+        Return the viewport fitting the logical canvas to the surface.
+
+        Returns:
+            Viewport object
+        """
+        return self._viewport
+
+    def render_text(self, text, color=WHITE, large=False):
+        """
+        Render a string of text in the game's pixel font. Fonts are loaded the
+        first time they are used, and recently rendered strings are reused
+        rather than rendered again.
+
+        Text is rendered at the window's resolution, so it stays sharp rather
+        than being scaled up with the rest of the canvas.
+
+        Args:
+            text: string of text to render
+            color: tuple of three ints (r, g, b) of the text color
+            large: boolean, True to use the large font used for end of game
+                titles rather than the small font used for most text
+
+        Returns:
+            pygame Surface containing the rendered text
+        """
+        size = LARGE_FONT_SIZE if large else SMALL_FONT_SIZE
+        return assets.render_text(
+            FONT_FILEPATH, self._viewport.scale_length(size), text, color
+        )
+
+    def load_image(self, filepath):
+        """
+        Load an image scaled to the window's resolution. Each image is only
+        scaled once per window size.
+
+        Args:
+            filepath: string representing the path to the image file
+
+        Returns:
+            pygame Surface containing the scaled image
+        """
+        return assets.load_scaled_image(filepath, self._viewport.scale)
+
+    def blit(self, image, position):
+        """
+        Draw an image already scaled to the window's resolution (such as from
+        load_image or render_text) at a position on the logical canvas.
+
+        Args:
+            image: pygame Surface to draw
+            position: tuple of two numbers (x, y) of the image's top left
+                corner in logical pixels
+
+        Returns:
+            pygame Rect of the area of the surface drawn on
+        """
+        return self._surface.blit(image, self._viewport.to_screen(position))
+
+    def blit_centered(self, image, center):
+        """
+        Draw an image already scaled to the window's resolution centred on a
+        position on the logical canvas.
+
+        Args:
+            image: pygame Surface to draw
+            center: tuple of two numbers (x, y) of the image's centre in
+                logical pixels
+
+        Returns:
+            pygame Rect of the area of the surface drawn on
+        """
+        return self._surface.blit(
+            image, image.get_rect(center=self._viewport.to_screen(center))
+        )
 
     @abstractmethod
     def draw(self, location_id):
@@ -92,6 +232,24 @@ class Scene(ABC):
         Abstract method, template to draw a scene, regardless of type.
         """
 
+    @property
+    def location_id(self):
+        """
+        Return the ID of the location drawn most recently.
+
+        Returns:
+            integer location ID, or None if nothing has been drawn yet
+        """
+        return self._location_id
+
+    def redraw(self):
+        """
+        Draw the location drawn most recently again, such as after the data
+        it is drawn from has been reloaded.
+        """
+        if self._location_id is not None:
+            self.draw(self._location_id)
+
     def draw_player(self, width_difference=0, height_difference=0):
         """
         Draw the player sprite onto the screen, given the amount of the map has
@@ -104,23 +262,14 @@ class Scene(ABC):
             height_difference: integer representing height offset in pixels.
                 Defaults to zero (draws character in center of screen).
         """
-        self._surface.blit(
-            self._player_sprite.image,
+        self.blit_centered(
+            self.load_image(self._player.filepath),
             (
-                (
-                    # The character is drawn in the center of the screen,
-                    # while accounting for the size of the sprite itself and
-                    # if the window has been shifted due to being too close
-                    # to the edge of the map.
-                    (GLOBAL_WINDOW_WIDTH / 2)
-                    - (self._player_sprite.width / 2)
-                    + width_difference
-                ),
-                (
-                    (GLOBAL_WINDOW_HEIGHT / 2)
-                    - (self._player_sprite.height / 2)
-                    + height_difference
-                ),
+                # The character is drawn in the center of the screen, while
+                # accounting for if the window has been shifted due to being
+                # too close to the edge of the map.
+                (GLOBAL_WINDOW_WIDTH / 2) + width_difference,
+                (GLOBAL_WINDOW_HEIGHT / 2) + height_difference,
             ),
         )
 
@@ -133,39 +282,30 @@ class Scene(ABC):
         """
         # Print health in white text
         color = (255, 255, 255)
-        health_text = self._pixel_font_small.render(
-            f"Health: {health}", True, color
-        )
-        self._surface.blit(health_text, (SIDE_EDGE_OFFSET, HEALTH_HEIGHT))
+        health_text = self.render_text(f"Health: {health}", color)
+        self.blit(health_text, (SIDE_EDGE_OFFSET, HEALTH_HEIGHT))
 
-    def display_inventory(self, inventory):
+    def display_inventory(self, inventory, revision=None):
         """
-        Display the player's current inventory at standard location on the
-        screen.
+        Display a page of the player's current inventory at standard location
+        on the screen. The page is only rendered again when the inventory
+        changes, the page is turned or the window is scaled.
 
         Args:
             inventory: list of strings representing the player's current
                 inventory
-        """
-        # Print in white font
-        color = (255, 255, 255)
-        inventory_title_text = self._pixel_font_small.render(
-            "Inventory:", True, color
-        )
-        self._surface.blit(
-            inventory_title_text, (SIDE_EDGE_OFFSET, INVENTORY_HEIGHT)
+            revision: optional integer inventory revision of the player (see
+                PlayerCharacter.inventory_revision). Without it, the page is
+                rendered again on every draw.
+        """
+        # Print in white font, one line per item below the title
+        panel = self._inventory_panel.render(
+            inventory,
+            revision,
+            self.render_text,
+            self._viewport.scale_length(LINE_OFFSET),
         )
-        for index, item in enumerate(inventory):
-            inventory_item_text = self._pixel_font_small.render(
-                item, True, color
-            )
-            self._surface.blit(
-                inventory_item_text,
-                (
-                    SIDE_EDGE_OFFSET,  # x cords
-                    (INVENTORY_HEIGHT + (LINE_OFFSET * (index + 1))),  # y cords
-                ),
-            )
+        self.blit(panel, (SIDE_EDGE_OFFSET, INVENTORY_HEIGHT))
 
     def split_text_to_lines(self, start, direction, text):
         """
@@ -189,18 +329,7 @@ class Scene(ABC):
         else:
             direction_multiplier = 1
 
-        text_split = text.split(" ")
-        lines = []
-
-        # Split the text into lines WORDS_PER_LINE words long
-        while len(text_split) > WORDS_PER_LINE:
-            words = " ".join(text_split[0:WORDS_PER_LINE])
-            lines.append(words)
-            text_split = text_split[WORDS_PER_LINE : len(text_split)]
-
-        # Append the line shorter than number per line or the entire thing if
-        # shorter than the number per line to the split text
-        lines.append(" ".join(text_split[0 : len(text_split)]))
+        lines = split_lines(text)
 
         # If the text is being printed up from the starting coordinates, then
         # the list of lines needs to be reversed since the text is printed
@@ -210,16 +339,16 @@ class Scene(ABC):
 
         # Print each line sequentially on the screen
         for index, line in enumerate(lines):
-            line_text = self._pixel_font_small.render(line, True, WHITE)
-            text_rect = line_text.get_rect(
-                center=(
+            line_text = self.render_text(line)
+            self.blit_centered(
+                line_text,
+                (
                     start[0],
                     # Each line of text adds a standard amount of spacing
                     # per line to the height
                     start[1] + (index * LINE_OFFSET * direction_multiplier),
-                )
+                ),
             )
-            self._surface.blit(line_text, text_rect)
 
 
 class MapScene(Scene):
@@ -231,7 +360,9 @@ class MapScene(Scene):
     as it goes through.
     """
 
-    def __init__(self, surface, player) -> None:
+    def __init__(
+        self, surface, player, viewport=None, inventory_panel=None
+    ) -> None:
         """
         Init. a map scene to be drawn, including taking in the surface to be
         drawn on and taking in a player so that model state information can be
@@ -240,21 +371,34 @@ class MapScene(Scene):
         Args:
             surface: pygame Surface object on which to draw
             player: PlayerCharacter object to be drawn onto the surface
+            viewport: optional Viewport shared with the other scenes
+            inventory_panel: optional InventoryPanel shared with the other
+                scenes
         """
-        super().__init__(surface, player)
+        super().__init__(surface, player, viewport, inventory_panel)
 
         # Load scene data
-        with open(MAP_SCENES_FILEPATH, "r", encoding="utf-8") as datafile:
-            self._scene_data = load(datafile)
+        self._scene_data = assets.load_json(MAP_SCENES_FILEPATH)
 
-        # Load the map scene background image
-        #
-        # Additionally, store the size of the image to later ensure that the
-        # screen does not display beyond the edge of the map (this uses pillows)
-        self._map_background = pygame.image.load(MAP_BACKGROUND_FILEPATH)
-        map_width, map_height = Image.open(MAP_BACKGROUND_FILEPATH).size
+        # Position on the map image of the window's top left corner, as last
+        # drawn
+        self._map_corner = (0, 0)
 
-        self._map_size = (map_width, map_height)
+        # Overview of the whole map, scaled down when it is first drawn
+        self._minimap = Minimap(
+            self._scene_data, MAP_BACKGROUND_FILEPATH, MINIMAP_WIDTH
+        )
+
+    @property
+    def map_background(self):
+        """
+        Return the map background image, decoding it the first time the map is
+        drawn rather than at startup.
+
+        Returns:
+            pygame Surface containing the map background
+        """
+        return assets.load_image(MAP_BACKGROUND_FILEPATH)
 
     @property
     def scene_data(self):
@@ -267,6 +411,16 @@ class MapScene(Scene):
         """
         return self._scene_data
 
+    @property
+    def minimap(self):
+        """
+        Return the minimap drawn in the corner of the map.
+
+        Returns:
+            Minimap object
+        """
+        return self._minimap
+
     def display_movement_directions(self, next_moves):
         """
         Draw next map move options
@@ -290,10 +444,8 @@ class MapScene(Scene):
             # (left, right, up, down)
             if value is not None:
                 # Render the corresponding text and display it on the surface
-                next_move_text = self._pixel_font_small.render(
-                    DIRECTION_KEY[index], True, WHITE
-                )
-                self._surface.blit(
+                next_move_text = self.render_text(DIRECTION_KEY[index])
+                self.blit(
                     next_move_text,
                     (
                         # Print the standard distance from the edge and move
@@ -310,10 +462,8 @@ class MapScene(Scene):
 
         # Render instruction text for directions based on the number of lines
         # already printed (the number of directions the player can move)
-        move_directions = self._pixel_font_small.render(
-            "Choose a direction to go: ", True, WHITE
-        )
-        self._surface.blit(
+        move_directions = self.render_text("Choose a direction to go: ")
+        self.blit(
             move_directions,
             (
                 SIDE_EDGE_OFFSET,  # x coords
@@ -336,8 +486,10 @@ class MapScene(Scene):
         offset is returned.
 
         Args:
-            background: pygame image object to be drawn as the background
+            background: pygame image object to be drawn as the background,
+                scaled to the window's resolution
             image_size: tuple of two ints (width, height) of background size
+                in logical pixels
             width_center: integer representing pixel coordinates of image which
                 to center in the window (width of image)
             height_center: integer representing pixel coordinates of image which
@@ -372,23 +524,54 @@ class MapScene(Scene):
             map_width_corner = 0
 
         if (map_height_corner + GLOBAL_WINDOW_HEIGHT) > image_size[1]:
-            print(f"map height corner: {map_height_corner}")
             height_difference = (
                 map_height_corner + GLOBAL_WINDOW_HEIGHT - image_size[1]
             )
-            print(f"height difference: {height_difference}")
             map_height_corner -= height_difference
         elif map_height_corner < 0:
             height_difference = abs(map_height_corner)
             map_height_corner = 0
 
         # Actually draw the background
-        self._surface.blit(background, (-map_width_corner, -map_height_corner))
+        self.blit(background, (-map_width_corner, -map_height_corner))
+        self._map_corner = (map_width_corner, map_height_corner)
 
         # Return the map offsets
         return (int(width_difference), int(height_difference))
 
-    def draw(self, location_id):
+    def point_position(self, location_id):
+        """
+        Find where a map point is on the map image.
+
+        Args:
+            location_id: integer ID of the map point
+
+        Returns:
+            tuple of two ints (x, y) in map image pixels
+        """
+        current_scene = self._scene_data[location_id]
+        return (
+            current_scene["MapPointCenterWidth"],
+            current_scene["MapPointCenterHeight"],
+        )
+
+    def screen_to_map(self, position):
+        """
+        Convert a position in the window (in window pixels, such as a mouse
+        click) to the matching position on the map image, as the map was last
+        drawn.
+
+        Args:
+            position: tuple of two ints (x, y) of a position in the window
+
+        Returns:
+            tuple of two numbers (x, y) of the position on the map image
+        """
+        x, y = self._viewport.to_logical(position)
+        return (x + self._map_corner[0], y + self._map_corner[1])
+
+    @timed("map_draw")
+    def draw(self, location_id, camera=None):
         """
         Display the scene of the specified ID in the Pygame window.
 
@@ -402,23 +585,35 @@ class MapScene(Scene):
         Args:
             location_id: integer ID of the scene to be loaded from the map scene
                 data file.
+            camera: optional tuple of two numbers (x, y) of the point on the
+                map to centre the view (and the player) on, such as part way
+                through a pan between map points. Defaults to the map point.
         """
         # Load data for the current map point to be displayed
         current_scene = self._scene_data[location_id]
+        self._location_id = location_id
 
         # Draw background with helper function
+        #
+        # The size of the map is passed through to later ensure that the screen
+        # does not display beyond the edge of the map.
+        if camera is None:
+            camera = self.point_position(location_id)
+        map_background = self.map_background
         (width_difference, height_difference) = self.draw_background(
-            self._map_background,
-            self._map_size,
-            current_scene["MapPointCenterWidth"],
-            current_scene["MapPointCenterHeight"],
+            self.load_image(MAP_BACKGROUND_FILEPATH),
+            map_background.get_size(),
+            camera[0],
+            camera[1],
         )
 
         # Draw current player health
         self.display_health(self._player.health)
 
         # Draw current player inventory
-        self.display_inventory(self._player.inventory)
+        self.display_inventory(
+            self._player.inventory, self._player.inventory_revision
+        )
 
         # Draw character sprite
         self.draw_player(
@@ -433,6 +628,21 @@ class MapScene(Scene):
         next_moves = literal_eval(current_scene["DirectionsToMove"])
         self.display_movement_directions(next_moves)
 
+        # Draw the minimap in the top right corner, marking this map point as
+        # visited
+        self._minimap.visit(location_id)
+        self._minimap.resize(self._viewport.scale_length(MINIMAP_WIDTH))
+        self._minimap.draw(
+            self._surface,
+            self._viewport.to_screen(
+                (
+                    GLOBAL_WINDOW_WIDTH - MINIMAP_WIDTH - SIDE_EDGE_OFFSET,
+                    HEALTH_HEIGHT,
+                )
+            ),
+            location_id,
+        )
+
 
 class EventScene(Scene):
     """
@@ -443,7 +653,7 @@ class EventScene(Scene):
     shared by each map scene class.
     """
 
-    def __init__(self, surface, player):
+    def __init__(self, surface, player, viewport=None, inventory_panel=None):
         """
         Initiate an event scene to be displayed in the pygame window. Take in
         info about player and surface so status info like heath and inventory
@@ -452,18 +662,18 @@ class EventScene(Scene):
         Args:
             surface: pygame surface object on which to draw on
             player: PlayerCharacter object to be drawn on the surface
+            viewport: optional Viewport shared with the other scenes
+            inventory_panel: optional InventoryPanel shared with the other
+                scenes
         """
-        super().__init__(surface, player)
+        super().__init__(surface, player, viewport, inventory_panel)
 
-        # Load event scene data
-        with open(EVENT_SCENES_FILEPATH, "r", encoding="utf-8") as datafile:
-            self._scene_data = load(datafile)
-
-        # Define additional fonts to be used for event scenes
-        self._pixel_font_large = pygame.font.Font(
-            FONT_FILEPATH, LARGE_FONT_SIZE
-        )
+        # Load event scene data, and the parsed options shared with the
+        # controller
+        self._scene_data = assets.load_json(EVENT_SCENES_FILEPATH)
+        self._options = load_option_table(EVENT_SCENES_FILEPATH)
 
+    @timed("event_draw")
     def draw(self, location_id):
         """
         Display the event of a specific ID to a pygame window.
@@ -477,21 +687,23 @@ class EventScene(Scene):
         """
         # Load data for current even
         event_scene = self._scene_data[location_id]
+        self._location_id = location_id
 
         # print background image - if no special background image is present,
         # draw a black screen
         if event_scene["BackgroundImage"] != "":
-            # Load event background image
-            event_background = pygame.image.load(event_scene["BackgroundImage"])
+            # Load event background image (only decoded and scaled on first
+            # use)
+            event_background = self.load_image(event_scene["BackgroundImage"])
             # Draw background
-            self._surface.blit(event_background, (0, 0))
+            self.blit(event_background, (0, 0))
         else:
             self._surface.fill((0, 0, 0))
 
         # Load and draw event character image
         if event_scene["PromptImage"] != "":
-            event_character = pygame.image.load(event_scene["PromptImage"])
-            self._surface.blit(
+            event_character = self.load_image(event_scene["PromptImage"])
+            self.blit(
                 event_character,
                 (4 * GLOBAL_WINDOW_WIDTH / 5, GLOBAL_WINDOW_HEIGHT / 2),
             )
@@ -503,12 +715,16 @@ class EventScene(Scene):
             event_scene["TextPrompt"],
         )
 
-        # Convert text options into a list
-        options = literal_eval(event_scene["TextOptions"])
-
-        # Check for flashlight in three options case
-        if len(options) == 3 and not self._player.in_inventory("Flashlight"):
-            options = options[0 : len(options) - 1]
+        # Only show the options the player has the required items for
+        text_options = self._options.event(location_id)["TextOptions"]
+        options = [
+            text_options[index]
+            for index in self._options.visible_options(
+                location_id,
+                self._options.inventory_mask(self._player.inventory),
+                self._player.health,
+            )
+        ]
 
         # Convert all text options into one string and display the corresponding
         # keys to press
@@ -528,17 +744,18 @@ class EventScene(Scene):
         # Draw character sprite
         # Don't draw sprites when most of the window is text
         if len(event_scene["TextPrompt"]) < MAX_STRING_LENGTH:
-            player_sprite = PlayerSprite(self._player)
-            player_sprite_rect = player_sprite.image.get_rect(
-                center=(GLOBAL_WINDOW_WIDTH / 2, GLOBAL_WINDOW_HEIGHT / 2)
+            self.blit_centered(
+                self.load_image(self._player.filepath),
+                (GLOBAL_WINDOW_WIDTH / 2, GLOBAL_WINDOW_HEIGHT / 2),
             )
-            self._surface.blit(player_sprite.image, player_sprite_rect)
 
         # Draw current player health
         self.display_health(self._player.health)
 
         # Draw current player inventory
-        self.display_inventory(self._player.inventory)
+        self.display_inventory(
+            self._player.inventory, self._player.inventory_revision
+        )
 
     @property
     def scene_data(self):
@@ -568,10 +785,8 @@ class EventScene(Scene):
             death_message,
         )
 
-        died = self._pixel_font_large.render("YOU DIED", True, self._red)
-        died_rect = died.get_rect(center=(GLOBAL_WINDOW_WIDTH // 2, 50))
-
-        self._surface.blit(died, died_rect)
+        died = self.render_text("YOU DIED", self._red, large=True)
+        self.blit_centered(died, (GLOBAL_WINDOW_WIDTH // 2, 50))
 
     def draw_win_scene(self, win_message):
         """
@@ -589,57 +804,5 @@ class EventScene(Scene):
             win_message,
         )
 
-        won = self._pixel_font_large.render("YOU WON!", True, self._green)
-        won_rect = won.get_rect(center=(GLOBAL_WINDOW_WIDTH // 2, 50))
-
-        self._surface.blit(won, won_rect)
-
-
-class PlayerSprite(pygame.sprite.Sprite):
-    """
-    Turn our player character model object into a sprite object that pygame can
-    draw correctly.
-    """
-
-    def __init__(self, character) -> None:  # , *groups: _Group) -> None:
-        """
-        Init the sprite by setting the image and boundaries it is contained
-        within.
-
-        Args:
-            character: PlayerCharacter object to be draw
-        """
-        super().__init__()  # *groups)
-        self._image = pygame.image.load(character.filepath)
-
-        self._width, self._height = Image.open(character.filepath).size
-
-    @property
-    def width(self):
-        """
-        Return the width of the image representing the sprite
-
-        Returns:
-            integer representing the width of the sprite
-        """
-        return self._width
-
-    @property
-    def height(self):
-        """
-        Return the height of the image representing the sprite
-
-        Returns:
-            integer representing the height of the sprite
-        """
-        return self._height
-
-    @property
-    def image(self):
-        """
-        Return the pygame image object representing the Sprite
-
-        Returns:
-            pygame image object representing the Sprite
-        """
-        return self._image
+        won = self.render_text("YOU WON!", self._green, large=True)
+        self.blit_centered(won, (GLOBAL_WINDOW_WIDTH // 2, 50))
@@ -0,0 +1,498 @@
+"""
+Render every scene of the game to PNG files without a window, for the
+screenshots and thumbnails on the docs site.
+
+One screenshot is taken of every map point and every event, with the event
+drawn once for each inventory that changes which of its options are shown, plus
+the death and win screens of every option that ends the game. Scenes are drawn
+with the dummy SDL video driver across a pool of worker processes, each of
+which keeps its own asset caches, so every image is decoded once per worker.
+
+Rendering is incremental: the output directory holds a manifest of the content
+hash of each screenshot's inputs (its data record, the inventory and message
+shown, the images and fonts it draws and the drawing code itself). Only
+screenshots whose hash has changed since the last run are drawn again, and
+screenshots of scenes that no longer exist are removed.
+
+Run with:
+    python screenshots.py --output docs/images/scenes
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import pygame
+
+import assets
+from bundle import open_asset
+from character import PlayerCharacter
+from expressions import referenced_items
+from fontatlas import atlas_filepaths
+from main import window_size
+from options import load_option_table
+import scene
+
+# Default directory the screenshots and their manifest are written to
+DEFAULT_OUTPUT_DIRECTORY = "docs/images/scenes"
+MANIFEST_FILENAME = "manifest.json"
+
+# SDL video driver used to draw without a window
+HEADLESS_VIDEO_DRIVER = "dummy"
+
+# Player the scenes are drawn for
+PLAYER_SPRITE_FILEPATH = "data/sprite_data/resting.png"
+DEFAULT_PLAYER_HEALTH = 10
+
+# Most items an event's options can refer to before inventory variants are
+# only tried one item at a time, rather than every combination of items
+MAX_VARIANT_ITEMS = 4
+
+# Source files of the code that draws scenes. Changing any of them changes
+# every screenshot's hash, so everything is drawn again.
+RENDER_SOURCES = (
+    "assets.py",
+    "expressions.py",
+    "fontatlas.py",
+    "hud.py",
+    "minimap.py",
+    "options.py",
+    "scene.py",
+    "screenshots.py",
+    "viewport.py",
+)
+
+# PYLINT DISABLE: this module level variable holds the surface each worker
+# process draws onto, which is created once when the worker starts.
+_worker_surface = None  # pylint: disable=invalid-name
+
+
+def slug(text):
+    """
+    Turn text into a form fit for a filename.
+
+    Args:
+        text: string to convert
+
+    Returns:
+        string of lowercase letters and digits separated by single dashes
+    """
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-")
+
+
+def inventory_variants(options, event_id, health=DEFAULT_PLAYER_HEALTH):
+    """
+    Find the inventories an event needs to be drawn with to show every
+    combination of options a player could see.
+
+    Args:
+        options: OptionTable built from the events
+        event_id: integer ID of the event
+        health: integer health of the player the event is drawn for
+
+    Returns:
+        list of inventories (lists of string item names), starting with the
+            empty inventory, each showing a different set of options
+    """
+    items = set()
+    for tree in options.event(event_id)["Condition"]:
+        if tree is not None:
+            items.update(referenced_items(tree))
+    items = sorted(items)
+
+    # Try every combination of a few items, or each item alone if there are
+    # too many to combine
+    sizes = range(len(items) + 1 if len(items) <= MAX_VARIANT_ITEMS else 2)
+    variants = {}
+    for size in sizes:
+        for inventory in combinations(items, size):
+            visible = options.visible_options(
+                event_id, options.inventory_mask(inventory), health
+            )
+            variants.setdefault(visible, list(inventory))
+    return list(variants.values())
+
+
+def plan_shots(event_data, map_data, options):
+    """
+    List every screenshot to take.
+
+    Args:
+        event_data: list of event dictionaries loaded from events.json
+        map_data: list of map point dictionaries loaded from map.json
+        options: OptionTable built from the events
+
+    Returns:
+        list of shot dictionaries, each with the string "name" of its file
+            (without extension), the "kind" of scene ("map", "event", "death"
+            or "win"), the integer "id" of the map point or event (None for
+            the default death screen), the "inventory" list of items and the
+            end of game "message" shown (None for map points and events)
+    """
+    shots = []
+    for point in map_data:
+        shots.append(
+            {
+                "name": f"map-{point['ID']}",
+                "kind": "map",
+                "id": point["ID"],
+                "inventory": [],
+                "message": None,
+            }
+        )
+    for event in event_data:
+        for inventory in inventory_variants(options, event["ID"]):
+            suffix = "".join(f"-{slug(item)}" for item in inventory)
+            shots.append(
+                {
+                    "name": f"event-{event['ID']}{suffix}",
+                    "kind": "event",
+                    "id": event["ID"],
+                    "inventory": inventory,
+                    "message": None,
+                }
+            )
+
+    # One screen per distinct end of game message. Ending the game while
+    # losing health is a death, otherwise it is a win (see main.py).
+    shots.append(
+        {
+            "name": "death-default",
+            "kind": "death",
+            "id": None,
+            "inventory": [],
+            "message": scene.DEFAULT_DEATH_MESSAGE,
+        }
+    )
+    messages = {scene.DEFAULT_DEATH_MESSAGE}
+    for event in event_data:
+        parsed = options.event(event["ID"])
+        for index, message in enumerate(parsed["GameEnd"]):
+            if message is None or message in messages:
+                continue
+            messages.add(message)
+            kind = "death" if parsed["HealthChange"][index] else "win"
+            shots.append(
+                {
+                    "name": f"{kind}-{event['ID']}-{index}",
+                    "kind": kind,
+                    "id": event["ID"],
+                    "inventory": [],
+                    "message": message,
+                }
+            )
+    return shots
+
+
+def shot_inputs(shot, event_data, map_data):
+    """
+    Find the data record and asset files a screenshot depends on.
+
+    Args:
+        shot: shot dictionary (see plan_shots)
+        event_data: list of event dictionaries loaded from events.json
+        map_data: list of map point dictionaries loaded from map.json
+
+    Returns:
+        Tuple of the map point or event dictionary drawn (None for end of
+            game screens) and a list of string paths to the images drawn
+    """
+    if shot["kind"] == "map":
+        return map_data[shot["id"]], [scene.MAP_BACKGROUND_FILEPATH]
+    if shot["kind"] == "event":
+        event = event_data[shot["id"]]
+        return event, [
+            event[column]
+            for column in ("BackgroundImage", "PromptImage")
+            if event[column] != ""
+        ]
+    return None, []
+
+
+def _file_digest(filepath, digests):
+    """
+    Hash the contents of a file, reusing the hash if it was already found.
+
+    Args:
+        filepath: string path to the file (read from the mounted bundle if it
+            holds the file)
+        digests: dictionary mapping file paths to hashes already found
+
+    Returns:
+        string hex digest of the file, or "missing" if it doesn't exist
+    """
+    if filepath not in digests:
+        try:
+            with open_asset(filepath) as file:
+                digests[filepath] = hashlib.file_digest(
+                    file, "sha256"
+                ).hexdigest()
+        except OSError:
+            digests[filepath] = "missing"
+    return digests[filepath]
+
+
+def common_inputs(size):
+    """
+    List the files every screenshot depends on: the drawing code, the player
+    sprite and the fonts (and any pre-baked atlases of them) at the sizes
+    drawn.
+
+    Args:
+        size: tuple of two ints (width, height) of the screenshots
+
+    Returns:
+        list of string file paths
+    """
+    scale = min(
+        size[0] / scene.GLOBAL_WINDOW_WIDTH,
+        size[1] / scene.GLOBAL_WINDOW_HEIGHT,
+    )
+    filepaths = [
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), source)
+        for source in RENDER_SOURCES
+    ]
+    filepaths += [PLAYER_SPRITE_FILEPATH, scene.FONT_FILEPATH]
+    for font_size in (scene.SMALL_FONT_SIZE, scene.LARGE_FONT_SIZE):
+        filepaths += atlas_filepaths(
+            scene.FONT_FILEPATH, max(1, round(font_size * scale))
+        )
+    return filepaths
+
+
+def shot_digest(shot, record, filepaths, common, digests):
+    """
+    Hash everything a screenshot depends on.
+
+    Args:
+        shot: shot dictionary (see plan_shots)
+        record: map point or event dictionary drawn, or None
+        filepaths: list of string paths to the images drawn
+        common: string hash of the inputs shared by every screenshot
+        digests: dictionary mapping file paths to hashes already found
+
+    Returns:
+        string hex digest
+    """
+    digest = hashlib.sha256(common.encode())
+    digest.update(
+        json.dumps([shot, record], sort_keys=True, default=str).encode()
+    )
+    for filepath in filepaths:
+        digest.update(_file_digest(filepath, digests).encode())
+    return digest.hexdigest()
+
+
+def render_shot(shot, surface):
+    """
+    Draw the scene of a screenshot onto a surface, for a player with the
+    shot's inventory at full health.
+
+    Args:
+        shot: shot dictionary (see plan_shots)
+        surface: pygame Surface to draw onto, which the scene is scaled to
+            fit
+    """
+    player = PlayerCharacter(PLAYER_SPRITE_FILEPATH, DEFAULT_PLAYER_HEALTH)
+    for item in shot["inventory"]:
+        player.update_inventory(item)
+
+    # Each shot gets new scenes, so nothing drawn for one shot (such as the
+    # map points visited on the minimap) shows up in another
+    if shot["kind"] == "map":
+        scene.MapScene(surface, player).draw(shot["id"])
+        return
+    event_scene = scene.EventScene(surface, player)
+    if shot["kind"] == "event":
+        event_scene.draw(shot["id"])
+    elif shot["kind"] == "death":
+        event_scene.draw_death_scene(shot["message"])
+    else:
+        event_scene.draw_win_scene(shot["message"])
+
+
+def start_renderer(size):
+    """
+    Open a window with the dummy video driver to draw screenshots onto. Run
+    once in each worker process.
+
+    Args:
+        size: tuple of two ints (width, height) of the screenshots
+    """
+    global _worker_surface  # pylint: disable=global-statement
+    os.environ["SDL_VIDEODRIVER"] = HEADLESS_VIDEO_DRIVER
+    pygame.init()
+    _worker_surface = pygame.display.set_mode(size)
+
+
+def _render_to_file(job):
+    """
+    Draw a screenshot and save it. Runs in a worker process.
+
+    Args:
+        job: tuple of a shot dictionary (see plan_shots) and the string path
+            to save it to
+
+    Returns:
+        string name of the shot
+    """
+    shot, filepath = job
+    render_shot(shot, _worker_surface)
+    pygame.image.save(_worker_surface, filepath)
+    return shot["name"]
+
+
+def _read_manifest(filepath):
+    """
+    Read the hashes of the screenshots taken last time.
+
+    Args:
+        filepath: string path to the manifest
+
+    Returns:
+        Dictionary mapping each shot name to its hash, empty if there is no
+            manifest
+    """
+    try:
+        with open(filepath, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def plan_renders(output, size, previous):
+    """
+    Hash the inputs of every screenshot, and find which need taking again.
+
+    Args:
+        output: string path to the directory screenshots are saved in
+        size: tuple of two ints (width, height) of the screenshots
+        previous: dictionary mapping each shot name to its hash when it was
+            last taken
+
+    Returns:
+        Tuple of a dictionary mapping each shot name to its current hash, and
+            a list of (shot dictionary, string path to save it to) tuples of
+            the shots to take
+    """
+    event_data = assets.load_json(scene.EVENT_SCENES_FILEPATH)
+    map_data = assets.load_json(scene.MAP_SCENES_FILEPATH)
+    options = load_option_table(scene.EVENT_SCENES_FILEPATH)
+
+    digests = {}
+    common = hashlib.sha256(json.dumps(list(size)).encode())
+    for filepath in common_inputs(size):
+        common.update(_file_digest(filepath, digests).encode())
+    common = common.hexdigest()
+
+    manifest, todo = {}, []
+    for shot in plan_shots(event_data, map_data, options):
+        record, filepaths = shot_inputs(shot, event_data, map_data)
+        digest = shot_digest(shot, record, filepaths, common, digests)
+        manifest[shot["name"]] = digest
+        filepath = os.path.join(output, f"{shot['name']}.png")
+        if previous.get(shot["name"]) != digest or not os.path.exists(filepath):
+            todo.append((shot, filepath))
+    return manifest, todo
+
+
+def render_all(
+    output=DEFAULT_OUTPUT_DIRECTORY,
+    size=(scene.GLOBAL_WINDOW_WIDTH, scene.GLOBAL_WINDOW_HEIGHT),
+    jobs=None,
+    force=False,
+):
+    """
+    Take every screenshot whose inputs have changed since the last run, and
+    remove screenshots of scenes that no longer exist.
+
+    Args:
+        output: string path to the directory to save screenshots in
+        size: tuple of two ints (width, height) of the screenshots
+        jobs: integer number of worker processes, defaults to the number of
+            CPUs. With 1, screenshots are drawn in this process.
+        force: boolean, True to take every screenshot again
+
+    Returns:
+        Tuple of the list of string names of the shots taken and the integer
+            number of shots that were already up to date
+    """
+    os.makedirs(output, exist_ok=True)
+    manifest_filepath = os.path.join(output, MANIFEST_FILENAME)
+    previous = {} if force else _read_manifest(manifest_filepath)
+    manifest, todo = plan_renders(output, size, previous)
+
+    # Remove screenshots of scenes that have gone
+    for name in set(previous) - set(manifest):
+        filepath = os.path.join(output, f"{name}.png")
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+    jobs = jobs or os.cpu_count() or 1
+    taken = []
+    if todo and (jobs == 1 or len(todo) == 1):
+        start_renderer(size)
+        try:
+            taken = [_render_to_file(job) for job in todo]
+        finally:
+            pygame.quit()
+    elif todo:
+        with ProcessPoolExecutor(
+            jobs, initializer=start_renderer, initargs=(size,)
+        ) as pool:
+            taken = list(
+                pool.map(
+                    _render_to_file,
+                    todo,
+                    chunksize=max(1, len(todo) // (jobs * 4)),
+                )
+            )
+
+    # Only written once every screenshot is saved, so an interrupted run
+    # draws the rest next time
+    with open(manifest_filepath, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=4, sort_keys=True)
+    return taken, len(manifest) - len(taken)
+
+
+def main(argv=None):
+    """
+    Take screenshots from the command line.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        description="Render every scene of the game to PNG files."
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIRECTORY)
+    parser.add_argument(
+        "--size",
+        type=window_size,
+        default=(scene.GLOBAL_WINDOW_WIDTH, scene.GLOBAL_WINDOW_HEIGHT),
+        help="size of the screenshots as WIDTHxHEIGHT",
+    )
+    parser.add_argument(
+        "--jobs", type=int, help="number of worker processes to render with"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="render every scene, even if its inputs haven't changed",
+    )
+    args = parser.parse_args(argv)
+    taken, skipped = render_all(args.output, args.size, args.jobs, args.force)
+    print(
+        f"Rendered {len(taken)} scenes to {args.output} "
+        f"({skipped} unchanged)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Check that every scene still draws what it drew before, by comparing headless
+renders against stored golden images.
+
+Every scene the screenshot renderer takes (see screenshots.py) is drawn with
+the dummy video driver and compared with its golden image pixel by pixel. The
+comparison is vectorised with NumPy over the surfaces' pixel arrays, so a
+frame is compared in a few milliseconds. A pixel only counts as changed if one
+of its channels differs by more than a tolerance, so small differences in
+scaling between SDL builds don't fail the check, and a scene only fails if
+more than a small share of its pixels changed. For each failure the new render
+and a heatmap of the changed pixels are written out.
+
+Check the scenes with:
+    python snapshots.py
+and after an intended change to how scenes look, store new golden images with:
+    python snapshots.py --update
+The test suite runs the same check (see test_snapshots.py); setting the
+PBBQ_UPDATE_SNAPSHOTS environment variable makes it store new golden images
+instead.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pygame
+
+import assets
+import scene
+from options import load_option_table
+from screenshots import plan_shots, render_shot, start_renderer
+
+# Directory the golden images are stored in, and where the renders and
+# heatmaps of failing scenes are written
+GOLDEN_DIRECTORY = "golden_images"
+FAILURE_DIRECTORY = "snapshot_failures"
+
+# Environment variable that makes the tests store new golden images
+UPDATE_SNAPSHOTS_ENV = "PBBQ_UPDATE_SNAPSHOTS"
+
+# Size scenes are rendered and stored at
+SNAPSHOT_SIZE = (scene.GLOBAL_WINDOW_WIDTH, scene.GLOBAL_WINDOW_HEIGHT)
+
+# Largest difference in any color channel for a pixel to count as unchanged,
+# and the largest share of pixels that can change before a scene fails
+DEFAULT_TOLERANCE = 8
+DEFAULT_MAX_CHANGED = 0.001
+
+# How much the golden image is dimmed behind the changed pixels in heatmaps
+HEATMAP_BACKGROUND = 0.3
+
+
+def _pixel_bytes(surface, mask):
+    """
+    Read the color bytes of every pixel of a 32-bit surface.
+
+    Args:
+        surface: pygame Surface with 4 bytes per pixel
+        mask: integer bitmask of the color channels of a pixel, used to clear
+            the unused (or alpha) byte
+
+    Returns:
+        NumPy array of bytes with one row per row of pixels and 4 bytes per
+            pixel
+    """
+    # Transposing the surfarray view gives rows of pixels, laid out as they
+    # are in memory, so the masked copy can be read as bytes
+    return (pygame.surfarray.pixels2d(surface).T & mask).view(np.uint8)
+
+
+def compare_surfaces(actual, expected, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare two images pixel by pixel.
+
+    Rather than working out each channel's difference separately, the
+    difference of every byte of both images is found at once, and a pixel
+    changed if any of its 4 bytes differ by more than the tolerance.
+
+    Args:
+        actual: pygame Surface that was rendered, with 4 bytes per pixel
+        expected: pygame Surface it should match, of the same size
+        tolerance: integer largest difference in any color channel for a
+            pixel to count as unchanged
+
+    Returns:
+        Tuple of the float share of pixels that changed, and a NumPy array
+            indexed by (x, y, byte) of the difference of each byte of each
+            pixel (or None if the images are identical)
+
+    Raises:
+        ValueError: if the images aren't the same size
+    """
+    if actual.get_size() != expected.get_size():
+        raise ValueError(
+            f"rendered size {actual.get_size()} doesn't match "
+            f"{expected.get_size()}"
+        )
+    mask = np.uint32(sum(actual.get_masks()[:3]))
+    rendered = _pixel_bytes(actual, mask)
+    stored = _pixel_bytes(expected.convert(actual), mask)
+    if np.array_equal(rendered, stored):
+        return 0.0, None
+
+    diff = np.maximum(rendered, stored)
+    diff -= np.minimum(rendered, stored)
+
+    # Each pixel's 4 flags read as one integer are only zero if none of its
+    # bytes changed too much
+    changed = np.count_nonzero((diff > tolerance).view(np.uint32))
+    width, height = actual.get_size()
+    return changed / (width * height), diff.reshape(height, width, 4).transpose(
+        1, 0, 2
+    )
+
+
+def heatmap(expected, diff, tolerance=DEFAULT_TOLERANCE):
+    """
+    Draw where two images differ: changed pixels in red, brighter the more
+    they changed, over a dimmed grey copy of the expected image.
+
+    Args:
+        expected: pygame Surface of the expected image
+        diff: NumPy array of the difference of each byte of each pixel (see
+            compare_surfaces)
+        tolerance: integer largest difference for a pixel to count as
+            unchanged
+
+    Returns:
+        pygame Surface of the heatmap
+    """
+    grey = pygame.surfarray.array3d(expected).mean(axis=2) * HEATMAP_BACKGROUND
+    heat = np.repeat(grey[:, :, np.newaxis], 3, axis=2)
+    largest = diff.max(axis=2)
+    changed = largest > tolerance
+    heat[changed] = 0
+    heat[changed, 0] = 128 + largest[changed] / 2
+    return pygame.surfarray.make_surface(heat.astype(np.uint8))
+
+
+def check_snapshots(
+    golden=GOLDEN_DIRECTORY,
+    failures=FAILURE_DIRECTORY,
+    update=False,
+    tolerance=DEFAULT_TOLERANCE,
+    max_changed=DEFAULT_MAX_CHANGED,
+):
+    """
+    Render every scene and compare it with its golden image, or store the
+    renders as the new golden images.
+
+    Args:
+        golden: string path to the directory of golden images
+        failures: string path to the directory to write the renders and
+            heatmaps of failing scenes to
+        update: boolean, True to store every render as its golden image (and
+            remove golden images of scenes that no longer exist) rather than
+            comparing
+        tolerance: integer largest difference in any color channel for a
+            pixel to count as unchanged
+        max_changed: float largest share of pixels that can change before a
+            scene fails
+
+    Returns:
+        Dictionary mapping the name of each failing scene to a string
+            describing the failure, empty if every scene matched
+    """
+    shots = plan_shots(
+        assets.load_json(scene.EVENT_SCENES_FILEPATH),
+        assets.load_json(scene.MAP_SCENES_FILEPATH),
+        load_option_table(scene.EVENT_SCENES_FILEPATH),
+    )
+    if update:
+        os.makedirs(golden, exist_ok=True)
+        names = {f"{shot['name']}.png" for shot in shots}
+        for filename in os.listdir(golden):
+            if filename.endswith(".png") and filename not in names:
+                os.remove(os.path.join(golden, filename))
+
+    start_renderer(SNAPSHOT_SIZE)
+    surface = pygame.display.get_surface()
+    found = {}
+    try:
+        for shot in shots:
+            render_shot(shot, surface)
+            filepath = os.path.join(golden, f"{shot['name']}.png")
+            if update:
+                pygame.image.save(surface, filepath)
+                continue
+            reason, heat = compare_to_golden(
+                surface, filepath, tolerance, max_changed
+            )
+            if reason is not None:
+                found[shot["name"]] = reason
+                _write_failure(failures, shot["name"], surface, heat)
+    finally:
+        pygame.quit()
+    return found
+
+
+def compare_to_golden(
+    surface,
+    filepath,
+    tolerance=DEFAULT_TOLERANCE,
+    max_changed=DEFAULT_MAX_CHANGED,
+):
+    """
+    Compare a render with its golden image.
+
+    Args:
+        surface: pygame Surface of the render
+        filepath: string path to the golden image
+        tolerance: integer largest difference in any color channel for a
+            pixel to count as unchanged
+        max_changed: float largest share of pixels that can change before the
+            render fails
+
+    Returns:
+        Tuple of a string describing why the render failed (None if it
+            matched), and a pygame Surface of the heatmap of its changes (None
+            if it matched or couldn't be compared)
+    """
+    if not os.path.exists(filepath):
+        return "no golden image", None
+    expected = pygame.image.load(filepath)
+    try:
+        changed, diff = compare_surfaces(surface, expected, tolerance)
+    except ValueError as error:
+        return str(error), None
+    if changed > max_changed:
+        return (
+            f"{changed:.2%} of pixels changed",
+            heatmap(expected, diff, tolerance),
+        )
+    return None, None
+
+
+def _write_failure(failures, name, surface, heat=None):
+    """
+    Save the render of a failing scene, and the heatmap of its changes.
+
+    Args:
+        failures: string path to the directory to write to
+        name: string name of the scene
+        surface: pygame Surface of the render
+        heat: optional pygame Surface of the heatmap (see heatmap)
+    """
+    os.makedirs(failures, exist_ok=True)
+    pygame.image.save(surface, os.path.join(failures, f"{name}-actual.png"))
+    if heat is not None:
+        pygame.image.save(heat, os.path.join(failures, f"{name}-heatmap.png"))
+
+
+def main(argv=None):
+    """
+    Check or update the golden images from the command line.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+
+    Returns:
+        integer exit code, 1 if any scene failed and 0 otherwise
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare every scene against its golden image."
+    )
+    parser.add_argument("--golden", default=GOLDEN_DIRECTORY)
+    parser.add_argument("--failures", default=FAILURE_DIRECTORY)
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="store the renders as the new golden images",
+    )
+    parser.add_argument("--tolerance", type=int, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--max-changed", type=float, default=DEFAULT_MAX_CHANGED
+    )
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    found = check_snapshots(
+        args.golden,
+        args.failures,
+        args.update,
+        args.tolerance,
+        args.max_changed,
+    )
+    for name, reason in sorted(found.items()):
+        print(f"{name}: {reason}")
+    print(
+        f"Checked scenes in {time.perf_counter() - start:.2f} s, "
+        f"{len(found)} failed",
+        file=sys.stderr,
+    )
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
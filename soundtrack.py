@@ -0,0 +1,274 @@
+"""
+Synthesise the game's music and sound effects, so they can be rebuilt from
+this file rather than kept only as recordings.
+
+Every piece is a short chiptune: sequences of square, triangle and sawtooth
+notes, each shaped by an envelope that fades in and out so notes join without
+clicks. Music tracks last a whole number of bars and start and end on silence,
+so they loop seamlessly when the mixer repeats them.
+
+The pieces are saved as 16-bit mono WAV files next to the scenes that declare
+them in their "Music" and "Sound" columns (see audio.py). Rebuild them after
+changing this file with:
+```
+python soundtrack.py
+```
+"""
+
+import argparse
+import wave
+
+import numpy as np
+
+# Samples per second of every piece, and the loudest a piece is scaled to, as a
+# fraction of the largest 16-bit sample
+SAMPLE_RATE = 22050
+PEAK = 0.7
+
+# Time in seconds each note fades in and out over
+ATTACK_TIME = 0.005
+RELEASE_TIME = 0.02
+
+# MIDI note number of A4, and its frequency in Hz
+A4_NOTE = 69
+A4_FREQUENCY = 440
+
+# Where each piece is saved
+OLIN_NIGHT_FILEPATH = "data/event_data/olin_night.wav"
+PARCELB_WOODS_FILEPATH = "data/scene_data/parcelb_woods.wav"
+OLD_MAN_HERB_FILEPATH = "data/event_data/old_man_herb.wav"
+BEE_STING_FILEPATH = "data/event_data/bee_sting.wav"
+
+
+def note_frequency(note):
+    """
+    Find the frequency of a note.
+
+    Args:
+        note: integer MIDI note number (60 is middle C)
+
+    Returns:
+        float frequency in Hz
+    """
+    return A4_FREQUENCY * 2 ** ((note - A4_NOTE) / 12)
+
+
+def oscillate(frequencies, shape):
+    """
+    Generate a wave following a frequency that may change over time.
+
+    Args:
+        frequencies: NumPy array of the frequency in Hz at each sample
+        shape: string, "square", "triangle" or "sawtooth"
+
+    Returns:
+        NumPy array of floats from -1 to 1, one for each sample
+    """
+    # Accumulating the phase keeps the wave continuous while its pitch slides
+    phase = np.cumsum(frequencies / SAMPLE_RATE) % 1
+    if shape == "square":
+        return np.where(phase < 0.5, 1.0, -1.0)
+    if shape == "triangle":
+        return 4 * np.abs(phase - 0.5) - 1
+    return 2 * phase - 1
+
+
+def envelope(count, decay=0.0):
+    """
+    Shape the loudness of a note, fading it in and out so it starts and ends on
+    silence.
+
+    Args:
+        count: integer number of samples in the note
+        decay: float rate the note dies away at after it starts, 0 to hold it
+
+    Returns:
+        NumPy array of floats from 0 to 1, one for each sample
+    """
+    times = np.arange(count) / SAMPLE_RATE
+    shape = np.exp(-decay * times)
+    shape *= np.clip(times / ATTACK_TIME, 0, 1)
+    shape *= np.clip((count / SAMPLE_RATE - times) / RELEASE_TIME, 0, 1)
+    return shape
+
+
+def sequence(notes, beat, shape, decay=0.0):
+    """
+    Play a line of notes one after another.
+
+    Args:
+        notes: list of tuples of the integer MIDI note number (or None for a
+            rest) and float length in beats of each note
+        beat: float length of a beat in seconds
+        shape: string shape of the wave, as for oscillate
+        decay: float rate each note dies away at, as for envelope
+
+    Returns:
+        NumPy array of float samples
+    """
+    parts = []
+    for note, beats in notes:
+        count = round(beats * beat * SAMPLE_RATE)
+        if note is None:
+            parts.append(np.zeros(count))
+            continue
+        frequencies = np.full(count, note_frequency(note))
+        parts.append(oscillate(frequencies, shape) * envelope(count, decay))
+    return np.concatenate(parts)
+
+
+def mix(*voices):
+    """
+    Play voices together, scaling the result to the peak loudness.
+
+    Args:
+        *voices: tuples of a NumPy array of float samples and the float
+            volume to play it at
+
+    Returns:
+        NumPy array of float samples from -PEAK to PEAK, as long as the
+            longest voice
+    """
+    mixed = np.zeros(max(len(samples) for samples, _ in voices))
+    for samples, volume in voices:
+        mixed[: len(samples)] += samples * volume
+    return mixed * (PEAK / np.abs(mixed).max())
+
+
+def olin_night():
+    """
+    Compose the music of the campus at night: a slow, calm arpeggio over a
+    bass line, through C, A minor, F and G.
+
+    Returns:
+        NumPy array of float samples
+    """
+    chords = [(48, 60, 64, 67), (45, 57, 60, 64), (41, 57, 60, 65)]
+    chords.append((43, 55, 59, 62))
+    arpeggio = []
+    bass = []
+    for root, *triad in chords:
+        arpeggio += [
+            (note, 1) for note in triad + [triad[0] + 12] + triad[::-1]
+        ]
+        arpeggio.append((None, 1))
+        bass.append((root, 8))
+    return mix(
+        (sequence(arpeggio, 0.2, "triangle", decay=6), 1.0),
+        (sequence(bass, 0.2, "triangle", decay=0.5), 0.6),
+    )
+
+
+def parcelb_woods():
+    """
+    Compose the music of Parcel B: sparse plucks of a minor pentatonic scale
+    over a low drone, leaving plenty of silence.
+
+    Returns:
+        NumPy array of float samples
+    """
+    # One bar of eight beats to a line
+    plucks = (
+        [(69, 1), (None, 1), (72, 1), (76, 2), (None, 3)]
+        + [(74, 1), (72, 1), (None, 2), (67, 1), (69, 3)]
+        + [(64, 1), (None, 1), (67, 1), (69, 2), (None, 2), (72, 1)]
+        + [(74, 1), (None, 1), (76, 1), (74, 1), (69, 4)]
+    )
+    drone = [(45, 16), (40, 16)]
+    return mix(
+        (sequence(plucks, 0.2, "square", decay=9), 0.35),
+        (sequence(drone, 0.2, "triangle"), 0.5),
+    )
+
+
+def old_man_herb():
+    """
+    Compose the music of the fight with Old Man Herb: a fast, chromatic
+    ostinato in E minor over a pounding bass.
+
+    Returns:
+        NumPy array of float samples
+    """
+    ostinato = [64, 67, 66, 63] * 2 + [64, 67, 70, 69] * 2
+    ostinato = [(note, 1) for note in ostinato * 2]
+    bass = [(note, 2) for note in [40, 40, 40, 43, 40, 40, 46, 45] * 2]
+    return mix(
+        (sequence(ostinato, 0.15, "square", decay=8), 0.3),
+        (sequence(bass, 0.15, "triangle", decay=4), 1.0),
+    )
+
+
+def bee_sting():
+    """
+    Compose the bee sting: a buzz that swoops up to a sharp zip and dies
+    away.
+
+    Returns:
+        NumPy array of float samples
+    """
+    count = round(0.6 * SAMPLE_RATE)
+    times = np.arange(count) / SAMPLE_RATE
+    # Rise from a low buzz to the sting over the first 0.15 s, wobbling the
+    # pitch like a wingbeat throughout
+    frequencies = 220 + 680 * np.clip(times / 0.15, 0, 1) ** 2
+    frequencies *= 1 + 0.08 * np.sin(2 * np.pi * 35 * times)
+    return mix(
+        (oscillate(frequencies, "sawtooth") * envelope(count, decay=5), 1.0)
+    )
+
+
+# Every piece the game uses, keyed by where it is saved
+PIECES = {
+    OLIN_NIGHT_FILEPATH: olin_night,
+    PARCELB_WOODS_FILEPATH: parcelb_woods,
+    OLD_MAN_HERB_FILEPATH: old_man_herb,
+    BEE_STING_FILEPATH: bee_sting,
+}
+
+
+def to_frames(samples):
+    """
+    Convert float samples to the bytes of a 16-bit WAV file.
+
+    Args:
+        samples: NumPy array of float samples from -1 to 1
+
+    Returns:
+        bytes of little-endian 16-bit samples
+    """
+    return np.round(samples * 32767).astype("<i2").tobytes()
+
+
+def save_piece(samples, filepath):
+    """
+    Save a piece as a mono WAV file.
+
+    Args:
+        samples: NumPy array of float samples from -1 to 1
+        filepath: string path of the file to write
+    """
+    with wave.Wave_write(filepath) as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(SAMPLE_RATE)
+        file.writeframes(to_frames(samples))
+
+
+def main(argv=None):
+    """
+    Synthesise and save every piece the game uses.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        description="Synthesise the game's music and sound effects."
+    )
+    parser.parse_args(argv)
+    for filepath, compose in PIECES.items():
+        save_piece(compose(), filepath)
+        print(f"Saved {filepath}")
+
+
+if __name__ == "__main__":
+    main()
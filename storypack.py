@@ -0,0 +1,518 @@
+"""
+Generate large synthetic story packs (an events.json and a map.json) for
+benchmarking how the game scales far past the size of the shipped story.
+
+A pack is made of a map and event trees:
+- Map points are laid out on a grid over the map image. Every point is joined
+  to the point on its left or the point above it (so every point can be
+  reached from point 0), and some neighbouring points are joined as well,
+  making loops. Moves are allowed both ways along each join.
+- Events form trees of a few events each. The root of each tree is the special
+  event of a map point (tree 0 starts at map point 0, like the shipped story),
+  and each option either leads further into the tree, returns to the map, or
+  ends the game with a win or a death. Options add items, require items and
+  have their damage reduced by items (AddInventory, RequiresItem, ItemCheck),
+  and events reference the shipped images.
+
+Generation is seeded, so the same arguments always produce the same pack. Both
+files are written out one record at a time, so packs of a million map points
+and events can be generated without holding them in memory.
+
+Generate a pack with:
+    python storypack.py --nodes 100000 --output packs/100k
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+from itertools import accumulate
+
+from scene import NO_EVENT_ID
+
+# File names of the two halves of a pack
+EVENTS_FILENAME = "events.json"
+MAP_FILENAME = "map.json"
+
+# Size in pixels of the map image points are laid out on (map_final.png), and
+# the gap left around its edges
+MAP_SIZE = (2918, 1800)
+MAP_MARGIN = 50
+
+# Chance of joining two neighbouring map points beyond the joins needed to
+# reach every point
+LOOP_PROBABILITY = 0.15
+
+# Average number of events in each event tree
+MEAN_TREE_SIZE = 4
+
+# Relative chance of an event having each number of options (at most one per
+# event key)
+OPTION_COUNT_WEIGHTS = {2: 70, 3: 25, 4: 5}
+
+# Chance of an option leading further into its event tree, while the tree
+# still has events left to place
+CHILD_PROBABILITY = 0.5
+
+# Relative chance of each ending of an option that doesn't lead further into
+# its event tree
+ENDING_WEIGHTS = {"map": 90, "death": 7, "win": 3}
+
+# Damage done by options that end the game in a death, enough to always kill
+DEATH_DAMAGE = 100
+
+# Chances of an option doing damage or healing, an option adding (or
+# removing) an item, an option after the first requiring an item, and a
+# damaging option having its damage reduced by an item
+DAMAGE_PROBABILITY = 0.25
+HEAL_PROBABILITY = 0.05
+ADD_ITEM_PROBABILITY = 0.2
+REQUIRES_ITEM_PROBABILITY = 0.1
+ITEM_CHECK_PROBABILITY = 0.3
+
+# Default number of different items in a pack
+DEFAULT_ITEM_COUNT = 12
+
+# Images referenced by events, chosen from the shipped images ("" for none)
+BACKGROUND_IMAGES = (
+    "",
+    "data/event_data/olin_night.png",
+    "data/event_data/parcelb_woods.png",
+)
+PROMPT_IMAGES = (
+    "",
+    "data/event_data/bee_sprite.png",
+    "data/event_data/bee_swarm.png",
+    "data/event_data/oldmanherb.png",
+)
+
+# Words prompts, options and items are made from
+WORDS = (
+    "beetle bee pond trail moss log fern stump creek path lantern jacket "
+    "flashlight photo deadline forest night owl mushroom bridge rock branch "
+    "swarm cabin fog shadow footprint compass map rumor student field stream "
+    "acorn hollow thicket clearing ridge marsh vine"
+).split()
+
+# Range of the number of words in each prompt
+PROMPT_WORDS = (12, 40)
+
+
+def _literal(value):
+    """
+    Format a value in the way lists and tuples are stored as strings in the
+    data files, so they can be read back with literal_eval.
+
+    Args:
+        value: list, tuple, string, number or None
+
+    Returns:
+        string Python literal of the value
+    """
+    if isinstance(value, list):
+        return "[" + ", ".join(_literal(item) for item in value) + "]"
+    if isinstance(value, tuple):
+        return "(" + ", ".join(_literal(item) for item in value) + ")"
+    if isinstance(value, str):
+        return json.dumps(value)
+    return repr(value)
+
+
+def _phrase(rng, count):
+    """
+    Make a phrase of random words.
+
+    Args:
+        rng: random.Random generating the pack
+        count: integer number of words
+
+    Returns:
+        string of words separated by spaces
+    """
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def item_names(item_count):
+    """
+    Name every item in a pack.
+
+    Args:
+        item_count: integer number of items
+
+    Returns:
+        list of string item names, all different
+    """
+    return [
+        f"{WORDS[index % len(WORDS)].title()} {index // len(WORDS) + 1}"
+        for index in range(item_count)
+    ]
+
+
+def tree_sizes(event_count, tree_count, rng):
+    """
+    Split the events of a pack into event trees of random sizes.
+
+    Args:
+        event_count: integer number of events
+        tree_count: integer number of trees, at most event_count
+        rng: random.Random generating the pack
+
+    Returns:
+        list of integer tree sizes, each at least 1, adding up to event_count
+    """
+    cuts = sorted(rng.sample(range(1, event_count), tree_count - 1))
+    return [end - start for start, end in zip([0] + cuts, cuts + [event_count])]
+
+
+def _option(rng, items, index, child_id):
+    """
+    Make the columns of one option of an event.
+
+    Args:
+        rng: random.Random generating the pack
+        items: list of string item names
+        index: integer index of the option in its event
+        child_id: integer ID of the event the option leads to, or None if it
+            doesn't lead further into the event tree
+
+    Returns:
+        Dictionary mapping each per-option column name to the option's value
+    """
+    option = {
+        "TextOptions": _phrase(rng, rng.randint(1, 4)).capitalize(),
+        "OptionResultID": child_id,
+        "HealthChange": 0,
+        "AddInventory": None,
+        "GameEnd": None,
+        "ItemCheck": None,
+        # The first option is always shown, so no event is a dead end
+        "RequiresItem": (
+            rng.choice(items)
+            if index > 0 and items and rng.random() < REQUIRES_ITEM_PROBABILITY
+            else None
+        ),
+    }
+    ending = "map"
+    if child_id is None:
+        ending = rng.choices(
+            list(ENDING_WEIGHTS), weights=list(ENDING_WEIGHTS.values())
+        )[0]
+    if ending == "death":
+        option["HealthChange"] = DEATH_DAMAGE
+        option["GameEnd"] = (
+            f"The {_phrase(rng, 2)} gets you. YOU LOST. Try again."
+        )
+        return option
+    if ending == "win":
+        option["GameEnd"] = (
+            f"You photograph the click beetle by the {rng.choice(WORDS)}. "
+            "YOU WON!"
+        )
+        return option
+
+    if child_id is None:
+        option["OptionResultID"] = NO_EVENT_ID
+    roll = rng.random()
+    if roll < DAMAGE_PROBABILITY:
+        option["HealthChange"] = rng.randint(1, 4)
+        if items and rng.random() < ITEM_CHECK_PROBABILITY:
+            option["ItemCheck"] = (
+                rng.choice(items),
+                rng.randint(1, option["HealthChange"]),
+            )
+    elif roll < DAMAGE_PROBABILITY + HEAL_PROBABILITY:
+        option["HealthChange"] = -rng.randint(1, 3)
+    if items and rng.random() < ADD_ITEM_PROBABILITY:
+        option["AddInventory"] = rng.choice(items)
+    return option
+
+
+def _event(rng, items, event_id, child_ids):
+    """
+    Make one event.
+
+    Args:
+        rng: random.Random generating the pack
+        items: list of string item names
+        event_id: integer ID of the event
+        child_ids: list of integer IDs (or None) of the event each option
+            leads to, one per option
+
+    Returns:
+        event dictionary in the format stored in events.json
+    """
+    options = [
+        _option(rng, items, index, child_id)
+        for index, child_id in enumerate(child_ids)
+    ]
+    event = {
+        "ID": event_id,
+        "Name": f"event {event_id}",
+        "BackgroundImage": rng.choice(BACKGROUND_IMAGES),
+        "PromptImage": rng.choice(PROMPT_IMAGES),
+        "TextPrompt": (
+            _phrase(rng, rng.randint(*PROMPT_WORDS)).capitalize()
+            + ". What do you do?"
+        ),
+    }
+    for column in options[0]:
+        event[column] = _literal([option[column] for option in options])
+    return event
+
+
+def generate_events(sizes, items, rng):
+    """
+    Generate the events of a pack, one event tree at a time.
+
+    Args:
+        sizes: list of integer number of events in each event tree (see
+            tree_sizes)
+        items: list of string item names
+        rng: random.Random generating the pack
+
+    Yields:
+        event dictionaries in ID order, in the format stored in events.json
+    """
+    counts = list(OPTION_COUNT_WEIGHTS)
+    weights = list(OPTION_COUNT_WEIGHTS.values())
+    start = 0
+    for size in sizes:
+        end = start + size
+        # Events of a tree are numbered in the order they are reached, so
+        # each event's children are the next unplaced IDs
+        next_child = start + 1
+        for event_id in range(start, end):
+            count = rng.choices(counts, weights=weights)[0]
+            has_child = [
+                next_child + index < end and rng.random() < CHILD_PROBABILITY
+                for index in range(count)
+            ]
+            # Every event in the tree must be reached by an earlier one
+            if event_id + 1 == next_child < end and not any(has_child):
+                has_child[rng.randrange(count)] = True
+            child_ids = []
+            for child in has_child:
+                child_ids.append(next_child if child else None)
+                next_child += child
+            yield _event(rng, items, event_id, child_ids)
+        start = end
+
+
+def _grid_joins(row, columns, node_count, rng):
+    """
+    Decide which points in a row of the map grid are joined to the point on
+    their left and the point above them.
+
+    Args:
+        row: integer index of the row
+        columns: integer number of points in each row
+        node_count: integer number of map points
+        rng: random.Random generating the pack
+
+    Returns:
+        Tuple of two lists of booleans, one per point in the row, of whether
+            it is joined to the point on its left and to the point above it
+    """
+    left, up = [], []
+    for column in range(min(columns, node_count - row * columns)):
+        can_left, can_up = column > 0, row > 0
+        # Join each point to one earlier point, so every point can be reached
+        # from point 0, then add the other join now and again
+        if can_left and can_up:
+            tree_left = rng.random() < 0.5
+        else:
+            tree_left = can_left
+        left.append(can_left and (tree_left or rng.random() < LOOP_PROBABILITY))
+        up.append(can_up and (not tree_left or rng.random() < LOOP_PROBABILITY))
+    return left, up
+
+
+def _row_directions(row, columns, joins, below):
+    """
+    Find the moves allowed from each point in a row of the map grid.
+
+    Args:
+        row: integer index of the row
+        columns: integer number of points in each row
+        joins: tuple of the row's joins (see _grid_joins)
+        below: tuple of the next row's joins, or two empty lists for the last
+            row
+
+    Returns:
+        list of tuples (left, right, forward, down) of the integer ID of the
+            map point moved to in each direction, or None, one per point
+    """
+    left, up = joins
+    directions = []
+    for column, (to_left, to_up) in enumerate(zip(left, up)):
+        map_id = row * columns + column
+        to_right = column + 1 < len(left) and left[column + 1]
+        to_below = column < len(below[1]) and below[1][column]
+        directions.append(
+            (
+                map_id - 1 if to_left else None,
+                map_id + 1 if to_right else None,
+                map_id - columns if to_up else None,
+                map_id + columns if to_below else None,
+            )
+        )
+    return directions
+
+
+def generate_map(node_count, roots, rng):
+    """
+    Generate the map points of a pack, one row of the grid at a time.
+
+    Args:
+        node_count: integer number of map points
+        roots: list of integer IDs of the first event of each event tree
+        rng: random.Random generating the pack
+
+    Yields:
+        map point dictionaries in ID order, in the format stored in map.json
+    """
+    # Lay the grid out with about the same aspect ratio as the map image
+    width, height = MAP_SIZE
+    columns = max(
+        1, min(node_count, round(math.sqrt(node_count * width / height)))
+    )
+    rows = -(-node_count // columns)
+    spacing = (
+        (width - 2 * MAP_MARGIN) / max(1, columns - 1),
+        (height - 2 * MAP_MARGIN) / max(1, rows - 1),
+    )
+
+    # Tree 0 starts at the first map point, the rest at random map points
+    events = {0: roots[0]}
+    events.update(
+        zip(rng.sample(range(1, node_count), len(roots) - 1), roots[1:])
+    )
+
+    # Only the joins of the row being written and the row below it are kept
+    joins = _grid_joins(0, columns, node_count, rng)
+    for row in range(rows):
+        below = ([], [])
+        if row + 1 < rows:
+            below = _grid_joins(row + 1, columns, node_count, rng)
+        for column, directions in enumerate(
+            _row_directions(row, columns, joins, below)
+        ):
+            map_id = row * columns + column
+            # Points are moved off the grid a little, so it looks less regular
+            yield {
+                "ID": map_id,
+                "MapPointCenterWidth": round(
+                    MAP_MARGIN
+                    + (column + rng.uniform(-0.25, 0.25)) * spacing[0]
+                ),
+                "MapPointCenterHeight": round(
+                    MAP_MARGIN + (row + rng.uniform(-0.25, 0.25)) * spacing[1]
+                ),
+                "SpecialEvent": events.get(map_id, NO_EVENT_ID),
+                "DirectionsToMove": _literal(directions),
+            }
+        joins = below
+
+
+def write_records(filepath, records):
+    """
+    Write records to a JSON list one at a time, rather than building the
+    whole list in memory first.
+
+    Args:
+        filepath: string path to the file to write
+        records: iterable of dictionaries
+
+    Returns:
+        integer number of records written
+    """
+    count = 0
+    with open(filepath, "w", encoding="utf-8") as file:
+        file.write("[")
+        for count, record in enumerate(records, 1):
+            file.write(",\n " if count > 1 else "\n ")
+            json.dump(record, file)
+        file.write("\n]\n")
+    return count
+
+
+def write_pack(
+    directory,
+    node_count,
+    event_count=None,
+    seed=0,
+    item_count=DEFAULT_ITEM_COUNT,
+):
+    """
+    Generate a story pack and write it to a directory.
+
+    Args:
+        directory: string path to the directory to write the pack to, which
+            is created if needed
+        node_count: integer number of map points
+        event_count: optional integer number of events, defaults to the
+            number of map points
+        seed: integer or string seed, the same seed always giving the same
+            pack
+        item_count: integer number of different items
+
+    Returns:
+        Tuple of the string paths of the pack's events file and map file
+
+    Raises:
+        ValueError: if the pack would have no map points or events
+    """
+    if event_count is None:
+        event_count = node_count
+    if node_count < 1 or event_count < 1:
+        raise ValueError("A story pack needs at least one map point and event")
+
+    # The map and events are generated from separate streams, so changing
+    # the size of one doesn't change the other
+    event_rng = random.Random(f"{seed}:events")
+    map_rng = random.Random(f"{seed}:map")
+
+    tree_count = max(1, min(node_count, round(event_count / MEAN_TREE_SIZE)))
+    sizes = tree_sizes(event_count, tree_count, random.Random(f"{seed}:trees"))
+    roots = [0] + list(accumulate(sizes))[:-1]
+
+    os.makedirs(directory, exist_ok=True)
+    events_filepath = os.path.join(directory, EVENTS_FILENAME)
+    map_filepath = os.path.join(directory, MAP_FILENAME)
+    write_records(
+        events_filepath,
+        generate_events(sizes, item_names(item_count), event_rng),
+    )
+    write_records(map_filepath, generate_map(node_count, roots, map_rng))
+    return events_filepath, map_filepath
+
+
+def main(argv=None):
+    """
+    Generate a story pack from the command line.
+
+    Args:
+        argv: list of string command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic story pack for benchmarks."
+    )
+    parser.add_argument("--nodes", type=int, required=True)
+    parser.add_argument(
+        "--events",
+        type=int,
+        help="number of events, defaults to the number of map points",
+    )
+    parser.add_argument("--items", type=int, default=DEFAULT_ITEM_COUNT)
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--output", required=True, help="directory to write")
+    args = parser.parse_args(argv)
+    for filepath in write_pack(
+        args.output, args.nodes, args.events, args.seed, args.items
+    ):
+        print(f"Wrote {filepath}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Test that playthrough records are logged correctly and that logs are
+aggregated into the right choice counts and funnels.
+"""
+
+import gzip
+import json
+
+import analytics
+from scene import EVENT_SCENES_FILEPATH
+
+
+def load_event_data():
+    """
+    Load the game's event data for use in tests.
+
+    Returns:
+        list of event dictionaries
+    """
+    with open(EVENT_SCENES_FILEPATH, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def test_logger_writes_all_records(tmp_path):
+    """
+    Test that every record queued before the logger is closed is written to
+    the log, one JSON object per line.
+    """
+    log = tmp_path / "log.jsonl"
+    logger = analytics.PlaythroughLogger(str(log), session_id="session")
+
+    for index in range(analytics.BATCH_SIZE * 2 + 1):
+        logger.record(0, index % 2, 10, ["Jacket"])
+    logger.close()
+    # Records after closing are ignored
+    logger.record(0, 0, 10, [])
+    logger.close()
+
+    records = [json.loads(line) for line in log.read_text().splitlines()]
+
+    assert len(records) == analytics.BATCH_SIZE * 2 + 1
+    assert records[0]["session"] == "session"
+    assert records[0]["inventory"] == ["Jacket"]
+    assert records[1]["option"] == 1
+
+
+def test_aggregate_counts_choices_and_sessions():
+    """
+    Test that choices are counted per option and that a session visiting an
+    event more than once is only counted once in the funnel.
+    """
+    records = [
+        {"session": "a", "event": 0, "option": 0},
+        {"session": "a", "event": 1, "option": 1},
+        {"session": "a", "event": 0, "option": 0},
+        {"session": "b", "event": 0, "option": 1},
+    ]
+
+    report = analytics.aggregate(records, load_event_data())
+
+    assert report["sessions"] == 2
+    assert report["decisions"] == 4
+    assert report["events"]["0"]["sessions"] == 2
+    assert report["events"]["0"]["choices"] == {
+        "Go into Parcel B": 2,
+        "Find a photo online": 1,
+    }
+    assert report["events"]["1"]["share"] == {"Flashlight": 1.0}
+    assert report["events"]["2"]["sessions"] == 0
+
+
+def test_read_records_streams_gzip_and_skips_bad_lines(tmp_path):
+    """
+    Test that gzipped logs can be read and that a line cut short is skipped.
+    """
+    log = tmp_path / "log.jsonl.gz"
+    with gzip.open(log, "wt", encoding="utf-8") as file:
+        file.write('{"session": "a", "event": 0, "option": 0}\n')
+        file.write('{"session": "a", "eve')
+
+    records = list(analytics.read_records([str(log)]))
+
+    assert records == [{"session": "a", "event": 0, "option": 0}]
@@ -0,0 +1,132 @@
+"""
+Test that low-memory mode palettises large backgrounds, that decoded images
+are held to the memory budget, and that evicting text is exact.
+
+NOTE: THESE UNIT TESTS RELY ON BEING ABLE TO CREATE A PYGAME WINDOW
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+import pytest
+
+import assets
+from scene import (
+    FONT_FILEPATH,
+    MAP_BACKGROUND_FILEPATH,
+    SMALL_FONT_SIZE,
+    WHITE,
+    split_lines,
+)
+
+# Images of different sizes used by the game
+EVENT_BACKGROUND_FILEPATH = "data/event_data/olin_night.png"
+SPRITE_FILEPATH = "data/event_data/oldmanherb.png"
+
+
+@pytest.fixture(name="window")
+def fixture_window():
+    """
+    Open a window to convert images for, and put the memory settings back
+    after each test.
+
+    Yields:
+        pygame Surface of the window
+    """
+    pygame.init()
+    assets.clear_cache()
+    yield pygame.display.set_mode((800, 500))
+    assets.configure_memory()
+    pygame.quit()
+
+
+def test_low_memory_palettises_backgrounds(window):
+    """
+    Test that large opaque images are palettised in low-memory mode, taking
+    up a quarter of the memory, while small or transparent images aren't.
+    """
+    full = assets.surface_bytes(assets.load_image(EVENT_BACKGROUND_FILEPATH))
+    assets.clear_cache()
+
+    assets.configure_memory(low_memory=True)
+    background = assets.load_image(EVENT_BACKGROUND_FILEPATH)
+    assert background.get_bitsize() == 8
+    assert assets.surface_bytes(background) * 4 <= full
+    assert assets.load_image(SPRITE_FILEPATH).get_flags() & pygame.SRCALPHA
+
+    # Palettised images can still be scaled and drawn
+    scaled = assets.load_scaled_image(EVENT_BACKGROUND_FILEPATH, 0.5)
+    assert scaled.get_size() == (504, 360)
+    window.blit(background, (0, 0))
+    assert assets.surface_memory()["scaled"] == assets.surface_bytes(scaled)
+
+
+def test_budget_forgets_least_recently_used(window):
+    """
+    Test that once images take up more than the budget, the least recently
+    used are forgotten, and the image being used is always kept.
+    """
+    del window
+    background = assets.load_image(EVENT_BACKGROUND_FILEPATH)
+    sprite = assets.load_image(SPRITE_FILEPATH)
+    assets.load_image(EVENT_BACKGROUND_FILEPATH)
+    usage = assets.surface_memory()
+    assert usage["images"] == assets.surface_bytes(
+        background
+    ) + assets.surface_bytes(sprite)
+    assert usage["total"] >= usage["images"]
+
+    # The sprite was used least recently, so it is forgotten first
+    assets.configure_memory(budget=assets.surface_bytes(background))
+    assert assets.is_image_cached(EVENT_BACKGROUND_FILEPATH)
+    assert not assets.is_image_cached(SPRITE_FILEPATH)
+
+    # An image bigger than the whole budget is still kept while it is used
+    assets.load_image(MAP_BACKGROUND_FILEPATH)
+    assert assets.is_image_cached(MAP_BACKGROUND_FILEPATH)
+    assert not assets.is_image_cached(EVENT_BACKGROUND_FILEPATH)
+
+
+def test_evict_text_only_forgets_exact_lines(window):
+    """
+    Test that evicting the lines of an edited prompt keeps short strings the
+    prompt happens to contain, such as the inventory heading.
+    """
+    del window
+    prompt = "Check your Inventory: it holds nothing but lint and regret today"
+
+    def render(text):
+        """
+        Render text in the game's small font.
+
+        Args:
+            text: string of text
+
+        Returns:
+            pygame Surface of the rendered text
+        """
+        return assets.render_text(FONT_FILEPATH, SMALL_FONT_SIZE, text, WHITE)
+
+    heading = render("Inventory:")
+    lines = [render(line) for line in split_lines(prompt)]
+
+    assets.evict_text(split_lines(prompt))
+    assert render("Inventory:") is heading
+    assert render(split_lines(prompt)[0]) is not lines[0]
+
+
+def test_budget_keeps_prefetched_images(window):
+    """
+    Test that images prefetched for the next scene are kept within the budget,
+    forgetting images drawn earlier instead.
+    """
+    del window
+    background = assets.load_image(EVENT_BACKGROUND_FILEPATH)
+    assets.configure_memory(budget=assets.surface_bytes(background))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assets.prefetch_image(SPRITE_FILEPATH, executor)
+    assets.collect_prefetched()
+
+    assert assets.is_image_cached(SPRITE_FILEPATH)
+    assert not assets.is_image_cached(EVENT_BACKGROUND_FILEPATH)
@@ -0,0 +1,162 @@
+"""
+Test that music and sound effects are only played when audio is wanted, and
+that decoded effects are cached within their bound.
+
+The mixer is started with SDL's dummy audio driver, so these tests don't need
+an audio device.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import wave
+import zipfile
+
+import pygame
+import pytest
+
+import assets
+import audio
+import bundle
+
+
+def write_sound(filepath, frames=4410):
+    """
+    Write a short silent WAV file.
+
+    Args:
+        filepath: path of the file to write
+        frames: integer number of samples in the file
+
+    Returns:
+        string path of the file written
+    """
+    with wave.Wave_write(str(filepath)) as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(22050)
+        file.writeframes(bytes(frames * 2))
+    return str(filepath)
+
+
+@pytest.fixture(name="mixer")
+def fixture_mixer(monkeypatch):
+    """
+    Start audio with the dummy audio driver, as if a window were open.
+
+    Args:
+        monkeypatch: pytest MonkeyPatch used to pick the audio driver and
+            pretend there is a display
+
+    Yields:
+        boolean, True once audio has started
+    """
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    monkeypatch.setattr(audio, "is_headless", lambda: False)
+    try:
+        started = audio.start_audio()
+    except NotImplementedError:
+        started = False
+    if not started:
+        pytest.skip("the mixer isn't available")
+    yield started
+    pygame.quit()
+
+
+@pytest.mark.parametrize("driver", ["dummy", "offscreen"])
+def test_audio_is_disabled_headless(driver, monkeypatch, tmp_path):
+    """
+    Test that running without a display stops the mixer, under either
+    headless video driver, and that scenes declaring audio are then shown
+    silently.
+    """
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    monkeypatch.setenv("SDL_VIDEODRIVER", driver)
+    pygame.init()
+    pygame.display.set_mode((8, 8))
+
+    assert not audio.start_audio()
+    assert not audio.audio_enabled()
+    assert not pygame.mixer.get_init()
+
+    # Nothing is loaded, so even missing files don't matter
+    audio.play_event_audio(
+        {"Music": str(tmp_path / "missing.ogg"), "Sound": "missing.wav"}
+    )
+    pygame.quit()
+
+
+def test_music_carries_on_until_another_track(mixer, tmp_path):
+    """
+    Test that a map point's music keeps playing through scenes that don't
+    name a track, and that an event's effect is played over it.
+    """
+    assert mixer
+    music = write_sound(tmp_path / "woods.wav", frames=22050)
+    sting = write_sound(tmp_path / "sting.wav")
+
+    audio.play_map_audio({"Music": music})
+    assert pygame.mixer.music.get_busy()
+    position = pygame.mixer.music.get_pos()
+
+    audio.play_map_audio({})
+    audio.play_event_audio({"Sound": sting})
+    audio.play_map_audio({"Music": music})
+    assert pygame.mixer.music.get_pos() >= position
+    assert pygame.mixer.get_busy()
+
+
+def test_sound_cache_is_bounded(mixer, monkeypatch, tmp_path):
+    """
+    Test that effects are decoded once, that the least recently played effect
+    is forgotten beyond the cache size, and that prefetched effects are
+    collected into the cache.
+    """
+    assert mixer
+    monkeypatch.setattr(assets, "SOUND_CACHE_SIZE", 2)
+    sounds = [write_sound(tmp_path / f"{index}.wav") for index in range(4)]
+
+    first = assets.load_sound(sounds[0])
+    assets.load_sound(sounds[1])
+    assert assets.load_sound(sounds[0]) is first
+    assets.load_sound(sounds[2])
+    assert assets.load_sound(sounds[0]) is first
+    # pylint: disable-next=protected-access
+    assert sounds[1] not in assets._sound_cache
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assets.prefetch_sound(sounds[3], executor)
+    assets.collect_prefetched()
+    # pylint: disable-next=protected-access
+    assert list(assets._sound_cache) == [sounds[0], sounds[3]]
+
+
+def test_music_streams_from_bundle(mixer, monkeypatch, tmp_path):
+    """
+    Test that a track in a mounted bundle is stored uncompressed and streamed
+    straight out of it, rather than read into memory whole.
+    """
+    assert mixer
+    (tmp_path / "music").mkdir()
+    write_sound(tmp_path / "music" / "woods.wav", frames=22050)
+    filepath = str(tmp_path / "story.bundle")
+    bundle.build_bundle(filepath, str(tmp_path / "music"))
+    with zipfile.ZipFile(filepath) as archive:
+        info = archive.getinfo("music/woods.wav")
+        assert info.compress_type == zipfile.ZIP_STORED
+
+    def read_whole(asset):
+        """
+        Fail the test if an asset is read out of the bundle whole.
+
+        Args:
+            asset: string path to the asset
+        """
+        pytest.fail(f"{asset} was read whole")
+
+    mounted = bundle.mount_bundle(filepath)
+    try:
+        monkeypatch.setattr(mounted, "read", read_whole)
+        audio.play_music("music/woods.wav")
+        assert pygame.mixer.music.get_busy()
+    finally:
+        pygame.mixer.music.unload()
+        bundle.unmount_bundle()
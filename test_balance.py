@@ -0,0 +1,115 @@
+"""
+Test that the exact balance analysis follows the game's rules and gives the
+right ending probabilities.
+"""
+
+import pytest
+
+import assets
+from balance import BalanceAnalyser
+from scene import EVENT_SCENES_FILEPATH
+
+
+def make_event(event_id, results, health, **columns):
+    """
+    Create an event dictionary in the format stored in events.json.
+
+    Args:
+        event_id: integer ID of the event
+        results: list of next event IDs, one per option
+        health: list of integer health changes, one per option
+        **columns: lists of values for any other event columns, one per
+            option, defaulting to None for every option
+
+    Returns:
+        event dictionary
+    """
+    count = len(results)
+    event = {
+        "ID": event_id,
+        "TextOptions": repr([f"Option {index}" for index in range(count)]),
+        "OptionResultID": repr(results),
+        "HealthChange": repr(health),
+    }
+    for key in ("AddInventory", "GameEnd", "ItemCheck", "RequiresItem"):
+        event[key] = repr(columns.get(key, [None] * count))
+    return event
+
+
+def test_game_events_without_map():
+    """
+    Test the analysis of events from the game with a known outcome, where the
+    end of the event tree counts as an exit.
+    """
+    analyser = BalanceAnalyser(assets.load_json(EVENT_SCENES_FILEPATH))
+    report = analyser.analyse_events([2, 23])
+
+    # Event 2 either kills the player outright or returns them to the map
+    assert report[2]["death"] == pytest.approx(0.5)
+    assert report[2]["exit"] == pytest.approx(0.5)
+    assert report[2]["expected_health"] == pytest.approx(5)
+    assert report[2]["expected_steps"] == pytest.approx(1)
+    # Event 23 is the final choice between winning and dying
+    assert report[23]["win"] == pytest.approx(0.5)
+    assert report[23]["death"] == pytest.approx(0.5)
+
+
+def test_third_option_needs_flashlight_and_item_checks():
+    """
+    Test that the third option is only chosen once the flashlight is held,
+    and that an item check reduces the damage done.
+    """
+    events = [
+        # Choose whether to pick up the flashlight, or take a Jacket
+        make_event(0, [1, 1], [0, 0], AddInventory=["Flashlight", "Jacket"]),
+        # Two deadly options, the second softened by the Jacket, and a
+        # hidden winning option
+        make_event(
+            1,
+            [None, None, None],
+            [10, 10, 0],
+            GameEnd=["Dead", None, "Won"],
+            ItemCheck=[None, ("Jacket", 10), None],
+            RequiresItem=[None, None, "Flashlight"],
+        ),
+    ]
+    report = BalanceAnalyser(events).analyse_events([0, 1])
+
+    # With the flashlight, a third of choices win. With the jacket the second
+    # option does no damage, and with no result the game can't continue.
+    assert report[0]["win"] == pytest.approx(1 / 6)
+    assert report[0]["death"] == pytest.approx(1 / 3 + 1 / 4)
+    assert report[0]["invalid"] == pytest.approx(1 / 4)
+    # Without anything in the inventory, the third option is hidden
+    assert report[1]["win"] == 0
+    assert report[1]["death"] == pytest.approx(1)
+
+
+def test_weighted_policy_and_map():
+    """
+    Test that option weights change the policy, and that returning to the
+    map leads to the event at the next map point.
+    """
+    events = [
+        make_event(0, [-100, None], [1, 10], GameEnd=[None, "Dead"]),
+        make_event(1, [None], [0], GameEnd=["Won"]),
+    ]
+    map_data = [
+        {
+            "ID": 0,
+            "SpecialEvent": 0,
+            "DirectionsToMove": "(None, 1, None, None)",
+        },
+        {
+            "ID": 1,
+            "SpecialEvent": 1,
+            "DirectionsToMove": "(0, None, None, None)",
+        },
+    ]
+    analyser = BalanceAnalyser(events, map_data, weights={0: [3, 1]})
+    report = analyser.analyse_map([0])
+
+    assert report[0]["win"] == pytest.approx(0.75)
+    assert report[0]["death"] == pytest.approx(0.25)
+    assert report[0]["expected_health"] == pytest.approx(0.75 * 9)
+    assert report[0]["expected_steps"] == pytest.approx(0.75 * 3 + 0.25)
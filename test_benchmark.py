@@ -0,0 +1,64 @@
+"""
+Test the statistics and baseline comparison used by the render benchmark suite.
+
+NOTE: THE SMOKE TEST RELIES ON BEING ABLE TO CREATE A PYGAME WINDOW
+"""
+
+import benchmark
+
+
+def test_percentile_interpolates():
+    """
+    Test that percentiles between two samples are linearly interpolated, and
+    that the end percentiles return the smallest and largest samples.
+    """
+    samples = [4, 1, 3, 2]
+
+    assert benchmark.percentile(samples, 0) == 1
+    assert benchmark.percentile(samples, 1) == 4
+    assert benchmark.percentile(samples, 0.5) == 2.5
+
+
+def test_compare_finds_regression():
+    """
+    Test that a benchmark slower than the baseline by more than the tolerance
+    is reported, while one within the tolerance is not.
+    """
+    baseline = {
+        "slow": {"p50_ms": 1.0, "p99_ms": 2.0},
+        "fine": {"p50_ms": 1.0, "p99_ms": 2.0},
+    }
+    results = {
+        "slow": {"p50_ms": 1.5, "p99_ms": 2.0},
+        "fine": {"p50_ms": 1.1, "p99_ms": 2.1},
+    }
+
+    regressions = benchmark.compare_to_baseline(results, baseline, 0.25)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("slow p50_ms")
+
+
+def test_compare_ignores_new_benchmarks():
+    """
+    Test that benchmarks missing from the baseline are not regressions.
+    """
+    results = {"new": {"p50_ms": 100.0, "p99_ms": 100.0}}
+
+    assert not benchmark.compare_to_baseline(results, {})
+
+
+def test_suite_covers_every_scene():
+    """
+    Run the whole suite once and check that every map node and every event has
+    a benchmark with all metrics reported.
+    """
+    results = benchmark.run_suite(iterations=1, warmup=0)
+
+    assert "map_draw[0]" in results
+    assert "event_draw[0]" in results
+    assert "death_scene" in results
+    assert "win_scene" in results
+    for result in results.values():
+        assert result["p99_ms"] >= result["p50_ms"] >= 0
+        assert result["peak_alloc_bytes"] >= 0
@@ -0,0 +1,85 @@
+"""
+Test that assets are read out of a bundle without the data folder, and only
+when they are first needed.
+
+NOTE: THESE UNIT TESTS RELY ON BEING ABLE TO CREATE A PYGAME WINDOW
+"""
+
+import os
+
+import pygame
+import pytest
+
+import assets
+import bundle
+from instrumentation import METRICS
+from scene import EVENT_SCENES_FILEPATH, FONT_FILEPATH, MAP_BACKGROUND_FILEPATH
+
+
+@pytest.fixture(name="bundle_filepath")
+def fixture_bundle_filepath(tmp_path):
+    """
+    Pack the game's assets into a bundle, and make sure it is unmounted after
+    each test.
+
+    Yields:
+        string absolute path to the bundle file
+    """
+    filepath = str(tmp_path / "story.bundle")
+    bundle.build_bundle(filepath)
+    yield filepath
+    bundle.unmount_bundle()
+    assets.clear_cache()
+
+
+def test_bundle_index(bundle_filepath):
+    """
+    Test that a bundle holds every asset under the paths the game uses, and
+    nothing else.
+    """
+    mounted = bundle.mount_bundle(bundle_filepath)
+    assert mounted is bundle.mounted_bundle()
+    assert EVENT_SCENES_FILEPATH in mounted
+    assert "./" + MAP_BACKGROUND_FILEPATH in mounted
+    assert FONT_FILEPATH in mounted
+    assert not any(name.endswith("Zone.Identifier") for name in mounted.names())
+    with open(MAP_BACKGROUND_FILEPATH, "rb") as image:
+        assert mounted.read(MAP_BACKGROUND_FILEPATH) == image.read()
+
+    bundle.unmount_bundle()
+    assert bundle.mounted_bundle() is None
+
+
+def test_assets_load_from_bundle(bundle_filepath, tmp_path, monkeypatch):
+    """
+    Test that data, images and text load from a mounted bundle when the data
+    folder isn't in the working directory, reading each asset only once.
+    """
+    bundle.mount_bundle(bundle_filepath)
+    monkeypatch.chdir(tmp_path)
+    assert not os.path.exists(EVENT_SCENES_FILEPATH)
+    assets.clear_cache()
+    METRICS.reset()
+    METRICS.enabled = True
+    try:
+        pygame.init()
+        pygame.display.set_mode((64, 48))
+
+        assert assets.load_json(EVENT_SCENES_FILEPATH)[0]["ID"] == 0
+        image = assets.load_image(MAP_BACKGROUND_FILEPATH)
+        assert image.get_size() == (2918, 1800)
+        assert assets.load_image(MAP_BACKGROUND_FILEPATH) is image
+        assert assets.render_text(FONT_FILEPATH, 20, "Health", (255, 0, 0))
+        assert METRICS.counter("bundle_reads") == 4
+
+        # Text at a size that isn't pre-baked needs the font itself
+        assert assets.render_text(FONT_FILEPATH, 31, "Health", (255, 0, 0))
+    finally:
+        METRICS.enabled = False
+        METRICS.reset()
+        pygame.quit()
+
+    # Without the bundle, nothing can be found
+    bundle.unmount_bundle()
+    with pytest.raises(FileNotFoundError):
+        assets.load_json(EVENT_SCENES_FILEPATH)
@@ -0,0 +1,79 @@
+"""
+Test that the map camera pans between map points on a fixed timestep and can
+be skipped.
+
+NOTE: THESE UNIT TESTS RELY ON BEING ABLE TO CREATE A PYGAME WINDOW
+"""
+
+import pygame
+
+import camera
+import character
+import scene
+
+
+def create_map_scene():
+    """
+    Open a window and create a map scene drawing onto it.
+
+    Returns:
+        MapScene object
+    """
+    pygame.init()
+    surface = pygame.display.set_mode(
+        (scene.GLOBAL_WINDOW_WIDTH, scene.GLOBAL_WINDOW_HEIGHT)
+    )
+    player = character.PlayerCharacter("data/sprite_data/resting.png", 10)
+    return scene.MapScene(surface, player)
+
+
+def test_pan_moves_from_start_to_end():
+    """
+    Test that the camera starts and ends at the given points, moving steadily
+    towards the end in between.
+    """
+    pan = camera.CameraPan((0, 0), (100, 50), steps=4)
+    assert pan.center() == (0, 0)
+    last = 0
+    while not pan.done:
+        pan.update()
+        assert pan.center()[0] > last
+        last = pan.center()[0]
+    assert pan.center() == (100, 50)
+    # Further updates don't move past the end
+    pan.update()
+    assert pan.center(0.5) == (100, 50)
+
+
+def test_run_pan_draws_frames():
+    """
+    Test that a pan draws frames centred between the two map points and
+    leaves the map scene at the new point.
+    """
+    map_scene = create_map_scene()
+    map_scene.draw(4)
+    pygame.event.clear()
+
+    frame_times = camera.run_pan(map_scene, 5, steps=3)
+    assert frame_times
+    assert map_scene.location_id == 5
+    # Panning to the point already shown draws nothing
+    assert not camera.run_pan(map_scene, 5)
+
+    pygame.quit()
+
+
+def test_keypress_skips_pan():
+    """
+    Test that a key press skips the pan without being taken out of the event
+    queue, so it still counts as the player's next move.
+    """
+    map_scene = create_map_scene()
+    map_scene.draw(4)
+    pygame.event.clear()
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_UP))
+
+    assert not camera.run_pan(map_scene, 5)
+    assert pygame.event.peek(pygame.KEYDOWN)
+
+    pygame.quit()
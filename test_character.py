@@ -125,3 +125,20 @@ def test_inventory_is_string():
 
     for item in player.inventory:
         assert isinstance(item, str)
+
+
+def test_inventory_revision():
+    """
+    Test that the inventory revision only changes when items are added or
+    removed.
+    """
+    # The sprite path is not used in this test, so it can be set to a null value
+    player = PlayerCharacter("sprite_path", DEFAULT_PLAYER_HEALTH)
+    revision = player.inventory_revision
+
+    player.update_health(1)
+    assert player.inventory_revision == revision
+
+    player.update_inventory("item1")
+    player.update_inventory("item1")
+    assert player.inventory_revision == revision + 2
@@ -0,0 +1,110 @@
+"""
+Test that conditions and effects are parsed and compiled correctly, and that
+invalid expressions are rejected when they are loaded.
+"""
+
+import pytest
+
+from expressions import (
+    compile_condition,
+    compile_effect,
+    parse_condition,
+    parse_effect,
+    referenced_items,
+    uses_health,
+)
+
+# Bits used for items in these tests
+ITEM_BITS = {"Flashlight": 1, "Jacket": 2, "Old Rock": 4}
+
+
+def condition(source):
+    """
+    Parse and compile a condition using the test item bits.
+
+    Args:
+        source: string condition
+
+    Returns:
+        compiled condition function
+    """
+    return compile_condition(parse_condition(source), ITEM_BITS.get)
+
+
+def effect(source):
+    """
+    Parse and compile an effect using the test item bits.
+
+    Args:
+        source: string effect
+
+    Returns:
+        compiled effect function
+    """
+    return compile_effect(parse_effect(source), ITEM_BITS.get)
+
+
+def test_conditions():
+    """
+    Test that items, health comparisons and boolean operators are evaluated
+    with the right precedence.
+    """
+    has_flashlight = condition("has Flashlight and health > 3")
+    assert has_flashlight(4, 1)
+    assert not has_flashlight(3, 1)
+    assert not has_flashlight(10, 2)
+
+    # "and" binds more tightly than "or"
+    either = condition('has Jacket or has Flashlight and not has "Old Rock"')
+    assert either(10, 2 | 4)
+    assert not either(10, 1 | 4)
+    assert condition("not (has Jacket or false)")(10, 1)
+    assert condition("health == 10")(10, 0)
+
+
+def test_effects_fold_in_order():
+    """
+    Test that effect statements are applied in order, including statements
+    that override earlier ones.
+    """
+    assert effect("health -= 2; add Jacket")(10, 1) == (8, 3)
+    assert effect("toggle Flashlight; toggle Jacket")(10, 1) == (10, 2)
+    assert effect("add Jacket; remove Jacket")(10, 2) == (10, 0)
+    assert effect("remove Jacket; add Jacket")(10, 0) == (10, 2)
+    assert effect("health += 5; health = 1; health += 2")(10, 0) == (3, 0)
+    assert effect("")(10, 7) == (10, 7)
+
+
+def test_referenced_items_and_health():
+    """
+    Test that the items an expression uses are found, so they can be given
+    inventory bits before compiling.
+    """
+    tree = parse_condition('has Jacket or (has "Old Rock" and health < 2)')
+    assert referenced_items(tree) == {"Jacket", "Old Rock"}
+    assert uses_health(tree)
+    assert not uses_health(parse_condition("has Jacket"))
+    assert referenced_items(parse_effect("add Stick; health -= 1")) == {"Stick"}
+
+
+@pytest.mark.parametrize(
+    "source",
+    ["has", "health >", "health ~ 3", "has Jacket and", "(has Jacket", "?"],
+)
+def test_invalid_conditions(source):
+    """
+    Test that invalid conditions are rejected.
+    """
+    with pytest.raises(ValueError):
+        parse_condition(source)
+
+
+@pytest.mark.parametrize(
+    "source", ["health *= 2", "drop Jacket", "add", "add Jacket remove Stick"]
+)
+def test_invalid_effects(source):
+    """
+    Test that invalid effects are rejected.
+    """
+    with pytest.raises(ValueError):
+        parse_effect(source)
@@ -0,0 +1,91 @@
+"""
+Test that text drawn from the pre-baked font atlases matches text rasterised
+by the font module, without needing the font module.
+"""
+
+import pygame
+
+import assets
+import fontatlas
+from scene import EVENT_SCENES_FILEPATH, FONT_FILEPATH, SMALL_FONT_SIZE
+
+# Color the test strings are drawn in
+COLOR = (255, 0, 0)
+
+
+def count_differences(expected, actual):
+    """
+    Count the visible pixels that differ between two rendered strings.
+
+    Args:
+        expected: pygame Surface rendered by the font module
+        actual: pygame Surface rendered from an atlas
+
+    Returns:
+        integer number of differing pixels, or None if the sizes differ
+    """
+    if expected.get_size() != actual.get_size():
+        return None
+    differences = 0
+    for x in range(expected.get_width()):
+        for y in range(expected.get_height()):
+            old, new = expected.get_at((x, y)), actual.get_at((x, y))
+            if (old.a or new.a) and old != new:
+                differences += 1
+    return differences
+
+
+def test_atlas_matches_font():
+    """
+    Test that the game's text drawn from the pre-baked atlas is identical to
+    the font module's rendering.
+    """
+    pygame.font.init()
+    font = pygame.font.Font(FONT_FILEPATH, SMALL_FONT_SIZE)
+    atlas = fontatlas.load_atlas(FONT_FILEPATH, SMALL_FONT_SIZE)
+    strings = ["Health: 10", "Inventory:", "Choose a direction to go: "] + [
+        event["TextPrompt"][:60]
+        for event in assets.load_json(EVENT_SCENES_FILEPATH)
+    ]
+    for text in strings:
+        expected = font.render(text, True, COLOR)
+        assert count_differences(expected, atlas.render(text, COLOR)) == 0
+        assert atlas.size(text) == font.size(text)
+    pygame.font.quit()
+
+
+def test_prebaked_atlas_needs_no_font_module():
+    """
+    Test that new strings are drawn from the pre-baked atlas without starting
+    the font module, and that characters outside it still render.
+    """
+    pygame.font.quit()
+    atlas = fontatlas.load_atlas(FONT_FILEPATH, SMALL_FONT_SIZE)
+    surface = atlas.render("A brand new item #42", COLOR)
+    assert surface.get_width() > 0
+    assert not pygame.font.get_init()
+
+    # Characters outside the atlas are rasterised once when first drawn
+    assert atlas.render("café", COLOR).get_width() > atlas.size("caf")[0]
+    pygame.font.quit()
+
+
+def test_saved_atlas_matches_built(tmp_path):
+    """
+    Test that saving and loading an atlas keeps every glyph's metrics.
+    """
+    font_filepath = str(tmp_path / "pixel.ttf")
+    with open(FONT_FILEPATH, "rb") as source, open(font_filepath, "wb") as copy:
+        copy.write(source.read())
+
+    built = fontatlas.build_atlas(font_filepath, 30)
+    fontatlas.save_atlas(built, font_filepath, 30)
+    loaded = fontatlas.load_atlas(font_filepath, 30)
+    assert loaded.glyphs == built.glyphs
+    assert loaded.height == built.height
+    text = "Parcel B: Beetle Quest"
+    assert (
+        count_differences(built.render(text, COLOR), loaded.render(text, COLOR))
+        == 0
+    )
+    pygame.font.quit()
@@ -12,9 +12,11 @@ a given dictionary access results in an KeyError - the actual value isn't
 being test and is irrelevant, it is just the fact that the key exists that is
 being checked.
 """
+import os
 from json import load
 from ast import literal_eval
 import pytest
+from audio import MUSIC_COLUMN, SOUND_COLUMN
 from scene import MAP_SCENES_FILEPATH, EVENT_SCENES_FILEPATH
 
 
@@ -104,3 +106,49 @@ def test_next_event_references():
                 # If the value isn't None (meaning it should continue on to
                 # another event), this statement should execute without error.
                 event_data[next_event]  # pylint: disable=pointless-statement
+
+
+def test_required_items_can_be_found():
+    """
+    Test that every option has an item requirement, and that every item
+    required to show an option can be added to the inventory somewhere.
+    """
+
+    # Load external event data
+    with open(EVENT_SCENES_FILEPATH, "r", encoding="utf-8") as file:
+        event_data = load(file)
+
+    # Every item that an event option can add to the player's inventory
+    items = {
+        item
+        for event in event_data
+        for item in literal_eval(event["AddInventory"])
+        if item is not None
+    }
+
+    for event in event_data:
+        required = literal_eval(event["RequiresItem"])
+        assert len(required) == len(literal_eval(event["TextOptions"]))
+        for item in required:
+            assert item is None or item in items
+
+
+def test_declared_audio_exists():
+    """
+    Test that every music track and sound effect declared by a map point or
+    event exists, and that the map and the events both declare music and the
+    events declare sound effects.
+    """
+    sounds = 0
+    for filepath in (MAP_SCENES_FILEPATH, EVENT_SCENES_FILEPATH):
+        with open(filepath, "r", encoding="utf-8") as file:
+            scenes = load(file)
+        music = 0
+        for scene in scenes:
+            for column in (MUSIC_COLUMN, SOUND_COLUMN):
+                if scene.get(column):
+                    assert os.path.exists(scene[column]), scene[column]
+            music += bool(scene.get(MUSIC_COLUMN))
+            sounds += bool(scene.get(SOUND_COLUMN))
+        assert music
+    assert sounds
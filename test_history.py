@@ -0,0 +1,87 @@
+"""
+Test that the history of the player's steps rewinds to the right place and
+state, and stays within its capacity.
+"""
+
+import pygame
+import pytest
+
+import controller
+from character import PlayerCharacter
+from history import EVENT_STEP, MAP_STEP, ChoiceHistory
+from main import rewind_player
+from options import load_option_table
+from scene import EVENT_SCENES_FILEPATH, NO_EVENT_ID
+
+
+def test_rewind_restores_place_and_state():
+    """
+    Test that rewinding undoes the health and items of every step taken back,
+    and returns the player to where they were before the oldest one.
+    """
+    options = load_option_table(EVENT_SCENES_FILEPATH)
+    player = PlayerCharacter("sprite_path", 10)
+    history = ChoiceHistory()
+
+    # Walk from map point 3 to 4, then choose options in events 7 and 8
+    history.record_move(3)
+    player.update_health(2)
+    player.update_inventory("Jacket")
+    history.record_choice(7, 2, options.inventory_mask(["Jacket"]))
+    player.update_health(-1)
+    history.record_choice(8, -1, 0)
+
+    assert rewind_player(player, options, history, 1, 4) == (4, 8)
+    assert (player.health, player.inventory) == (8, ["Jacket"])
+    assert rewind_player(player, options, history, 2, 4) == (3, NO_EVENT_ID)
+    assert (player.health, player.inventory) == (10, [])
+    assert len(history) == 0
+
+    # Rewinding further than the history goes stays where the player is
+    assert rewind_player(player, options, history, 5, 3) == (3, NO_EVENT_ID)
+
+
+def test_history_forgets_oldest_steps():
+    """
+    Test that a full history forgets its oldest steps, and reads the rest
+    back oldest first.
+    """
+    history = ChoiceHistory(capacity=3)
+    history.record_move(0)
+    for event_id in range(1, 5):
+        history.record_choice(event_id, event_id, 1 << event_id)
+
+    assert len(history) == 3
+    assert list(history.steps()) == [
+        (EVENT_STEP, 2, 2, 4),
+        (EVENT_STEP, 3, 3, 8),
+        (EVENT_STEP, 4, 4, 16),
+    ]
+    assert history.rewind(10, 9) == (9, 2, 9, 28)
+
+    history.record_move(5)
+    assert list(history.steps()) == [(MAP_STEP, 5, 0, 0)]
+
+
+def test_rewind_key_only_works_with_history():
+    """
+    Test that the rewind key interrupts waiting for a decision once there is
+    something to rewind, and is ignored before then.
+    """
+    pygame.init()
+    pygame.display.set_mode((800, 500))
+    history = ChoiceHistory()
+    controls = controller.TextController(EVENT_SCENES_FILEPATH, history=history)
+
+    for key in (controller.REWIND_KEY, pygame.K_LEFT):
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+    assert controls.find_result_map((1, None, None, None)) == 1
+
+    history.record_move(0)
+    pygame.event.post(
+        pygame.event.Event(pygame.KEYDOWN, key=controller.REWIND_KEY)
+    )
+    with pytest.raises(controller.Rewind):
+        controls.find_result_map((1, None, None, None))
+
+    pygame.quit()
@@ -0,0 +1,157 @@
+"""
+Test that edited story data and images are reloaded in place, re-parsing only
+the records that changed.
+"""
+
+import json
+import os
+import shutil
+
+import assets
+import hotreload
+from options import OptionTable
+from routing import MapRouter
+from scene import (
+    EVENT_SCENES_FILEPATH,
+    MAP_BACKGROUND_FILEPATH,
+    MAP_SCENES_FILEPATH,
+)
+
+# The Old Man Herb fight, where the third option needs the flashlight
+FLASHLIGHT_EVENT = 14
+
+
+def touch(filepath, offset):
+    """
+    Move a file's modification time forward, so the change is seen even on
+    filesystems with coarse timestamps.
+
+    Args:
+        filepath: path to the file
+        offset: integer number of seconds to move the time forward by
+    """
+    stat = os.stat(filepath)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + offset * 10**9))
+
+
+def edit(filepath, change):
+    """
+    Edit a JSON data file.
+
+    Args:
+        filepath: path to the file
+        change: function taking the loaded data and changing it in place
+    """
+    with open(filepath, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    change(data)
+    with open(filepath, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=4)
+    touch(filepath, 1)
+
+
+def create_watcher(tmp_path, monkeypatch):
+    """
+    Copy the game's data files somewhere they can be edited, and watch them.
+
+    Args:
+        tmp_path: pathlib Path of a temporary directory to copy the files to
+        monkeypatch: pytest MonkeyPatch used to stop polls being throttled
+
+    Returns:
+        Tuple of the StoryWatcher, the OptionTable it updates, the MapRouter
+            it invalidates, the event data filepath and the map data filepath
+    """
+    monkeypatch.setattr(hotreload, "POLL_INTERVAL", 0)
+    event_filepath = str(tmp_path / "events.json")
+    map_filepath = str(tmp_path / "map.json")
+    shutil.copy(EVENT_SCENES_FILEPATH, event_filepath)
+    shutil.copy(MAP_SCENES_FILEPATH, map_filepath)
+
+    options = OptionTable(assets.load_json(event_filepath))
+    router = MapRouter(assets.load_json(map_filepath))
+    watcher = hotreload.StoryWatcher(
+        event_filepath, map_filepath, options, [router]
+    )
+    return watcher, options, router, event_filepath, map_filepath
+
+
+def test_changed_records_are_reloaded_in_place(tmp_path, monkeypatch):
+    """
+    Test that only edited events are replaced, in the list shared with the
+    rest of the game, and that their options are re-indexed.
+    """
+    watcher, options, router, event_filepath, map_filepath = create_watcher(
+        tmp_path, monkeypatch
+    )
+    event_data = assets.load_json(event_filepath)
+    unchanged = event_data[0]
+    assert not watcher.poll()
+
+    def change(data):
+        data[2]["TextPrompt"] = "An edited prompt"
+        data[FLASHLIGHT_EVENT]["RequiresItem"] = "[None, None, None]"
+
+    edit(event_filepath, change)
+    assert router.next_hop(10, 0) is None
+
+    def change_map(data):
+        data[0]["SpecialEvent"] = 2
+        data[10]["DirectionsToMove"] = "(None, None, 0, None)"
+
+    edit(map_filepath, change_map)
+
+    assert watcher.poll()
+    assert assets.load_json(event_filepath) is event_data
+    assert event_data[0] is unchanged
+    assert event_data[2]["TextPrompt"] == "An edited prompt"
+    assert options.visible_options(FLASHLIGHT_EVENT, 0, 10) == (0, 1, 2)
+    assert assets.load_json(map_filepath)[0]["SpecialEvent"] == 2
+    assert router.next_hop(10, 0) == 0
+    # Nothing changes until the files are edited again
+    assert not watcher.poll()
+
+
+def test_invalid_events_keep_old_version(tmp_path, monkeypatch):
+    """
+    Test that an event with an invalid effect keeps its old version, while
+    other edits in the same save are still reloaded.
+    """
+    watcher, options, _, event_filepath, _ = create_watcher(
+        tmp_path, monkeypatch
+    )
+    event_data = assets.load_json(event_filepath)
+    old_event = event_data[0]
+
+    def change(data):
+        data[0]["Effect"] = '["health *= 2", None]'
+        data[1]["TextPrompt"] = "An edited prompt"
+
+    edit(event_filepath, change)
+
+    assert watcher.poll()
+    assert event_data[0] is old_event
+    assert options.effect(0, 0)(10, 0) == (10, 0)
+    assert event_data[1]["TextPrompt"] == "An edited prompt"
+
+
+def test_edited_images_are_evicted(tmp_path, monkeypatch):
+    """
+    Test that an edited image is decoded again the next time it is used.
+    """
+    monkeypatch.setattr(hotreload, "POLL_INTERVAL", 0)
+    image = str(tmp_path / "map.png")
+    shutil.copy(MAP_BACKGROUND_FILEPATH, image)
+    watcher = hotreload.StoryWatcher(
+        EVENT_SCENES_FILEPATH,
+        MAP_SCENES_FILEPATH,
+        OptionTable(assets.load_json(EVENT_SCENES_FILEPATH)),
+        static_images=[image],
+    )
+    assets.load_image(image)
+    assert assets.is_image_cached(image)
+
+    touch(image, 1)
+
+    assert watcher.poll()
+    assert not assets.is_image_cached(image)
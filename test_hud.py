@@ -0,0 +1,129 @@
+"""
+Test that the inventory panel only shows one page of items, and is only
+rendered again when the inventory or the page changes.
+
+NOTE: THESE UNIT TESTS RELY ON BEING ABLE TO CREATE A PYGAME WINDOW
+"""
+
+import pygame
+
+import hud
+from character import PlayerCharacter
+
+# Distance in pixels between lines of the panel
+LINE_HEIGHT = 30
+
+
+def text_renderer():
+    """
+    Create a stand-in for Scene.render_text that records the lines rendered.
+
+    Returns:
+        Tuple of the function rendering a line of text as a plain block, and
+            the list of strings of text it has rendered
+    """
+    rendered = []
+
+    def render(text):
+        """
+        Render a line of text as a plain block.
+
+        Args:
+            text: string of text
+
+        Returns:
+            pygame Surface sized by the length of the text
+        """
+        rendered.append(text)
+        return pygame.Surface((10 * len(text), 20), pygame.SRCALPHA)
+
+    return render, rendered
+
+
+def create_player(item_count):
+    """
+    Create a player holding a number of items.
+
+    Args:
+        item_count: integer number of items
+
+    Returns:
+        PlayerCharacter object
+    """
+    player = PlayerCharacter("sprite_path", 10)
+    for index in range(item_count):
+        player.update_inventory(f"item{index}")
+    return player
+
+
+def test_panel_pages():
+    """
+    Test that the panel shows one page of items with a count of the rest,
+    and that paging stops at the first and last pages.
+    """
+    panel = hud.InventoryPanel(rows=4)
+    player = create_player(10)
+    assert panel.lines(player.inventory) == [
+        "Inventory (1/3):",
+        "item0",
+        "item1",
+        "item2",
+        "item3",
+        "+6 more",
+    ]
+
+    panel.render(player.inventory, 0, text_renderer()[0], LINE_HEIGHT)
+    assert not panel.scroll(-1)
+    assert panel.scroll(5)
+    assert panel.page == 2
+    assert panel.lines(player.inventory) == [
+        "Inventory (3/3):",
+        "item8",
+        "item9",
+        "+8 more",
+    ]
+
+    # A short inventory fits on one page
+    assert panel.lines(["a", "b"]) == ["Inventory:", "a", "b"]
+
+
+def test_panel_renders_on_change():
+    """
+    Test that the panel is only rendered again when the inventory changes or
+    the page is turned, and that removing items keeps the page in range.
+    """
+    pygame.init()
+    panel = hud.InventoryPanel(rows=4)
+    player = create_player(100)
+    renderer, rendered = text_renderer()
+
+    def render():
+        """
+        Render the panel for the player's inventory.
+
+        Returns:
+            pygame Surface of the panel
+        """
+        return panel.render(
+            player.inventory, player.inventory_revision, renderer, LINE_HEIGHT
+        )
+
+    surface = render()
+    # Only the visible lines are rendered, however many items there are
+    assert len(rendered) == 6
+    assert surface.get_height() == LINE_HEIGHT * 5 + 20
+    assert render() is surface
+    assert len(rendered) == 6
+
+    player.update_inventory("item0")
+    assert render() is not surface
+    panel.scroll(100)
+    render()
+    assert rendered[-1] == "+96 more"
+
+    for index in range(1, 98):
+        player.update_inventory(f"item{index}")
+    render()
+    assert panel.page == 0
+    assert rendered[-3:] == ["Inventory:", "item98", "item99"]
+    pygame.quit()
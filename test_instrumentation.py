@@ -0,0 +1,183 @@
+"""
+Test the opt-in instrumentation used to profile startup and per-frame timings.
+"""
+
+import io
+import json
+
+import instrumentation
+from instrumentation import (
+    LATENCY_PARTS,
+    LATENCY_PHASES,
+    LatencyTracer,
+    Metrics,
+    RollingHistogram,
+    StartupProfiler,
+)
+
+
+def test_histogram_summary():
+    """
+    Test that a histogram reports percentiles of its recent samples while
+    keeping lifetime counts.
+    """
+    histogram = RollingHistogram(window=4)
+
+    for value in [100, 1, 2, 3, 4]:
+        histogram.observe(value)
+
+    summary = histogram.summary()
+
+    # The first sample has left the window, but is still counted
+    assert summary["count"] == 5
+    assert summary["sum_ms"] == 110
+    assert summary["max_ms"] == 4
+    assert summary["p50_ms"] == 2.5
+
+
+def test_histogram_prometheus_buckets():
+    """
+    Test that Prometheus bucket counts are cumulative and end with the total
+    count.
+    """
+    histogram = RollingHistogram(buckets=(1, 10))
+    for value in [0.5, 5, 50]:
+        histogram.observe(value)
+
+    lines = histogram.prometheus_lines("test_ms")
+
+    assert 'test_ms_bucket{le="1"} 1' in lines
+    assert 'test_ms_bucket{le="10"} 2' in lines
+    assert 'test_ms_bucket{le="+Inf"} 3' in lines
+    assert "test_ms_count 3" in lines
+
+
+def test_disabled_metrics_record_nothing():
+    """
+    Test that nothing is recorded while metrics are disabled.
+    """
+    metrics = Metrics()
+
+    metrics.observe("draw", 1.0)
+    metrics.increment("visits", 3)
+    with metrics.time("block"):
+        pass
+
+    assert metrics.histogram("draw") is None
+    assert metrics.histogram("block") is None
+    assert metrics.counter("visits", 3) == 0
+
+
+def test_counters_and_hit_ratio():
+    """
+    Test that labelled counters are kept separately and that cache hit ratios
+    are calculated from hit and miss counters.
+    """
+    metrics = Metrics(enabled=True)
+
+    metrics.increment("event_visits", 1)
+    metrics.increment("event_visits", 1)
+    metrics.increment("event_visits", 2)
+    metrics.increment("image_cache_hits", amount=3)
+    metrics.increment("image_cache_misses")
+
+    data = json.loads(metrics.to_json())
+
+    assert data["counters"]["event_visits"] == {"1": 2, "2": 1}
+    assert data["cache_hit_ratios"]["image_cache"] == 0.75
+    assert metrics.hit_ratio("text_cache") is None
+
+
+def test_prometheus_output():
+    """
+    Test that histograms, counters and gauges are exported with the metric
+    prefix.
+    """
+    metrics = Metrics(enabled=True)
+    metrics.observe("map_draw", 2.0)
+    metrics.increment("map_visits", 4)
+    metrics.set_gauge("surface_memory_bytes", 1024)
+    metrics.set_gauge("surface_memory_bytes", 2048)
+
+    text = metrics.to_prometheus()
+
+    assert "# TYPE pbbq_map_draw_ms histogram" in text
+    assert "pbbq_map_draw_ms_count 1" in text
+    assert 'pbbq_map_visits_total{id="4"} 1' in text
+    assert "# TYPE pbbq_surface_memory_bytes gauge" in text
+    assert "pbbq_surface_memory_bytes 2048" in text
+    assert metrics.to_dict()["gauges"] == {"surface_memory_bytes": 2048}
+
+
+def test_timed_decorator():
+    """
+    Test that the timed decorator records into the shared metrics only while
+    they are enabled, and passes through return values.
+    """
+
+    @instrumentation.timed("test_call")
+    def add(first, second):
+        return first + second
+
+    instrumentation.METRICS.reset()
+    try:
+        assert add(1, 2) == 3
+        assert instrumentation.METRICS.histogram("test_call") is None
+
+        instrumentation.METRICS.enabled = True
+        assert add(1, 2) == 3
+        assert instrumentation.METRICS.histogram("test_call").count == 1
+    finally:
+        instrumentation.METRICS.enabled = False
+        instrumentation.METRICS.reset()
+
+
+def test_startup_profiler_reports_once():
+    """
+    Test that the startup profiler records its phases and only reports the
+    first frame once.
+    """
+    stream = io.StringIO()
+    profiler = StartupProfiler(stream=stream)
+
+    profiler.mark("init")
+    profiler.first_frame()
+    profiler.first_frame()
+
+    assert [phase[0] for phase in profiler.phases] == ["init", "first frame"]
+    assert stream.getvalue().count("first frame") == 1
+
+
+def test_latency_tracer_breaks_down_transitions():
+    """
+    Test that a transition is only recorded once every stage from the key
+    press to the display update is marked, and that only work done while
+    drawing counts towards its parts.
+    """
+    tracer = LatencyTracer(enabled=True)
+
+    # Stages without a key press first, and transitions missing a stage, are
+    # not recorded
+    tracer.mark("decision")
+    tracer.mark("shown")
+    for stage in ("input", "decision", "flip", "shown"):
+        tracer.mark(stage)
+    assert tracer.last == {}
+
+    tracer.mark("input")
+    with tracer.part("text"):
+        pass
+    for stage in ("decision", "draw"):
+        tracer.mark(stage)
+    with tracer.part("decode"):
+        sum(range(10000))
+    for stage in ("drawn", "flip", "shown"):
+        tracer.mark(stage)
+
+    breakdown = tracer.last
+    assert list(breakdown) == list(LATENCY_PHASES) + list(LATENCY_PARTS)
+    assert breakdown["decode"] > 0
+    assert breakdown["text"] == 0
+    assert breakdown["total"] >= breakdown["draw"] >= breakdown["decode"]
+    assert tracer.summary()["total"]["count"] == 1
+    assert tracer.overlay_lines()[1].startswith("decide: ")
@@ -0,0 +1,82 @@
+"""
+Test that the minimap is scaled from a cached mipmap pyramid and that visited
+map points are marked on it as they are visited.
+"""
+
+import pygame
+
+import assets
+from minimap import CURRENT_COLOR, VISITED_COLOR, Minimap
+from scene import MAP_BACKGROUND_FILEPATH, MAP_SCENES_FILEPATH
+
+# Width of the minimap used in these tests
+WIDTH = 160
+
+
+def create_minimap():
+    """
+    Create a minimap of the game's map.
+
+    Returns:
+        Minimap object
+    """
+    return Minimap(
+        assets.load_json(MAP_SCENES_FILEPATH), MAP_BACKGROUND_FILEPATH, WIDTH
+    )
+
+
+def marker_position(minimap, map_id):
+    """
+    Find where a map point's marker is drawn on a minimap at (0, 0).
+
+    Args:
+        minimap: Minimap object that has been drawn at least once
+        map_id: integer ID of the map point
+
+    Returns:
+        tuple of two ints (x, y)
+    """
+    # PYLINT DISABLE: the tests check the marker positions the minimap uses
+    # pylint: disable-next=protected-access
+    return minimap._to_minimap(map_id)
+
+
+def test_mipmaps_halve_and_are_cached():
+    """
+    Test that each level of the pyramid is half the size of the last, and
+    that the pyramid is only built once until the image is evicted.
+    """
+    levels = assets.load_mipmaps(MAP_BACKGROUND_FILEPATH)
+    assert levels[0] is assets.load_image(MAP_BACKGROUND_FILEPATH)
+    for larger, smaller in zip(levels, levels[1:]):
+        assert smaller.get_width() == larger.get_width() // 2
+        assert smaller.get_height() == larger.get_height() // 2
+    assert min(levels[-1].get_size()) >= assets.MIPMAP_MIN_SIZE
+    assert assets.load_mipmaps(MAP_BACKGROUND_FILEPATH) is levels
+
+    assets.evict_image(MAP_BACKGROUND_FILEPATH)
+    assert assets.load_mipmaps(MAP_BACKGROUND_FILEPATH) is not levels
+
+
+def test_visited_points_are_marked():
+    """
+    Test that only visited map points are marked, including points visited
+    after the minimap was first drawn, and that the current point is marked.
+    """
+    minimap = create_minimap()
+    surface = pygame.Surface((WIDTH, WIDTH))
+    minimap.visit(0)
+    minimap.draw(surface, (0, 0), 0)
+    assert surface.get_at(marker_position(minimap, 0))[:3] == CURRENT_COLOR
+    assert surface.get_at(marker_position(minimap, 10))[:3] != VISITED_COLOR
+
+    minimap.visit(1)
+    minimap.draw(surface, (0, 0), 1)
+    assert surface.get_at(marker_position(minimap, 0))[:3] == VISITED_COLOR
+    assert surface.get_at(marker_position(minimap, 1))[:3] == CURRENT_COLOR
+    assert minimap.visited == {0, 1}
+
+    # Markers are kept when the overlay is rebuilt
+    minimap.invalidate()
+    minimap.draw(surface, (0, 0), 1)
+    assert surface.get_at(marker_position(minimap, 0))[:3] == VISITED_COLOR
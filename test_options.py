@@ -0,0 +1,113 @@
+"""
+Test that the options shown for each event depend on the player's inventory,
+and that the controller only accepts keys for the options shown.
+
+NOTE: THESE UNIT TESTS RELY ON BEING ABLE TO CREATE A PYGAME WINDOW
+"""
+
+import pygame
+
+import controller
+from options import OptionTable, load_option_table
+from scene import EVENT_SCENES_FILEPATH
+
+# The Old Man Herb fight, where the third option needs the flashlight
+FLASHLIGHT_EVENT = 14
+
+
+def test_visible_options_need_required_items():
+    """
+    Test that an option requiring an item is only visible once the player
+    holds it, and that other items don't affect visibility.
+    """
+    table = load_option_table(EVENT_SCENES_FILEPATH)
+    without = table.inventory_mask(["Jacket"])
+    with_flashlight = table.inventory_mask(["Jacket", "Flashlight"])
+
+    assert table.visible_options(FLASHLIGHT_EVENT, without, 10) == (0, 1)
+    assert table.visible_options(FLASHLIGHT_EVENT, with_flashlight, 10) == (
+        0,
+        1,
+        2,
+    )
+    assert table.visible_options(0, without, 10) == (0, 1)
+    # Items the game never uses don't change the mask
+    assert table.inventory_mask(["Sandwich"]) == 0
+
+
+def test_events_without_requirements_show_every_option():
+    """
+    Test that event data without a RequiresItem column shows every option.
+    """
+    table = OptionTable(
+        [
+            {
+                "ID": 0,
+                "TextOptions": '["a", "b", "c"]',
+                "OptionResultID": "[None, None, None]",
+                "HealthChange": "[0, 0, 0]",
+                "AddInventory": "[None, None, None]",
+                "GameEnd": '["a", "b", "c"]',
+                "ItemCheck": "[None, None, None]",
+            }
+        ]
+    )
+
+    assert table.visible_options(0, 0, 10) == (0, 1, 2)
+    next_id, effect, end_message = table.outcome(0, 2)
+    assert next_id is None
+    assert end_message == "c"
+    assert effect(10, 0) == (10, 0)
+
+
+def test_conditions_and_effects():
+    """
+    Test that scripted conditions can depend on health, and that scripted
+    effects are applied after the HealthChange, AddInventory and ItemCheck
+    columns.
+    """
+    table = OptionTable(
+        [
+            {
+                "ID": 0,
+                "TextOptions": '["a", "b"]',
+                "OptionResultID": "[-100, -100]",
+                "HealthChange": "[3, 0]",
+                "AddInventory": '["Jacket", None]',
+                "GameEnd": "[None, None]",
+                "ItemCheck": '[("Stick", 2), None]',
+                "Condition": '[None, "has Stick and health > 3"]',
+                "Effect": '["health += 1; add \\"Old Rock\\"", None]',
+            }
+        ]
+    )
+    stick = table.inventory_mask(["Stick"])
+
+    assert table.visible_options(0, stick, 4) == (0, 1)
+    assert table.visible_options(0, stick, 3) == (0,)
+    assert table.visible_options(0, 0, 10) == (0,)
+
+    health, mask = table.effect(0, 0)(10, stick)
+    assert health == 10 - (3 - 2) + 1
+    assert table.mask_items(mask) == ["Jacket", "Old Rock", "Stick"]
+
+
+def test_controller_ignores_hidden_option_keys():
+    """
+    Test that pressing the key of a hidden option does nothing, and that the
+    keys of visible options still work.
+    """
+    pygame.init()
+    pygame.display.set_mode((800, 500))
+    controls = controller.TextController(EVENT_SCENES_FILEPATH)
+
+    for key in (pygame.K_3, pygame.K_2):
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+    outcome = controls.find_result_event(FLASHLIGHT_EVENT, ["Jacket"])
+
+    assert controls.last_choice == 1
+    assert outcome == load_option_table(EVENT_SCENES_FILEPATH).outcome(
+        FLASHLIGHT_EVENT, 1
+    )
+
+    pygame.quit()
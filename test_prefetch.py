@@ -0,0 +1,125 @@
+"""
+Test that the images of the scenes reachable next are found from the story
+graph and decoded in the background.
+
+NOTE: THESE UNIT TESTS RELY ON BEING ABLE TO CREATE A PYGAME WINDOW
+"""
+
+import pygame
+import assets
+from prefetch import AssetPrefetcher
+from scene import (
+    EVENT_SCENES_FILEPATH,
+    MAP_BACKGROUND_FILEPATH,
+    MAP_SCENES_FILEPATH,
+)
+
+BEE_FIGHT_IMAGES = [
+    "data/event_data/parcelb_woods.png",
+    "data/event_data/bee_sprite.png",
+]
+
+
+def create_prefetcher():
+    """
+    Create a prefetcher over the game's data.
+
+    Returns:
+        AssetPrefetcher object
+    """
+    return AssetPrefetcher(
+        assets.load_json(EVENT_SCENES_FILEPATH),
+        assets.load_json(MAP_SCENES_FILEPATH),
+    )
+
+
+def test_images_after_event():
+    """
+    Test that the images of next events are found, and that an event tree
+    ending leads to the map background being prefetched.
+    """
+    prefetcher = create_prefetcher()
+
+    # The prologue leads to an event without images, or to the game ending
+    assert not prefetcher.images_after_event(0)
+    # The first direction event returns to the map either way
+    assert prefetcher.images_after_event(4) == [MAP_BACKGROUND_FILEPATH]
+    # Fleeing the bees leads to two events sharing their background
+    assert prefetcher.images_after_event(5) == [
+        "data/event_data/parcelb_woods.png",
+        "data/event_data/bee_sprite.png",
+        "data/event_data/bee_swarm.png",
+    ]
+    prefetcher.shutdown()
+
+
+def test_images_after_map():
+    """
+    Test that the images of the events at neighbouring map points are found.
+    """
+    prefetcher = create_prefetcher()
+
+    # Map point 5 leads to point 4 (no event) and point 6 (the bee fight)
+    assert prefetcher.images_after_map(5) == BEE_FIGHT_IMAGES
+    prefetcher.shutdown()
+
+
+def test_prefetched_images_are_cached():
+    """
+    Test that prefetched images end up in the image cache without being
+    decoded again on the main thread.
+    """
+    pygame.init()
+    pygame.display.set_mode((800, 500))
+    prefetcher = create_prefetcher()
+
+    prefetcher.prefetch_map(5)
+    # Wait on the first image directly, and collect the rest once decoded
+    background = assets.load_image(BEE_FIGHT_IMAGES[0])
+    prefetcher.shutdown(wait=True)
+    assets.collect_prefetched()
+
+    assert background.get_size() == (960, 605)
+    assert assets.load_image(BEE_FIGHT_IMAGES[0]) is background
+    assert assets.is_image_cached(BEE_FIGHT_IMAGES[1])
+
+    pygame.quit()
+
+
+def test_sounds_after_event_and_map():
+    """
+    Test that the effects declared by the events reachable next are found,
+    once each, and that events without one add nothing.
+    """
+    event_data = [
+        {
+            "BackgroundImage": "",
+            "PromptImage": "",
+            "OptionResultID": "[1, 2, -100]",
+        },
+        {
+            "BackgroundImage": "",
+            "PromptImage": "",
+            "OptionResultID": "[None]",
+            "Sound": "sting.wav",
+        },
+        {
+            "BackgroundImage": "",
+            "PromptImage": "",
+            "OptionResultID": "[1]",
+            "Sound": "",
+        },
+    ]
+    map_data = [
+        {"SpecialEvent": -100, "DirectionsToMove": "(None, 1, 2, None)"},
+        {"SpecialEvent": 1, "DirectionsToMove": "(0, None, None, None)"},
+        {"SpecialEvent": 2, "DirectionsToMove": "(None, None, None, 0)"},
+    ]
+    prefetcher = AssetPrefetcher(event_data, map_data)
+
+    assert prefetcher.sounds_after_event(0) == ["sting.wav"]
+    assert prefetcher.sounds_after_event(2) == ["sting.wav"]
+    assert not prefetcher.sounds_after_event(1)
+    assert prefetcher.sounds_after_map(0) == ["sting.wav"]
+    assert not prefetcher.sounds_after_map(1)
+    prefetcher.shutdown()
@@ -0,0 +1,143 @@
+"""
+Test recording the frames shown to the player and rebuilding them from the
+session file.
+
+NOTE: THESE TESTS RELY ON BEING ABLE TO CREATE A PYGAME WINDOW
+"""
+
+import time
+
+import numpy as np
+import pygame
+
+from instrumentation import METRICS
+import recorder
+
+
+def _record_session(filepath):
+    """
+    Record a short session on a small window: a first frame, a change to part
+    of it, an unchanged frame, the window resized, and a change after that.
+
+    Args:
+        filepath: string path of the session file to write
+
+    Returns:
+        list of NumPy arrays of the pixels of each frame shown
+    """
+    shown = []
+    session = recorder.SessionRecorder()
+    surface = pygame.display.set_mode((64, 40))
+    session.start(str(filepath), keyframe_interval=3)
+
+    def show():
+        """
+        Capture the window's frame, and keep a copy of it to compare with.
+        """
+        session.capture()
+        shown.append(pygame.surfarray.array2d(pygame.display.get_surface()).T)
+
+    surface.fill((10, 20, 30))
+    show()
+    surface.fill((200, 0, 0), (20, 18, 30, 5))
+    show()
+    show()
+    surface = pygame.display.set_mode((48, 40))
+    surface.fill((0, 90, 0))
+    show()
+    surface.fill((0, 0, 250), (0, 0, 3, 3))
+    show()
+    session.stop()
+    return shown
+
+
+def test_changed_rects_join_neighbouring_tiles():
+    """
+    Test that changed tiles next to each other are joined into one rectangle,
+    clipped to the frame, and separate changes give separate rectangles.
+    """
+    previous = np.zeros((40, 70), dtype=np.uint32)
+    pixels = previous.copy()
+    assert not recorder.changed_rects(pixels, previous, 16)
+
+    pixels[5, 20] = 1
+    pixels[20:, 40:] = 1
+    assert recorder.changed_rects(pixels, previous, 16) == [
+        (16, 0, 16, 16),
+        (32, 16, 38, 24),
+    ]
+
+
+def test_recorded_frames_are_rebuilt_exactly(tmp_path):
+    """
+    Test that every frame read back matches the frame shown, stepping both
+    forwards and backwards, and that unchanged frames store no pixels.
+    """
+    pygame.init()
+    filepath = tmp_path / "session.pbrec"
+    shown = _record_session(filepath)
+    pygame.quit()
+
+    with recorder.Recording(str(filepath)) as recording:
+        assert len(recording) == len(shown)
+        assert recording.keyframes == [0, 3]
+        assert recording.times == sorted(recording.times)
+        assert recording.size(3) == (48, 40)
+        for index in [0, 1, 2, 3, 4, 1, 4, 0]:
+            assert np.array_equal(recording.frame(index), shown[index])
+        assert recording.surface(1).get_at((25, 20))[:3] == (200, 0, 0)
+        assert recording.at_time(recording.times[2] + 1e-6) == 2
+
+
+def test_session_cut_short_is_read_to_last_whole_frame(tmp_path):
+    """
+    Test that a session file without its index (as left by a crash) can still
+    be read, losing only a frame that wasn't written whole.
+    """
+    pygame.init()
+    filepath = tmp_path / "session.pbrec"
+    shown = _record_session(filepath)
+    pygame.quit()
+
+    data = filepath.read_bytes()
+    index_size = len(shown) * recorder.INDEX_ENTRY.size + recorder.FOOTER.size
+    (tmp_path / "whole.pbrec").write_bytes(data[:-index_size])
+    (tmp_path / "cut.pbrec").write_bytes(data[: -index_size - 1])
+
+    with recorder.Recording(str(tmp_path / "whole.pbrec")) as recording:
+        assert len(recording) == len(shown)
+    with recorder.Recording(str(tmp_path / "cut.pbrec")) as recording:
+        assert len(recording) == len(shown) - 1
+        assert np.array_equal(recording.frame(3), shown[3])
+
+
+def test_capture_is_bounded_at_kiosk_resolution(tmp_path):
+    """
+    Test that a 1920x1080 window is recorded at half its size, and that the
+    copy made on the game loop takes under a millisecond.
+    """
+    surface = pygame.Surface((1920, 1080), 0, 32)
+    session = recorder.SessionRecorder()
+    METRICS.reset()
+    METRICS.enabled = True
+    try:
+        session.start(str(tmp_path / "session.pbrec"), surface)
+        for frame in range(60):
+            surface.fill((frame, 40, 80), (frame * 8, 0, 8, 1080))
+            session.capture(surface)
+            # Leave the background thread time to write, as a frame would
+            time.sleep(0.01)
+        session.stop()
+        assert METRICS.histogram("record_capture").summary()["p50_ms"] < 1
+    finally:
+        METRICS.enabled = False
+        METRICS.reset()
+
+    assert recorder.capture_step((1920, 1080)) == 2
+    assert recorder.capture_step((1600, 900)) == 1
+    with recorder.Recording(str(tmp_path / "session.pbrec")) as recording:
+        assert recording.size(0) == (960, 540)
+        pixels = recording.frame(len(recording) - 1)
+        assert np.array_equal(
+            pixels, pygame.surfarray.array2d(surface).T[::2, ::2]
+        )
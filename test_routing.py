@@ -0,0 +1,79 @@
+"""
+Test that clicks on the map find the nearest map point, and that routes
+between map points are shortest and stop at special events.
+"""
+
+import math
+import random
+
+import assets
+from routing import NO_EVENT_ID, MapRouter
+from scene import MAP_SCENES_FILEPATH
+
+
+def make_map(positions):
+    """
+    Make map data with map points at the given positions and no moves.
+
+    Args:
+        positions: list of tuples of two ints (x, y)
+
+    Returns:
+        list of map point dictionaries
+    """
+    return [
+        {
+            "ID": map_id,
+            "MapPointCenterWidth": x,
+            "MapPointCenterHeight": y,
+            "DirectionsToMove": "(None, None, None, None)",
+            "SpecialEvent": NO_EVENT_ID,
+        }
+        for map_id, (x, y) in enumerate(positions)
+    ]
+
+
+def test_nearest_matches_brute_force():
+    """
+    Test that the grid finds the same nearest point as checking every point,
+    including for clicks outside the area covered by map points.
+    """
+    generator = random.Random(35)
+    positions = [
+        (generator.randint(0, 2000), generator.randint(0, 1500))
+        for _ in range(500)
+    ]
+    router = MapRouter(make_map(positions))
+    for _ in range(500):
+        click = (generator.randint(-500, 2500), generator.randint(-500, 2000))
+        expected = min(math.dist(click, position) for position in positions)
+        nearest = router.nearest(click)
+        assert math.dist(click, positions[nearest]) == expected
+
+
+def test_nearest_on_game_map():
+    """
+    Test that clicking on a map point of the game's map finds that point.
+    """
+    map_data = assets.load_json(MAP_SCENES_FILEPATH)
+    router = MapRouter(map_data)
+    for point in map_data:
+        click = (point["MapPointCenterWidth"], point["MapPointCenterHeight"])
+        assert router.nearest(click) == point["ID"]
+
+
+def test_routes_stop_at_events():
+    """
+    Test that routes take the shortest path and stop at the first special
+    event, and that unreachable points have no route.
+    """
+    router = MapRouter(assets.load_json(MAP_SCENES_FILEPATH))
+    # The path down past the lake is shorter than the one through the woods,
+    # and the player stops at the event on the way to the end
+    assert router.next_hop(2, 12) == 11
+    assert router.route(1, 10) == [2, 11, 12, 6]
+    assert router.route(7, 10) == [8, 9, 10]
+    assert router.next_hop(10, 10) is None
+    # There is no way back to the start, or onwards from the end
+    assert router.next_hop(1, 0) is None
+    assert not router.route(10, 1)
@@ -0,0 +1,25 @@
+"""
+Test that the scaling benchmark measures a generated story pack.
+"""
+
+import scale_benchmark
+import storypack
+
+
+def test_run_pack(tmp_path):
+    """
+    Test that every measurement is made against a small pack, and that the
+    results can be formatted.
+    """
+    storypack.write_pack(str(tmp_path), 30, 40)
+    result = scale_benchmark.run_pack(str(tmp_path), transitions=200, routes=3)
+    assert result["map_points"] == 30
+    assert result["events"] == 40
+    for key in ("json_ms", "options_ms", "router_ms", "load_peak_mib"):
+        assert result[key] > 0
+    assert result["map_p50_us"] > 0
+    assert result["event_p50_us"] > 0
+    assert result["route_p99_ms"] >= result["route_p50_ms"]
+
+    table = scale_benchmark.format_results({"small": result})
+    assert table.splitlines()[1].startswith("small")
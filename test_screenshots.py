@@ -0,0 +1,61 @@
+"""
+Test the batch scene renderer used for the docs site's screenshots.
+
+NOTE: THESE TESTS RELY ON BEING ABLE TO CREATE A PYGAME WINDOW
+"""
+
+import json
+import os
+
+import screenshots
+from options import load_option_table
+from scene import EVENT_SCENES_FILEPATH
+
+# Event whose options depend on whether the player has a flashlight
+FLASHLIGHT_EVENT = 14
+
+
+def test_inventory_variants_show_each_option_set():
+    """
+    Test that an event with an item-dependent option is drawn both with and
+    without the item, and an event without one is only drawn once.
+    """
+    options = load_option_table(EVENT_SCENES_FILEPATH)
+
+    assert screenshots.inventory_variants(options, FLASHLIGHT_EVENT) == [
+        [],
+        ["Flashlight"],
+    ]
+    assert screenshots.inventory_variants(options, 0) == [[]]
+
+
+def test_only_changed_scenes_are_rendered_again(tmp_path):
+    """
+    Test that every scene is rendered on the first run, none on a second run
+    with nothing changed, and only the scene whose hash differs after that.
+    """
+    output = str(tmp_path)
+    taken, skipped = screenshots.render_all(output, (400, 250), jobs=1)
+
+    assert skipped == 0
+    assert "map-0" in taken and "event-14-flashlight" in taken
+    assert "death-default" in taken
+    assert os.path.exists(os.path.join(output, "event-14-flashlight.png"))
+
+    assert screenshots.render_all(output, (400, 250), jobs=1) == (
+        [],
+        len(taken),
+    )
+
+    manifest_filepath = os.path.join(output, screenshots.MANIFEST_FILENAME)
+    with open(manifest_filepath, encoding="utf-8") as file:
+        manifest = json.load(file)
+    manifest["map-0"] = "stale"
+    manifest["map-gone"] = "stale"
+    with open(manifest_filepath, "w", encoding="utf-8") as file:
+        json.dump(manifest, file)
+    with open(os.path.join(output, "map-gone.png"), "wb"):
+        pass
+
+    assert screenshots.render_all(output, (400, 250), jobs=1)[0] == ["map-0"]
+    assert not os.path.exists(os.path.join(output, "map-gone.png"))
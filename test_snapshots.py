@@ -0,0 +1,54 @@
+"""
+Test that every scene still draws what its golden image shows, and that the
+comparison tolerates small differences but not real changes.
+
+Set the PBBQ_UPDATE_SNAPSHOTS environment variable to store new golden images
+after an intended change to how scenes look.
+
+NOTE: THESE TESTS RELY ON BEING ABLE TO CREATE A PYGAME WINDOW
+"""
+
+import os
+
+import pygame
+
+import snapshots
+
+
+def test_compare_tolerates_small_differences():
+    """
+    Test that pixels changed by no more than the tolerance don't count as
+    changed, while larger changes do, and that the heatmap marks them.
+    """
+    pygame.init()
+    surface = pygame.display.set_mode((40, 20))
+    surface.fill((100, 100, 100))
+    expected = surface.copy()
+
+    surface.fill((104, 96, 100))
+    assert snapshots.compare_surfaces(surface, expected, 8)[0] == 0
+    assert snapshots.compare_surfaces(surface, expected, 8)[1] is not None
+
+    surface.fill((200, 100, 100), (0, 0, 10, 20))
+    changed, diff = snapshots.compare_surfaces(surface, expected, 8)
+    assert changed == 0.25
+
+    heat = snapshots.heatmap(expected, diff, 8)
+    assert heat.get_size() == (40, 20)
+    assert heat.get_at((5, 5))[0] == 128 + 100 // 2
+    assert heat.get_at((30, 5))[0] == 30
+
+    pygame.quit()
+
+
+def test_scenes_match_golden_images():
+    """
+    Test that no scene differs from its golden image by more than the
+    tolerance. Renders and heatmaps of failing scenes are written to the
+    snapshot failures directory.
+    """
+    found = snapshots.check_snapshots(
+        update=bool(os.environ.get(snapshots.UPDATE_SNAPSHOTS_ENV))
+    )
+
+    assert not found, f"scenes changed: {found}"
@@ -0,0 +1,45 @@
+"""
+Test that the music and sound effects shipped with the game are the ones
+soundtrack.py synthesises, and that the music loops seamlessly.
+"""
+
+import wave
+
+import numpy as np
+import pytest
+
+import soundtrack
+
+
+@pytest.mark.parametrize("filepath", list(soundtrack.PIECES))
+def test_saved_piece_matches_synthesised(filepath):
+    """
+    Test that each saved piece is what soundtrack.py currently composes, so
+    edits to a piece aren't forgotten when rebuilding the files.
+    """
+    with wave.Wave_read(filepath) as file:
+        assert file.getnchannels() == 1
+        assert file.getframerate() == soundtrack.SAMPLE_RATE
+        saved = np.frombuffer(file.readframes(file.getnframes()), "<i2")
+    composed = np.frombuffer(
+        soundtrack.to_frames(soundtrack.PIECES[filepath]()), "<i2"
+    )
+    assert saved.shape == composed.shape
+    # Allow for rounding differences between platforms
+    assert np.abs(saved.astype(int) - composed).max() <= 1
+
+
+def test_music_loops_on_silence():
+    """
+    Test that every music track starts and ends on silence, so repeating it
+    doesn't click, and is scaled to the peak loudness.
+    """
+    for compose in (
+        soundtrack.olin_night,
+        soundtrack.parcelb_woods,
+        soundtrack.old_man_herb,
+    ):
+        samples = compose()
+        assert abs(samples[0]) < 1e-3
+        assert abs(samples[-1]) < 1e-2
+        assert np.abs(samples).max() == pytest.approx(soundtrack.PEAK)
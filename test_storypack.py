@@ -0,0 +1,108 @@
+"""
+Test that generated story packs are reproducible and follow the same rules as
+the shipped story data.
+"""
+
+from ast import literal_eval
+
+import pytest
+
+import assets
+import storypack
+from balance import INVALID, BalanceAnalyser
+from scene import NO_EVENT_ID
+
+
+def load(directory, node_count, event_count, seed=0):
+    """
+    Generate a story pack and load both of its files.
+
+    Args:
+        directory: pathlib.Path of the directory to write the pack to
+        node_count: integer number of map points
+        event_count: integer number of events
+        seed: integer seed for the pack
+
+    Returns:
+        Tuple of the list of event dictionaries, the list of map point
+            dictionaries and the bytes of both files
+    """
+    events_filepath, map_filepath = storypack.write_pack(
+        str(directory), node_count, event_count, seed
+    )
+    with open(events_filepath, "rb") as events, open(
+        map_filepath, "rb"
+    ) as map_:
+        contents = events.read() + map_.read()
+    assets.clear_cache()
+    return (
+        assets.load_json(events_filepath),
+        assets.load_json(map_filepath),
+        contents,
+    )
+
+
+def test_pack_is_reproducible(tmp_path):
+    """
+    Test that the same seed always generates the same pack, and a different
+    seed generates a different pack.
+    """
+    first = load(tmp_path / "first", 50, 80, seed=7)[2]
+    again = load(tmp_path / "again", 50, 80, seed=7)[2]
+    other = load(tmp_path / "other", 50, 80, seed=8)[2]
+    assert first == again
+    assert first != other
+
+    with pytest.raises(ValueError):
+        storypack.write_pack(str(tmp_path / "empty"), 0)
+
+
+def test_pack_is_valid(tmp_path):
+    """
+    Test that every map point and event of a pack can be reached, that every
+    reference is to something that exists, and that no choice leads the game
+    somewhere it can't handle.
+    """
+    event_data, map_data, _ = load(tmp_path, 60, 150)
+    assert [event["ID"] for event in event_data] == list(range(150))
+    assert [point["ID"] for point in map_data] == list(range(60))
+    assert map_data[0]["SpecialEvent"] == 0
+
+    # Every map point can be reached from the first
+    reached, frontier = {0}, [0]
+    while frontier:
+        for next_id in literal_eval(
+            map_data[frontier.pop()]["DirectionsToMove"]
+        ):
+            if next_id is not None and next_id not in reached:
+                reached.add(next_id)
+                frontier.append(next_id)
+    assert len(reached) == len(map_data)
+
+    # Every event is reached from a map point's special event
+    reached = set()
+    frontier = [
+        point["SpecialEvent"]
+        for point in map_data
+        if point["SpecialEvent"] != NO_EVENT_ID
+    ]
+    while frontier:
+        event_id = frontier.pop()
+        reached.add(event_id)
+        frontier += [
+            next_id
+            for next_id in literal_eval(event_data[event_id]["OptionResultID"])
+            if next_id not in (None, NO_EVENT_ID)
+        ]
+    assert len(reached) == len(event_data)
+
+    # Items are added, required and checked
+    for column in ("AddInventory", "RequiresItem", "ItemCheck"):
+        assert any(
+            value is not None
+            for event in event_data
+            for value in literal_eval(event[column])
+        )
+
+    report = BalanceAnalyser(event_data).analyse_events([0])
+    assert report[0][INVALID] == pytest.approx(0)
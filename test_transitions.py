@@ -0,0 +1,107 @@
+"""
+Test that scene transitions blend between frames using surfaces allocated
+once, and are turned off without a real display.
+
+NOTE: THESE UNIT TESTS RELY ON BEING ABLE TO CREATE A PYGAME WINDOW
+"""
+
+import pygame
+import pytest
+
+import transitions
+import viewport
+
+# Colors of the frames transitioned between
+OLD_COLOR = (255, 0, 0)
+NEW_COLOR = (0, 0, 255)
+
+
+def create_window():
+    """
+    Open a small window to draw transitions on.
+
+    Returns:
+        pygame Surface of the window
+    """
+    pygame.init()
+    return pygame.display.set_mode((64, 48))
+
+
+def transition_between(transition, surface):
+    """
+    Capture a frame of the old color, draw a frame of the new color and play
+    the transition between them.
+
+    Args:
+        transition: SceneTransition to play
+        surface: pygame Surface of the window
+    """
+    surface.fill(OLD_COLOR)
+    # Any two different objects stand in for the scenes
+    transition.switch("map", "event", surface)
+    surface.fill(NEW_COLOR)
+    transition.play(surface)
+
+
+def test_disabled_without_display():
+    """
+    Test that transitions are turned off under the dummy video driver, and
+    that unknown kinds of transition are rejected.
+    """
+    surface = create_window()
+    transition = transitions.SceneTransition("fade", 1000)
+    assert not transition.enabled
+    # With nothing captured, playing returns straight away
+    transition_between(transition, surface)
+    assert surface.get_at((0, 0))[:3] == NEW_COLOR
+
+    with pytest.raises(ValueError):
+        transitions.SceneTransition("wipe")
+    pygame.quit()
+
+
+@pytest.mark.parametrize("kind", ["fade", "dissolve"])
+def test_transitions_reuse_surfaces(kind, monkeypatch):
+    """
+    Test that each kind of transition ends on the new frame, and that the
+    surfaces it blends with are only allocated once.
+    """
+    monkeypatch.setattr(viewport, "HEADLESS_DRIVERS", ())
+    surface = create_window()
+    transition = transitions.SceneTransition(kind, 50)
+    assert transition.enabled
+
+    transition_between(transition, surface)
+    assert surface.get_at((0, 0))[:3] == NEW_COLOR
+    # PYLINT DISABLE: the test checks the preallocated surfaces are reused
+    # pylint: disable-next=protected-access
+    allocated = (transition._previous, transition._overlay)
+
+    transition_between(transition, surface)
+    # pylint: disable-next=protected-access
+    assert (transition._previous, transition._overlay) == allocated
+    pygame.quit()
+
+
+def test_dissolve_blends_frames(monkeypatch):
+    """
+    Test that half way through a dissolve both frames are mixed equally, and
+    that a key press ends the transition on the new frame.
+    """
+    monkeypatch.setattr(viewport, "HEADLESS_DRIVERS", ())
+    surface = create_window()
+    transition = transitions.SceneTransition("dissolve", 10000)
+
+    surface.fill(OLD_COLOR)
+    transition.switch("map", "event", surface)
+    surface.fill(NEW_COLOR)
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_1))
+    transition.play(surface)
+    assert surface.get_at((0, 0))[:3] == NEW_COLOR
+
+    # PYLINT DISABLE: the test checks a single blended frame
+    # pylint: disable-next=protected-access
+    transition._compose(surface, 0.5)
+    red, _, blue, _ = surface.get_at((0, 0))
+    assert abs(red - blue) <= 2
+    pygame.quit()
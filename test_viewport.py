@@ -0,0 +1,87 @@
+"""
+Test that the scenes' logical canvas is fitted to windows of any size, and
+that images are scaled once per window size.
+
+NOTE: THESE UNIT TESTS RELY ON BEING ABLE TO CREATE A PYGAME WINDOW
+"""
+
+import pygame
+import pytest
+
+import assets
+import character
+import scene
+from viewport import Viewport
+
+LOGICAL_SIZE = (scene.GLOBAL_WINDOW_WIDTH, scene.GLOBAL_WINDOW_HEIGHT)
+
+
+def test_canvas_is_letterboxed():
+    """
+    Test that the canvas is scaled uniformly and centred, with bars on the
+    sides of the window it doesn't fill.
+    """
+    viewport = Viewport((1920, 1080), LOGICAL_SIZE)
+    assert viewport.scale == 1080 / 500
+    assert viewport.rect == pygame.Rect(96, 0, 1728, 1080)
+    assert viewport.to_screen((0, 0)) == (96, 0)
+    assert viewport.to_screen(LOGICAL_SIZE) == (1824, 1080)
+    assert viewport.to_logical((960, 540)) == pytest.approx((400, 250))
+
+    # Resizing to the logical size undoes any scaling
+    viewport.resize(LOGICAL_SIZE)
+    assert viewport.scale == 1
+    assert viewport.to_screen((123, 45)) == (123, 45)
+
+
+def test_scaled_images_are_cached():
+    """
+    Test that an image is only scaled once per scale, and that scaled copies
+    are dropped when the window is resized.
+    """
+    image = assets.load_image(scene.MAP_BACKGROUND_FILEPATH)
+    assert assets.load_scaled_image(scene.MAP_BACKGROUND_FILEPATH, 1) is image
+
+    scaled = assets.load_scaled_image(scene.MAP_BACKGROUND_FILEPATH, 0.5)
+    assert scaled.get_size() == (
+        round(image.get_width() * 0.5),
+        round(image.get_height() * 0.5),
+    )
+    assert (
+        assets.load_scaled_image(scene.MAP_BACKGROUND_FILEPATH, 0.5) is scaled
+    )
+
+    assets.evict_scaled()
+    assert (
+        assets.load_scaled_image(scene.MAP_BACKGROUND_FILEPATH, 0.5)
+        is not scaled
+    )
+
+
+def test_scenes_draw_at_window_resolution():
+    """
+    Test that scenes draw text at the window's resolution and convert clicks
+    back to map positions, on a window twice the logical size.
+    """
+    pygame.init()
+    surface = pygame.display.set_mode(
+        (2 * LOGICAL_SIZE[0], 2 * LOGICAL_SIZE[1])
+    )
+    player = character.PlayerCharacter("data/sprite_data/resting.png", 10)
+    map_scene = scene.MapScene(surface, player)
+
+    assert map_scene.viewport.scale == 2
+    # Text is rendered with the font at twice the size, not scaled up
+    assert map_scene.render_text("Health") is assets.render_text(
+        scene.FONT_FILEPATH, 2 * scene.SMALL_FONT_SIZE, "Health", scene.WHITE
+    )
+
+    # Drawing the map centres the map point, so the window's centre is on it
+    map_scene.draw(5)
+    point = map_scene.scene_data[5]
+    assert map_scene.screen_to_map(surface.get_rect().center) == (
+        point["MapPointCenterWidth"],
+        point["MapPointCenterHeight"],
+    )
+
+    pygame.quit()
@@ -0,0 +1,171 @@
+"""
+Fade or cross-dissolve between the last frame of one scene and the first
+frame of the next when the game switches between the map and an event.
+
+The frames being blended and the black overlay used for fades are surfaces
+allocated once for the window size and reused by every transition. Each
+transition lasts a fixed time: every frame is blended by how much time has
+passed, so a frame that takes longer than the frame budget makes the next one
+jump ahead (dropping frames) rather than slowing the transition down. Pressing
+a key or clicking ends the transition straight away.
+
+Transitions are turned off without a real display (such as under the dummy
+video driver used for tests, benchmarks and headless rendering), since nobody
+is watching them.
+"""
+
+import time
+
+import pygame
+
+from instrumentation import METRICS
+from recorder import RECORDER
+from viewport import is_headless
+
+# Kinds of transition that can be chosen
+TRANSITION_KINDS = ("cut", "fade", "dissolve")
+
+# Default length of a transition in milliseconds
+DEFAULT_TRANSITION_TIME = 250
+
+# Longest time in milliseconds a transition frame should take
+FRAME_BUDGET = 1000 / 60
+
+# Input that ends a transition early. It is left in the event queue, so it
+# still counts as the player's next move.
+SKIP_EVENTS = (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.QUIT)
+
+
+class SceneTransition:
+    """
+    Blend from the frame last shown to the next frame drawn, whenever the
+    scene being shown changes.
+    """
+
+    def __init__(self, kind="dissolve", duration=DEFAULT_TRANSITION_TIME):
+        """
+        Choose the kind of transition. Nothing is allocated until the first
+        transition.
+
+        Args:
+            kind: string, one of TRANSITION_KINDS. "cut" switches instantly.
+            duration: integer length of each transition in milliseconds
+
+        Raises:
+            ValueError: if the kind of transition isn't known
+        """
+        if kind not in TRANSITION_KINDS:
+            raise ValueError(f"Unknown transition {kind!r}")
+        self._kind = kind
+        self._duration = duration
+
+        # Frames being blended and the overlay faded through, allocated for
+        # the window size on first use
+        self._previous = None
+        self._next = None
+        self._overlay = None
+
+        # Whether a frame has been captured and is waiting to be blended from
+        self._pending = False
+
+    @property
+    def enabled(self):
+        """
+        Check whether transitions are shown.
+
+        Returns:
+            boolean, True unless transitions are cuts or there is no display
+        """
+        return self._kind != "cut" and self._duration > 0 and not is_headless()
+
+    def _allocate(self, size):
+        """
+        Make sure the frame and overlay surfaces are the size of the window,
+        only allocating them when the window size changes.
+
+        Args:
+            size: tuple of two ints (width, height) of the window
+        """
+        if self._previous is not None and self._previous.get_size() == size:
+            return
+        self._previous = pygame.Surface(size).convert()
+        self._next = pygame.Surface(size).convert()
+        self._overlay = pygame.Surface(size).convert()
+        self._overlay.fill((0, 0, 0))
+
+    def switch(self, showing, scene, surface):
+        """
+        Change which scene is being shown, capturing the frame on screen to
+        transition from if the scene changes.
+
+        Args:
+            showing: Scene object currently shown
+            scene: Scene object about to be drawn
+            surface: pygame Surface of the window
+
+        Returns:
+            the Scene object now being shown (scene)
+        """
+        if scene is not showing and self.enabled:
+            self._allocate(surface.get_size())
+            self._previous.blit(surface, (0, 0))
+            self._pending = True
+        return scene
+
+    def _compose(self, surface, progress):
+        """
+        Draw one frame of the transition.
+
+        Args:
+            surface: pygame Surface of the window
+            progress: float between 0 and 1 of how far through it is
+        """
+        if self._kind == "dissolve":
+            surface.blit(self._next, (0, 0))
+            self._previous.set_alpha(round(255 * (1 - progress)))
+            surface.blit(self._previous, (0, 0))
+        else:
+            # Fade the old frame out to black, then the new frame in
+            frame = self._previous if progress < 0.5 else self._next
+            surface.blit(frame, (0, 0))
+            self._overlay.set_alpha(round(255 * (1 - abs(2 * progress - 1))))
+            surface.blit(self._overlay, (0, 0))
+
+    def play(self, surface):
+        """
+        Show the transition from the captured frame to the frame that has just
+        been drawn, if a frame was captured. The new frame is left on the
+        surface, ready to be shown.
+
+        Args:
+            surface: pygame Surface of the window, holding the new frame
+        """
+        if not self._pending:
+            return
+        self._pending = False
+        self._next.blit(surface, (0, 0))
+
+        start = time.perf_counter()
+        while not pygame.event.peek(SKIP_EVENTS):
+            frame_start = time.perf_counter()
+            progress = (frame_start - start) * 1000 / self._duration
+            if progress >= 1:
+                break
+            self._compose(surface, progress)
+            pygame.display.update()
+            RECORDER.capture()
+
+            # Wait out the rest of a fast frame; a slow frame means the next
+            # one is blended further along, dropping the frames in between
+            frame_time = (time.perf_counter() - frame_start) * 1000
+            METRICS.observe("transition_frame", frame_time)
+            if frame_time > FRAME_BUDGET:
+                METRICS.increment(
+                    "transition_frames_dropped",
+                    amount=int(frame_time // FRAME_BUDGET),
+                )
+            else:
+                pygame.time.wait(int(FRAME_BUDGET - frame_time))
+
+        self._previous.set_alpha(None)
+        surface.blit(self._next, (0, 0))
@@ -0,0 +1,150 @@
+"""
+Map the fixed logical canvas the scenes are laid out on to a window of any
+size.
+
+Scenes position everything in logical pixels (an 800x500 canvas). The
+viewport scales the canvas uniformly to fit the window, centring it with black
+bars on the sides that don't fit, so the game keeps its layout on any panel.
+Images and text are scaled or rendered at the window's resolution once and
+cached (see assets.load_scaled_image), so frames are drawn directly at full
+resolution rather than drawn small and scaled up every frame.
+
+is_headless tells whether there is a window to show anything on at all, so
+work only a watching player would notice (transitions, audio) can be skipped.
+"""
+
+import pygame
+
+# Video drivers with no display to show anything on
+HEADLESS_DRIVERS = ("dummy", "offscreen")
+
+
+def is_headless():
+    """
+    Check whether pygame is running without a real display, such as under the
+    dummy video driver used for tests, benchmarks and headless rendering.
+
+    Returns:
+        boolean, True if the video driver doesn't show anything
+    """
+    return (
+        not pygame.display.get_init()
+        or pygame.display.get_driver() in HEADLESS_DRIVERS
+    )
+
+
+class Viewport:
+    """
+    Scale and offset from the logical canvas to the window.
+    """
+
+    def __init__(self, size, logical_size):
+        """
+        Fit the logical canvas to a window.
+
+        Args:
+            size: tuple of two ints (width, height) of the window in pixels
+            logical_size: tuple of two ints (width, height) of the logical
+                canvas the scenes are laid out on
+        """
+        self._logical_size = logical_size
+        self.resize(size)
+
+    def resize(self, size):
+        """
+        Fit the logical canvas to a window that has changed size.
+
+        Args:
+            size: tuple of two ints (width, height) of the window in pixels
+        """
+        self._size = tuple(size)
+        self._scale = min(
+            size[0] / self._logical_size[0], size[1] / self._logical_size[1]
+        )
+        # Centre the canvas, leaving equal bars either side of it
+        self._offset = (
+            (size[0] - self._logical_size[0] * self._scale) / 2,
+            (size[1] - self._logical_size[1] * self._scale) / 2,
+        )
+
+    @property
+    def size(self):
+        """
+        Return the size of the window.
+
+        Returns:
+            tuple of two ints (width, height) in pixels
+        """
+        return self._size
+
+    @property
+    def scale(self):
+        """
+        Return how much the logical canvas is scaled by to fit the window.
+
+        Returns:
+            float number of window pixels per logical pixel
+        """
+        return self._scale
+
+    @property
+    def rect(self):
+        """
+        Return the area of the window the logical canvas covers.
+
+        Returns:
+            pygame Rect in window pixels
+        """
+        left, top = self.to_screen((0, 0))
+        return pygame.Rect(
+            left,
+            top,
+            self.scale_length(self._logical_size[0]),
+            self.scale_length(self._logical_size[1]),
+        )
+
+    def scale_length(self, length):
+        """
+        Convert a length from logical pixels to window pixels.
+
+        Args:
+            length: number of logical pixels
+
+        Returns:
+            integer number of window pixels (at least one for any non-zero
+                length)
+        """
+        if length == 0:
+            return 0
+        return max(1, round(length * self._scale))
+
+    def to_screen(self, position):
+        """
+        Convert a position on the logical canvas to a position in the window.
+
+        Args:
+            position: tuple of two numbers (x, y) in logical pixels
+
+        Returns:
+            tuple of two ints (x, y) in window pixels
+        """
+        return (
+            round(self._offset[0] + position[0] * self._scale),
+            round(self._offset[1] + position[1] * self._scale),
+        )
+
+    def to_logical(self, position):
+        """
+        Convert a position in the window (such as a mouse click) to a position
+        on the logical canvas.
+
+        Args:
+            position: tuple of two numbers (x, y) in window pixels
+
+        Returns:
+            tuple of two floats (x, y) in logical pixels
+        """
+        return (
+            (position[0] - self._offset[0]) / self._scale,
+            (position[1] - self._offset[1]) / self._scale,
+        )